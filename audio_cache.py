@@ -0,0 +1,178 @@
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import nullcontext
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock
+    fcntl = None
+
+LOCK_SUFFIX = ".lock"
+
+# Files other tools may leave next to an entry (a partial download, decoded
+# PCM); they are never entries themselves
+SIDECAR_SUFFIXES = {LOCK_SUFFIX, ".part", ".ytdl", ".f32"}
+
+
+class AudioCache:
+    """Downloaded audio kept on disk by video ID and format, within a byte budget.
+
+    Every entry is one file named "<video_id>.<format>.<ext>". A download
+    runs into a private temporary directory and is renamed into place, so a
+    file under its final name is always complete. Each entry has a lock
+    file: fetch() holds it exclusively while downloading, so concurrent
+    workers (threads or processes sharing the directory) wait for the first
+    download instead of starting their own, and holds it shared until
+    release(), so eviction never removes audio that is still being read.
+    Once the cache grows past max_bytes (0 = no budget), the least recently
+    used entries that nobody holds are deleted.
+    """
+
+    def __init__(self, directory, max_bytes=0):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._leases = {}
+        self._leases_lock = threading.Lock()
+        # Stands in for flock where fcntl is unavailable
+        self._fallback_lock = threading.Lock()
+
+    def _key(self, video_id, audio_format):
+        return f"{video_id}.{audio_format}"
+
+    def _is_entry(self, path):
+        """Whether path is an audio file this cache wrote."""
+        return (
+            not path.name.startswith(".")
+            and path.suffix not in SIDECAR_SUFFIXES
+            and path.is_file()
+        )
+
+    def _find(self, key):
+        """Path of the complete file for key, or None."""
+        for path in self.directory.glob(f"{key}.*"):
+            # "<key>.<ext>" only: a longer name belongs to another key
+            if path.stem == key and self._is_entry(path):
+                return path
+        return None
+
+    def _lock_file(self, key):
+        return open(self.directory / f".{key}{LOCK_SUFFIX}", "a")
+
+    def _flock(self, lock_file, mode):
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), getattr(fcntl, mode))
+
+    def fetch(self, video_id, audio_format, download):
+        """Return (path, hit) for the audio of video_id in audio_format.
+
+        On a miss, download(directory) must save the audio inside the given
+        temporary directory and return the file's path. The entry stays
+        leased until release(path) is called.
+        """
+        key = self._key(video_id, audio_format)
+        lock_file = self._lock_file(key)
+        try:
+            self._flock(lock_file, "LOCK_SH")
+            path = self._find(key)
+            hit = path is not None
+            if not hit:
+                # Only one worker downloads; the others wait here and then
+                # find its file
+                self._flock(lock_file, "LOCK_EX")
+                with self._fallback_lock if fcntl is None else nullcontext():
+                    path = self._find(key)
+                    hit = path is not None
+                    if not hit:
+                        path = self._download(key, download)
+                self._flock(lock_file, "LOCK_SH")
+            if hit:
+                # Recently used entries are evicted last
+                os.utime(path)
+        except BaseException:
+            lock_file.close()
+            raise
+
+        with self._leases_lock:
+            self._leases.setdefault(str(path), []).append(lock_file)
+        if not hit:
+            self.evict()
+        return str(path), hit
+
+    def _download(self, key, download):
+        staging = tempfile.mkdtemp(prefix=f".{key}.", dir=self.directory)
+        try:
+            downloaded = Path(download(staging))
+            path = self.directory / f"{key}{downloaded.suffix}"
+            os.replace(downloaded, path)
+            return path
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def contains(self, path):
+        """Whether path is a file of this cache."""
+        return Path(path).parent == self.directory
+
+    def release(self, path):
+        """End one lease on path taken by fetch()."""
+        with self._leases_lock:
+            leases = self._leases.get(str(path))
+            if not leases:
+                return
+            lock_file = leases.pop()
+            if not leases:
+                del self._leases[str(path)]
+        lock_file.close()
+
+    def entries(self):
+        """Return [(path, size, last_used)] for every complete entry."""
+        entries = []
+        for path in self.directory.iterdir():
+            if not self._is_entry(path):
+                continue
+            stat = path.stat()
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits max_bytes.
+
+        Returns the deleted paths. Entries leased by any worker are skipped.
+        """
+        if not self.max_bytes:
+            return []
+        entries = sorted(self.entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        removed = []
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            key = path.name[: -len(path.suffix)] if path.suffix else path.name
+            if not self._try_remove(key, path):
+                continue
+            total -= size
+            removed.append(str(path))
+        return removed
+
+    def _try_remove(self, key, path):
+        """Remove path unless its entry is leased; return whether it was."""
+        if fcntl is None:
+            with self._leases_lock:
+                if str(path) in self._leases:
+                    return False
+            path.unlink(missing_ok=True)
+            return True
+        lock_file = self._lock_file(key)
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        try:
+            path.unlink(missing_ok=True)
+            return True
+        finally:
+            lock_file.close()
@@ -0,0 +1,145 @@
+import importlib.util
+import os
+import threading
+import warnings
+
+from lazy_imports import lazy_import
+
+torch = lazy_import("torch")
+whisper = lazy_import("whisper")
+
+_threads_lock = threading.Lock()
+_threads_configured = False
+
+
+def configure_torch_threads():
+    """Apply TORCH_THREADS / TORCH_INTEROP_THREADS once per process.
+
+    0 (the default) leaves torch's own choice in place. Inter-op threads can
+    only be set before torch runs any parallel work, so a late call keeps
+    the current value.
+    """
+    global _threads_configured
+    with _threads_lock:
+        if _threads_configured:
+            return
+        _threads_configured = True
+        threads = int(os.getenv("TORCH_THREADS", "0"))
+        interop_threads = int(os.getenv("TORCH_INTEROP_THREADS", "0"))
+        if threads:
+            torch.set_num_threads(threads)
+        if interop_threads:
+            try:
+                torch.set_interop_threads(interop_threads)
+            except RuntimeError:
+                pass
+
+
+class WhisperBackend:
+    """openai-whisper PyTorch weights (fp32 on CPU, fp16 on GPU)."""
+
+    name = "whisper"
+    cpu_only = False
+    # Models work with whisper.decode, so windows can be decoded in batches
+    batched_decoding = True
+
+    def load(self, model_size, device):
+        """Return a model whose transcribe() behaves like whisper's."""
+        configure_torch_threads()
+        return whisper.load_model(model_size, device=device)
+
+
+class QuantizedWhisperBackend(WhisperBackend):
+    """openai-whisper with its Linear layers dynamically quantized to int8.
+
+    Roughly halves the weight memory and speeds up the matrix multiplies of
+    the encoder and decoder on CPU; transcribe() is unchanged.
+    """
+
+    name = "whisper-int8"
+    cpu_only = True
+
+    def load(self, model_size, device):
+        model = super().load(model_size, "cpu")
+        # whisper.model.Linear subclasses nn.Linear only to cast its weights
+        # to the input dtype; quantize_dynamic matches exact types, so turn
+        # the layers back into plain nn.Linear or none of them is quantized
+        for module in model.modules():
+            if isinstance(module, torch.nn.Linear):
+                module.__class__ = torch.nn.Linear
+        with warnings.catch_warnings():
+            # torch.ao.quantization warns about its future move to torchao
+            warnings.simplefilter("ignore")
+            return torch.ao.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+
+
+class FasterWhisperModel:
+    """Adapter giving a faster_whisper.WhisperModel whisper's result shape."""
+
+    def __init__(self, model):
+        self.model = model
+
+    def transcribe(self, audio, **options):
+        segments, info = self.model.transcribe(
+            audio,
+            language=options.get("language"),
+            initial_prompt=options.get("initial_prompt"),
+        )
+        segments = [
+            {"id": index, "start": s.start, "end": s.end, "text": s.text}
+            for index, s in enumerate(segments)
+        ]
+        return {
+            "text": "".join(segment["text"] for segment in segments),
+            "segments": segments,
+            "language": info.language,
+        }
+
+
+class FasterWhisperBackend:
+    """CTranslate2 models through the optional faster-whisper package.
+
+    FASTER_WHISPER_COMPUTE_TYPE picks the weight precision (int8 by default
+    on CPU); TORCH_THREADS sets the number of CPU threads.
+    """
+
+    name = "faster-whisper"
+    cpu_only = False
+    batched_decoding = False
+
+    def load(self, model_size, device):
+        from faster_whisper import WhisperModel
+
+        default_compute = "int8" if device == "cpu" else "float16"
+        model = WhisperModel(
+            model_size,
+            device=device,
+            compute_type=os.getenv("FASTER_WHISPER_COMPUTE_TYPE", default_compute),
+            cpu_threads=int(os.getenv("TORCH_THREADS", "0")),
+        )
+        return FasterWhisperModel(model)
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (WhisperBackend, QuantizedWhisperBackend, FasterWhisperBackend)
+}
+
+
+def get_backend(name=None):
+    """Return the backend called name (default: WHISPER_BACKEND or whisper).
+
+    Raises ValueError for an unknown name and RuntimeError when the package
+    the backend needs is not installed.
+    """
+    name = name or os.getenv("WHISPER_BACKEND", "whisper")
+    if name not in BACKENDS:
+        choices = ", ".join(BACKENDS)
+        raise ValueError(f"Unknown WHISPER_BACKEND '{name}' (choose from {choices})")
+    if name == "faster-whisper" and importlib.util.find_spec("faster_whisper") is None:
+        raise RuntimeError(
+            "WHISPER_BACKEND=faster-whisper needs 'pip install faster-whisper'"
+        )
+    return BACKENDS[name]()
@@ -0,0 +1,140 @@
+import numpy as np
+
+from chunking import SAMPLE_RATE, SegmentStitcher, find_split_points
+from lazy_imports import lazy_import
+
+torch = lazy_import("torch")
+whisper = lazy_import("whisper")
+
+# Windows are cut at the quietest frame within SEARCH_SECONDS of every
+# WINDOW_SECONDS, so none is longer than Whisper's 30-second input
+WINDOW_SECONDS = 27
+SEARCH_SECONDS = 3
+
+# Seconds per Whisper timestamp token
+TIME_PRECISION = 0.02
+
+# whisper.transcribe's fallback rules: a window is decoded again at the next
+# temperature when its text is too repetitive or too unlikely, and skipped
+# as silence when the model is confident nothing is said
+TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+
+def plan_windows(audio, sample_rate=SAMPLE_RATE):
+    """Split audio into back-to-back (start, end) windows cut at pauses."""
+    points = find_split_points(
+        audio, WINDOW_SECONDS, search_seconds=SEARCH_SECONDS, sample_rate=sample_rate
+    )
+    return [(start, end) for start, end in zip(points[:-1], points[1:]) if end > start]
+
+
+def parse_segments(tokenizer, result, duration):
+    """Turn one window's DecodingResult into whisper-style segment dicts.
+
+    A timestamp token closes the text before it and opens the next segment;
+    text left without a closing timestamp runs to the end of the window.
+    """
+    timestamp_begin = tokenizer.timestamp_begin
+    segments = []
+    start = None
+    text_tokens = []
+
+    def close(end):
+        if text_tokens:
+            segments.append(
+                {
+                    "start": start or 0.0,
+                    "end": min(max(end, start or 0.0), duration),
+                    "text": tokenizer.decode(text_tokens),
+                    "tokens": list(text_tokens),
+                    "avg_logprob": result.avg_logprob,
+                    "no_speech_prob": result.no_speech_prob,
+                    "temperature": result.temperature,
+                }
+            )
+
+    for token in result.tokens:
+        if token < timestamp_begin:
+            text_tokens.append(token)
+            continue
+        time = (token - timestamp_begin) * TIME_PRECISION
+        if text_tokens:
+            close(time)
+            text_tokens = []
+        # An end timestamp also starts the next segment unless another
+        # timestamp follows it
+        start = time
+    close(duration)
+    return segments
+
+
+def _needs_fallback(result):
+    if result.compression_ratio > COMPRESSION_RATIO_THRESHOLD:
+        return True
+    return result.avg_logprob < LOGPROB_THRESHOLD
+
+
+def _is_silence(result):
+    return (
+        result.no_speech_prob > NO_SPEECH_THRESHOLD
+        and result.avg_logprob < LOGPROB_THRESHOLD
+    )
+
+
+def decode_batched(model, audios, batch_size=8, language=None, fp16=False):
+    """Transcribe 16 kHz PCM arrays with their windows decoded in batches.
+
+    The windows of every audio are queued back to back and decoded
+    batch_size at a time with one encoder and decoder pass per batch, so
+    one long video or several short ones keep the matrix multiplies large.
+    Windows are decoded independently (no previous-text prompt); the ones
+    whisper.transcribe would retry are decoded again, together, at rising
+    temperatures. Returns one whisper.transcribe-style result per audio.
+    """
+    jobs = [
+        (index, start, np.asarray(audio[start:end], dtype=np.float32))
+        for index, audio in enumerate(audios)
+        for start, end in plan_windows(audio)
+    ]
+    n_mels = model.dims.n_mels
+    tokenizer = whisper.tokenizer.get_tokenizer(
+        model.is_multilingual, num_languages=model.num_languages, task="transcribe"
+    )
+
+    results = [None] * len(jobs)
+    pending = list(range(len(jobs)))
+    for temperature in TEMPERATURES:
+        options = whisper.DecodingOptions(
+            language=language, temperature=temperature, fp16=fp16
+        )
+        retry = []
+        for begin in range(0, len(pending), batch_size):
+            batch = pending[begin : begin + batch_size]
+            mel = torch.stack(
+                [
+                    whisper.log_mel_spectrogram(whisper.pad_or_trim(jobs[i][2]), n_mels)
+                    for i in batch
+                ]
+            ).to(model.device)
+            with torch.no_grad():
+                decoded = whisper.decode(model, mel, options)
+            for i, result in zip(batch, decoded):
+                results[i] = result
+                if _needs_fallback(result) and not _is_silence(result):
+                    retry.append(i)
+        pending = retry
+        if not pending:
+            break
+
+    stitchers = [SegmentStitcher() for _ in audios]
+    for (index, start, samples), result in zip(jobs, results):
+        window = {"language": result.language, "segments": []}
+        if not _is_silence(result):
+            window["segments"] = parse_segments(
+                tokenizer, result, len(samples) / SAMPLE_RATE
+            )
+        stitchers[index].add(start / SAMPLE_RATE, window)
+    return [stitcher.result() for stitcher in stitchers]
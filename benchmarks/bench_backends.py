@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Accuracy versus speed of the inference backends, per model size.
+
+Usage:
+    python benchmarks/bench_backends.py --audio talk1.m4a talk2.m4a \\
+        --models tiny base small --backends whisper whisper-int8 faster-whisper
+
+Every fixture file is transcribed on CPU with each backend and model size.
+The report gives wall time, real-time factor, and word error rate against
+the fp32 openai-whisper transcript of the same file and size. Use it to
+pick WHISPER_BACKEND per WHISPER_MODEL. Needs ffmpeg and the model weights.
+Backends that are not installed are skipped.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import BACKENDS  # noqa: E402
+from chunking import SAMPLE_RATE  # noqa: E402
+from model_registry import ModelRegistry  # noqa: E402
+from transcriber import WhisperTranscriber  # noqa: E402
+
+
+def words(text):
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level Levenshtein distance divided by the reference length."""
+    reference, hypothesis = words(reference), words(hypothesis)
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (ref_word != hyp_word),
+                )
+            )
+        previous = current
+    return previous[-1] / max(1, len(reference))
+
+
+def run(backend, model_size, audios):
+    """Transcribe every fixture; return (texts, seconds) after a warm load."""
+    try:
+        transcriber = WhisperTranscriber(
+            model_size, registry=ModelRegistry(max_models=1), backend=backend
+        )
+    except RuntimeError as e:
+        print(f"Skipping {backend}: {e}", file=sys.stderr)
+        return None, None
+    transcriber.model  # load outside the timed region
+    texts = []
+    started = time.perf_counter()
+    for audio in audios:
+        texts.append(transcriber.transcribe(audio)["text"])
+    return texts, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--audio", nargs="+", required=True, help="Fixture files")
+    parser.add_argument("--models", nargs="+", default=["tiny", "base"])
+    parser.add_argument(
+        "--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS)
+    )
+    args = parser.parse_args()
+    os.environ["USE_GPU"] = "false"
+    os.environ["TRANSCRIBE_PROCESSES"] = "1"
+    os.environ["VAD"] = "false"
+
+    import whisper
+
+    audios = [whisper.load_audio(path) for path in args.audio]
+    audio_seconds = sum(len(audio) for audio in audios) / SAMPLE_RATE
+
+    results = []
+    for model_size in args.models:
+        baseline = run("whisper", model_size, audios)
+        references = baseline[0]
+        for backend in args.backends:
+            if backend == "whisper":
+                texts, seconds = baseline
+            else:
+                texts, seconds = run(backend, model_size, audios)
+            if texts is None:
+                continue
+            errors = [
+                word_error_rate(reference, text)
+                for reference, text in zip(references, texts)
+            ]
+            results.append(
+                {
+                    "model": model_size,
+                    "backend": backend,
+                    "seconds": round(seconds, 2),
+                    "realtime_factor": round(seconds / audio_seconds, 4),
+                    "wer_vs_fp32": round(sum(errors) / len(errors), 4),
+                }
+            )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
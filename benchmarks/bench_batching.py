@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""CPU throughput of batched window decoding across batch sizes.
+
+Usage:
+    python benchmarks/bench_batching.py --audio talk.m4a short1.m4a short2.m4a \\
+        --models tiny base --batch-sizes 1 2 4 8
+
+For each model, the fixtures are transcribed on CPU once with
+whisper.transcribe (window by window, as DECODE_BATCH_SIZE=1 does) and once
+per batch size with batched_decoding.decode_batched, all fixtures batched
+together as transcribe_many() does for queued short videos. The report
+gives audio seconds transcribed per wall-clock second; pick the fastest
+batch size as DECODE_BATCH_SIZE. Needs ffmpeg and the model weights.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batched_decoding import decode_batched  # noqa: E402
+from chunking import SAMPLE_RATE  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--audio", nargs="+", required=True, help="Fixture files")
+    parser.add_argument("--models", nargs="+", default=["tiny", "base"])
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 2, 4, 8, 16])
+    parser.add_argument("--language", default="en")
+    args = parser.parse_args()
+
+    import whisper
+
+    from backends import configure_torch_threads
+
+    configure_torch_threads()
+    audios = [whisper.load_audio(path) for path in args.audio]
+    audio_seconds = sum(len(audio) for audio in audios) / SAMPLE_RATE
+
+    results = []
+    for model_size in args.models:
+        model = whisper.load_model(model_size, device="cpu")
+
+        def record(mode, batch_size, seconds):
+            results.append(
+                {
+                    "model": model_size,
+                    "mode": mode,
+                    "batch_size": batch_size,
+                    "seconds": round(seconds, 2),
+                    "audio_seconds_per_second": round(audio_seconds / seconds, 2),
+                }
+            )
+
+        started = time.perf_counter()
+        for audio in audios:
+            model.transcribe(audio, language=args.language, fp16=False)
+        record("sequential", 1, time.perf_counter() - started)
+
+        for batch_size in args.batch_sizes:
+            started = time.perf_counter()
+            decode_batched(model, audios, batch_size, language=args.language)
+            record("batched", batch_size, time.perf_counter() - started)
+        del model
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
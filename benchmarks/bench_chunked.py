@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Compare single-call and chunked (process pool) transcription wall time.
+
+Usage:
+    python benchmarks/bench_chunked.py --audio lecture.m4a --model tiny --workers 4
+    python benchmarks/bench_chunked.py --duration 1200 --chunk-minutes 2
+
+Without --audio a synthetic signal of --duration seconds is used, which is
+enough to compare decoding throughput but not transcript quality.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chunking import SAMPLE_RATE, ChunkedTranscriber  # noqa: E402
+
+
+def synthetic_audio(seconds):
+    """Amplitude-modulated noise with a short pause every 7 seconds."""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    audio = rng.normal(0, 0.1, len(t)) * (0.5 + 0.5 * np.sin(2 * np.pi * 3 * t))
+    audio[(t % 7) > 6.5] = 0.0
+    return audio.astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--audio", help="Audio file to transcribe (needs ffmpeg)")
+    parser.add_argument("--duration", type=float, default=600)
+    parser.add_argument("--model", default="tiny")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-minutes", type=float, default=2)
+    args = parser.parse_args()
+
+    import whisper
+
+    audio = (
+        whisper.load_audio(args.audio) if args.audio else synthetic_audio(args.duration)
+    )
+    options = {"fp16": False, "language": "en", "verbose": None}
+    duration = len(audio) / SAMPLE_RATE
+
+    model = whisper.load_model(args.model, device="cpu")
+    started = time.perf_counter()
+    model.transcribe(audio, **options)
+    single = time.perf_counter() - started
+    del model
+
+    chunked = ChunkedTranscriber(
+        args.model, workers=args.workers, chunk_minutes=args.chunk_minutes
+    )
+    # Warm the pool so model loading is not counted against the chunked path
+    chunked.transcribe(audio[: 5 * SAMPLE_RATE], **options)
+    started = time.perf_counter()
+    chunked.transcribe(audio, **options)
+    parallel = time.perf_counter() - started
+    chunked.close()
+
+    print(
+        json.dumps(
+            {
+                "model": args.model,
+                "audio_seconds": round(duration, 1),
+                "workers": args.workers,
+                "chunk_minutes": args.chunk_minutes,
+                "single_call_seconds": round(single, 2),
+                "chunked_seconds": round(parallel, 2),
+                "speedup": round(single / parallel, 2),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
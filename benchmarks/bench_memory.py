@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Peak RSS of whole-array vs memory-mapped windowed audio handling.
+
+Usage:
+    python benchmarks/bench_memory.py --durations 600 3600 10800
+
+For each duration a synthetic 16 kHz float32 PCM file is written once, then
+a fresh process either loads it whole and computes one log-mel spectrogram
+(what model.transcribe() does with a full array) or walks it with
+PcmFileReader in STREAM_WINDOW_SECONDS windows, computing a mel per window.
+No model weights are needed; peak RSS is reported in MB.
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from chunking import SAMPLE_RATE  # noqa: E402
+
+
+def write_pcm(path, seconds):
+    """Write seconds of low-level noise in one-minute blocks."""
+    rng = np.random.default_rng(0)
+    with open(path, "wb") as handle:
+        remaining = int(seconds * SAMPLE_RATE)
+        while remaining:
+            n = min(remaining, 60 * SAMPLE_RATE)
+            handle.write(rng.normal(0, 0.1, n).astype(np.float32).tobytes())
+            remaining -= n
+
+
+def run_child(mode, path, window_seconds):
+    """Process one file in this process and print peak RSS in MB."""
+    import whisper
+
+    if mode == "full":
+        audio = np.fromfile(path, dtype=np.float32)
+        whisper.log_mel_spectrogram(audio)
+    else:
+        from streaming import PcmFileReader, StreamingTranscriber
+
+        def mel_window(samples, initial_prompt=None):
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(samples))
+            return {"segments": [], "language": "en"}
+
+        streamer = StreamingTranscriber(mel_window, window_seconds, overlap_seconds=5)
+        streamer.run(PcmFileReader(path))
+
+    # ru_maxrss is in kilobytes on Linux
+    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+
+
+def measure(mode, path, window_seconds):
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", mode, path],
+        env=dict(os.environ, STREAM_WINDOW_SECONDS=str(window_seconds)),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--durations", type=float, nargs="+", default=[600, 3600])
+    parser.add_argument("--window-seconds", type=float, default=30)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help="internal")
+    args = parser.parse_args()
+
+    if args.child:
+        window = float(os.getenv("STREAM_WINDOW_SECONDS", args.window_seconds))
+        run_child(args.child[0], args.child[1], window)
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for duration in args.durations:
+            path = os.path.join(temp_dir, f"{int(duration)}.f32")
+            write_pcm(path, duration)
+            results.append(
+                {
+                    "duration_seconds": duration,
+                    "full_peak_rss_mb": round(
+                        measure("full", path, args.window_seconds), 1
+                    ),
+                    "windowed_peak_rss_mb": round(
+                        measure("windowed", path, args.window_seconds), 1
+                    ),
+                }
+            )
+            os.remove(path)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Measure cold start of main.py: launch to interactive prompt, then quit.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 5 --max-seconds 1.0
+
+Exits non-zero when the median exceeds --max-seconds, so it can guard
+against heavy imports creeping back into startup.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def time_startup(transcripts_dir):
+    """Start main.py, send 'quit' and return the wall time in seconds."""
+    env = dict(
+        os.environ,
+        TRANSCRIPTS_DIR=transcripts_dir,
+        PRELOAD_MODEL="false",
+        TERM="dumb",
+    )
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, os.path.join(PROJECT_ROOT, "main.py")],
+        input="quit\n",
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as transcripts_dir:
+        timings = [time_startup(transcripts_dir) for _ in range(args.runs)]
+
+    median = statistics.median(timings)
+    print(
+        json.dumps(
+            {
+                "runs": args.runs,
+                "median_seconds": round(median, 3),
+                "max_seconds": round(max(timings), 3),
+                "budget_seconds": args.max_seconds,
+            },
+            indent=2,
+        )
+    )
+    sys.exit(0 if median <= args.max_seconds else 1)
+
+
+if __name__ == "__main__":
+    main()
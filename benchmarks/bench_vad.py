@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Share of audio skipped by VAD and the resulting transcription speedup.
+
+Usage:
+    python benchmarks/bench_vad.py --minutes 10 --silence 0.3 0.5 0.7
+    python benchmarks/bench_vad.py --audio lecture.m4a --real-model
+
+Synthetic audio alternates speech-like noise with silent gaps so that the
+given share of it is silence (--audio transcribes a real file instead).
+Each case is transcribed through WhisperTranscriber.transcribe with VAD off
+and on. By default the model is the offline FakeModel from fakes.py, whose
+cost is proportional to the audio length; --real-model uses Whisper on CPU
+(--model, tiny by default), where skipped silence also avoids the decoder
+loops Whisper spends hallucinating over it.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import numpy as np  # noqa: E402
+
+from chunking import SAMPLE_RATE  # noqa: E402
+from fakes import FakeModel  # noqa: E402
+from model_registry import ModelRegistry  # noqa: E402
+from transcriber import WhisperTranscriber  # noqa: E402
+from vad import SpeechTimeline, detect_speech  # noqa: E402
+
+
+def lecture_audio(seconds, silence, seed=0):
+    """Speech-like noise with 20 s gaps making up `silence` of the total."""
+    rng = np.random.default_rng(seed)
+    audio = np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+    gap = 20 * SAMPLE_RATE
+    speech = int(gap * (1 - silence) / silence) if silence else len(audio)
+    position = 0
+    while position < len(audio):
+        end = min(len(audio), position + speech)
+        audio[position:end] = rng.normal(0, 0.1, end - position)
+        position = end + gap
+    return audio
+
+
+def transcribe(audio, vad, args):
+    os.environ["VAD"] = "true" if vad else "false"
+    transcriber = WhisperTranscriber(args.model, registry=args.registry)
+    if not args.real_model:
+        transcriber.registry.get(transcriber.model_key, FakeModel)
+    transcriber.model  # load outside the timed region
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stderr):
+        transcriber.transcribe(audio)
+    return time.perf_counter() - started
+
+
+def run_case(name, audio, args):
+    plain_seconds = transcribe(audio, False, args)
+    vad_seconds = transcribe(audio, True, args)
+    timeline = SpeechTimeline(detect_speech(audio), len(audio))
+    return {
+        "case": name,
+        "audio_seconds": round(timeline.total_seconds, 1),
+        "skipped_percent": round(100 * timeline.skipped_fraction, 1),
+        "seconds_without_vad": round(plain_seconds, 3),
+        "seconds_with_vad": round(vad_seconds, 3),
+        "speedup": round(plain_seconds / vad_seconds, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--minutes", type=float, default=10)
+    parser.add_argument("--silence", type=float, nargs="+", default=[0.3, 0.5, 0.7])
+    parser.add_argument("--audio", help="Transcribe this file instead")
+    parser.add_argument("--real-model", action="store_true")
+    parser.add_argument("--model", default="tiny")
+    args = parser.parse_args()
+    os.environ["USE_GPU"] = "false"
+    os.environ["TRANSCRIBE_PROCESSES"] = "1"
+    args.registry = ModelRegistry()
+
+    if args.audio:
+        import whisper
+
+        cases = [(args.audio, whisper.load_audio(args.audio))]
+    else:
+        cases = [
+            (f"silence_{share:.0%}", lecture_audio(args.minutes * 60, share))
+            for share in args.silence
+        ]
+    print(json.dumps([run_case(name, audio, args) for name, audio in cases], indent=2))
+
+
+if __name__ == "__main__":
+    main()
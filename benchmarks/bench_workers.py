@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Check that queue throughput scales with the number of worker processes.
+
+Usage:
+    python benchmarks/bench_workers.py --jobs 32 --workers 1 2 4 --work-seconds 0.5
+
+Each run queues --jobs fake jobs in a fresh SQLite queue and starts worker
+processes that claim them like 'python main.py worker' does. A job burns
+--work-seconds of CPU (standing in for Whisper) and saves a transcript
+through a TranscriptManager sharing one output directory, so the run also
+checks that no journal entry is lost. Prints jobs/second and speedup over
+the first worker count. --sleep waits instead of burning CPU, which measures
+the queue and journal overhead alone on machines with few cores.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from job_queue import JobQueue  # noqa: E402
+from transcript_manager import TranscriptManager  # noqa: E402
+from worker import Worker  # noqa: E402
+
+
+def burn_cpu(seconds):
+    deadline = time.process_time() + seconds
+    while time.process_time() < deadline:
+        sum(i * i for i in range(1000))
+
+
+def worker_main(db_path, output_dir, work_seconds, sleep):
+    manager = TranscriptManager(output_dir=output_dir)
+
+    def process_job(url, refresh):
+        if sleep:
+            time.sleep(work_seconds)
+        else:
+            burn_cpu(work_seconds)
+        _, _, folder = manager.save_transcript(
+            {"title": url, "duration": 60, "uploader": "bench"},
+            {"full_text": "bench", "segments": [], "language": "en"},
+            url,
+            cache_key=url,
+        )
+        return {"result": {"folder": str(folder)}, "timings": {}}
+
+    worker = Worker(JobQueue(db_path), process_job, poll_interval=0.05)
+    while worker.run_once():
+        pass
+
+
+def run(workers, jobs, work_seconds, sleep):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "jobs.db")
+        output_dir = os.path.join(temp_dir, "transcripts")
+        queue = JobQueue(db_path, max_pending=0)
+        for index in range(jobs):
+            queue.submit(f"https://youtu.be/bench{index:05d}")
+
+        context = multiprocessing.get_context("spawn")
+        processes = [
+            context.Process(
+                target=worker_main, args=(db_path, output_dir, work_seconds, sleep)
+            )
+            for _ in range(workers)
+        ]
+        started = time.perf_counter()
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - started
+
+        counts = queue.counts()
+        saved = len(TranscriptManager(output_dir=output_dir).metadata)
+        if counts["done"] != jobs or saved != jobs:
+            raise SystemExit(f"Lost work: {counts}, {saved} journal entries")
+        return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=32)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--work-seconds", type=float, default=0.5)
+    parser.add_argument("--sleep", action="store_true", help="Sleep instead of CPU")
+    args = parser.parse_args()
+
+    results = []
+    baseline = None
+    for workers in args.workers:
+        elapsed = run(workers, args.jobs, args.work_seconds, args.sleep)
+        baseline = baseline or elapsed
+        results.append(
+            {
+                "workers": workers,
+                "seconds": round(elapsed, 2),
+                "jobs_per_second": round(args.jobs / elapsed, 2),
+                "speedup": round(baseline / elapsed, 2),
+            }
+        )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Offline stand-ins for yt-dlp and Whisper used by the benchmark suite.
+
+FakeYoutubeDL resolves any watch URL to a fixed-length video and "downloads"
+synthetic float32 PCM; FakeModel does CPU work proportional to the audio
+length (one FFT per 30 s window, like computing a log-mel) and returns a
+segment every five seconds. Neither touches the network.
+"""
+
+import os
+
+import numpy as np
+
+from chunking import SAMPLE_RATE
+from youtube_downloader import extract_video_id
+
+
+def synthetic_audio(seconds, seed=0):
+    """Amplitude-modulated noise with a short pause every 7 seconds."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    audio = rng.normal(0, 0.1, len(t)) * (0.5 + 0.5 * np.sin(2 * np.pi * 3 * t))
+    audio[(t % 7) > 6.5] = 0.0
+    return audio.astype(np.float32)
+
+
+class FakeYoutubeDL:
+    """Minimal yt_dlp.YoutubeDL replacement for resolve() and download_audio()."""
+
+    duration = 60
+
+    def __init__(self, opts):
+        self.opts = opts
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def extract_info(self, url, download=True):
+        video_id = extract_video_id(url) or "benchmark00"
+        return {
+            "id": video_id,
+            "title": f"Benchmark {video_id}",
+            "duration": self.duration,
+            "uploader": "Benchmarks",
+            "upload_date": "20240101",
+            "ext": "webm",
+        }
+
+    def process_ie_result(self, info, download=True):
+        path = self.opts["outtmpl"].replace("%(ext)s", "webm")
+        if download:
+            synthetic_audio(self.duration).tofile(path)
+        info["requested_downloads"] = [{"filepath": path}]
+        return info
+
+
+def load_synthetic_audio(path):
+    """Stand-in for whisper.load_audio on files written by FakeYoutubeDL."""
+    return np.fromfile(path, dtype=np.float32)
+
+
+class FakeModel:
+    """Whisper model stand-in with work proportional to the audio length."""
+
+    def transcribe(self, audio, **options):
+        if isinstance(audio, str):
+            audio = load_synthetic_audio(audio)
+        window = 30 * SAMPLE_RATE
+        for start in range(0, len(audio), window):
+            np.abs(np.fft.rfft(audio[start : start + window]))
+        duration = len(audio) / SAMPLE_RATE
+        segments = [
+            {
+                "start": float(start),
+                "end": float(min(start + 5, duration)),
+                "text": " a",
+            }
+            for start in range(0, int(duration), 5)
+        ]
+        return {
+            "text": "".join(segment["text"] for segment in segments),
+            "segments": segments,
+            "language": "en",
+        }
+
+
+def bench_environment(root):
+    """Environment for an offline app: temp dirs, CPU, no model preload."""
+    return {
+        "TRANSCRIPTS_DIR": os.path.join(root, "transcripts"),
+        "TEMP_DIR": os.path.join(root, "tmp"),
+        "USE_GPU": "false",
+        "PRELOAD_MODEL": "false",
+        "CAPTIONS_FIRST": "false",
+        "STREAMING": "false",
+        "LOW_MEMORY_AUDIO": "false",
+        "CHECKPOINT_TRANSCRIPTION": "false",
+        "TRANSCRIBE_PROCESSES": "1",
+        "METRICS_LOG": "none",
+    }
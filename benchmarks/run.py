@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""Run the offline benchmark suite and compare it with a stored baseline.
+
+Usage:
+    python benchmarks/run.py                                  # quick suite
+    python benchmarks/run.py --entries 10000 100000 --output results.json
+    python benchmarks/run.py --baseline benchmarks/baseline.json
+    python benchmarks/run.py --save-baseline benchmarks/baseline.json
+    python benchmarks/run.py --only archive format --real-model
+
+Nothing touches the network: yt-dlp and Whisper are replaced by the fakes in
+benchmarks/fakes.py and audio is synthetic. --real-model runs the chunk
+benchmark on the real Whisper tiny model on CPU instead (needs its weights).
+
+Metrics ending in _per_second are higher-is-better, all others lower-is-better.
+With --baseline, any metric worse than the baseline by more than --tolerance
+is reported and the exit status is 1.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import types
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import numpy as np  # noqa: E402
+
+from bench_startup import time_startup  # noqa: E402
+from chunking import SAMPLE_RATE  # noqa: E402
+from fakes import (  # noqa: E402
+    FakeModel,
+    FakeYoutubeDL,
+    bench_environment,
+    load_synthetic_audio,
+    synthetic_audio,
+)
+
+
+def timed(function, repeat=3):
+    """Median wall time of function() over repeat runs."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def bench_startup(args, root):
+    transcripts_dir = os.path.join(root, "startup")
+    return {
+        "startup_seconds": statistics.median(
+            time_startup(transcripts_dir) for _ in range(args.startup_runs)
+        )
+    }
+
+
+def write_journal(output_dir, entries):
+    """Write a metadata.jsonl archive index with entries records."""
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, "metadata.jsonl"), "w", encoding="utf-8") as f:
+        for index in range(entries):
+            key = f"20240101_000000_{index:08x}"
+            folder = os.path.join(output_dir, key)
+            entry = {
+                "title": f"Video {index}",
+                "url": f"https://youtu.be/v{index:010d}",
+                "folder": key,
+                "txt_file": os.path.join(folder, "transcript.txt"),
+                "json_file": os.path.join(folder, "transcript.json"),
+                "metadata_file": os.path.join(folder, "metadata.json"),
+                "transcribed_at": "2024-01-01T00:00:00",
+                "duration": 600,
+                "source": "whisper",
+                "cache_key": f"{index:024x}",
+                "last_accessed": "2024-01-01T00:00:00",
+                "size_bytes": 20000,
+            }
+            record = {"op": "put", "key": key, "entry": entry}
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+def bench_archive(args, root):
+    from transcript_manager import TranscriptManager
+
+    video_info = {"title": "Benchmark", "duration": 600, "uploader": "Benchmarks"}
+    transcript = {
+        "full_text": "hello world " * 500,
+        "segments": [f"[00:{i:02d} - 00:{i + 1:02d}] hello world" for i in range(59)],
+        "language": "en",
+    }
+    results = {}
+    for entries in args.entries:
+        output_dir = os.path.join(root, f"archive_{entries}")
+        write_journal(output_dir, entries)
+
+        started = time.perf_counter()
+        manager = TranscriptManager(output_dir=output_dir)
+        results[f"archive_{entries}_load_seconds"] = time.perf_counter() - started
+
+        saves = 20
+        started = time.perf_counter()
+        for index in range(saves):
+            manager.save_transcript(
+                video_info, transcript, "https://youtu.be/x", cache_key=f"new{index}"
+            )
+        results[f"archive_{entries}_save_seconds"] = (
+            time.perf_counter() - started
+        ) / saves
+        results[f"archive_{entries}_list_seconds"] = timed(manager.list_transcripts)
+    return results
+
+
+def bench_format(args, root):
+    from model_registry import ModelRegistry
+    from transcriber import WhisperTranscriber
+
+    transcriber = WhisperTranscriber("tiny", registry=ModelRegistry())
+    result = {
+        "text": " word" * args.segments,
+        "segments": [
+            {"start": i * 2.0, "end": i * 2.0 + 2.0, "text": " some words here"}
+            for i in range(args.segments)
+        ],
+        "language": "en",
+    }
+    return {
+        f"format_{args.segments // 1000}k_segments_seconds": timed(
+            lambda: transcriber.format_transcript(result, include_timestamps=True)
+        )
+    }
+
+
+def bench_write(args, root):
+    import tracemalloc
+
+    from segments import Segment
+    from transcript_writers import WRITERS, write_transcript
+
+    segments = [
+        Segment(i * 2.0, i * 2.0 + 2.0, "some words here", -0.25, 0.01, [1, 2, 3])
+        for i in range(args.segments)
+    ]
+    document = {
+        "video_info": {"title": "Benchmark"},
+        "url": "https://youtu.be/x",
+        "transcript": {"full_text": "", "segments": segments, "language": "en"},
+    }
+    folder = os.path.join(root, "write")
+    os.makedirs(folder, exist_ok=True)
+    prefix = f"write_{args.segments // 1000}k_segments"
+    results = {
+        f"{prefix}_seconds": timed(lambda: write_transcript(folder, document, WRITERS))
+    }
+    # Streaming writers should allocate per segment, not per file
+    tracemalloc.start()
+    write_transcript(folder, document, WRITERS)
+    results[f"{prefix}_peak_alloc_kb"] = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+    return results
+
+
+def bench_chunk(args, root):
+    from model_registry import ModelRegistry
+    from transcriber import WhisperTranscriber
+
+    transcriber = WhisperTranscriber("tiny", registry=ModelRegistry())
+    if not args.real_model:
+        transcriber.registry.get(transcriber.model_key, FakeModel)
+    transcriber.model  # load outside the timed region
+
+    windows = args.chunk_windows
+    audio = synthetic_audio(30 * windows)
+    window = 30 * SAMPLE_RATE
+    started = time.perf_counter()
+    for start in range(0, len(audio), window):
+        transcriber.transcribe_window(audio[start : start + window])
+    elapsed = time.perf_counter() - started
+    return {"chunk_audio_seconds_per_second": 30 * windows / elapsed}
+
+
+def bench_batch(args, root):
+    import main as main_module
+    import transcriber as transcriber_module
+    import youtube_downloader
+
+    batch_root = os.path.join(root, "batch")
+    os.environ.update(bench_environment(batch_root))
+    os.makedirs(os.environ["TEMP_DIR"], exist_ok=True)
+    youtube_downloader.yt_dlp = types.SimpleNamespace(YoutubeDL=FakeYoutubeDL)
+    transcriber_module.WhisperTranscriber.load_audio = (
+        lambda self, path: load_synthetic_audio(path)
+    )
+
+    url_file = os.path.join(batch_root, "urls.txt")
+    with open(url_file, "w", encoding="utf-8") as f:
+        for index in range(args.batch_videos):
+            f.write(f"https://www.youtube.com/watch?v=bench{index:06d}\n")
+
+    app = main_module.YouTubeTranscriptExtractor()
+    app.transcriber.registry.get(app.transcriber.model_key, FakeModel)
+    started = time.perf_counter()
+    results = app.process_batch(url_file)
+    elapsed = time.perf_counter() - started
+    if any(result["error"] for result in results):
+        raise RuntimeError("Batch benchmark had failures")
+    return {"batch_videos_per_second": len(results) / elapsed}
+
+
+BENCHMARKS = {
+    "startup": bench_startup,
+    "archive": bench_archive,
+    "format": bench_format,
+    "write": bench_write,
+    "chunk": bench_chunk,
+    "batch": bench_batch,
+}
+
+
+@contextlib.contextmanager
+def stdout_to_stderr():
+    """Send everything written to stdout, by Python or a child process
+    (TerminalUI clears the screen with os.system), to stderr instead."""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    os.dup2(2, 1)
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            yield
+    finally:
+        sys.stdout.flush()
+        os.dup2(saved, 1)
+        os.close(saved)
+
+
+def compare(results, baseline, tolerance):
+    """Return {metric: {baseline, current, ratio, regression}}."""
+    comparison = {}
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        ratio = current / previous
+        if name.endswith("_per_second"):
+            regression = ratio < 1 - tolerance
+        else:
+            regression = ratio > 1 + tolerance
+        comparison[name] = {
+            "baseline": previous,
+            "current": current,
+            "ratio": round(ratio, 3),
+            "regression": regression,
+        }
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, help="Subset")
+    parser.add_argument("--entries", type=int, nargs="+", default=[10000])
+    parser.add_argument("--segments", type=int, default=50000)
+    parser.add_argument("--chunk-windows", type=int, default=20)
+    parser.add_argument("--batch-videos", type=int, default=8)
+    parser.add_argument("--startup-runs", type=int, default=3)
+    parser.add_argument("--real-model", action="store_true")
+    parser.add_argument("--output", help="Write the results JSON here")
+    parser.add_argument("--baseline", help="Compare with this results JSON")
+    parser.add_argument("--save-baseline", help="Write the results as a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as root:
+        for name in args.only or BENCHMARKS:
+            print(f"Running {name}...", file=sys.stderr)
+            # Keep stdout for the JSON report
+            with stdout_to_stderr():
+                results.update(BENCHMARKS[name](args, root))
+    results = {name: round(value, 6) for name, value in results.items()}
+
+    report = {
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "numpy": np.__version__,
+        },
+        "results": results,
+    }
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        report["comparison"] = compare(results, baseline, args.tolerance)
+        regressions = [
+            name for name, row in report["comparison"].items() if row["regression"]
+        ]
+        report["regressions"] = regressions
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
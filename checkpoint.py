@@ -0,0 +1,103 @@
+import json
+import logging
+import os
+from json import JSONDecodeError
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptionCheckpoint:
+    """Sidecar files recording how far a windowed transcription has got.
+
+    Live in TEMP_DIR next to the decoded PCM file and are keyed by video ID
+    and model. After every window its kept segments are appended to a JSONL
+    log, one line per window, and a small header (next window offset,
+    prompt carried into it, covered_until and the log's valid length) is
+    rewritten atomically. Saving a window therefore costs the same however
+    long the video is, and a run killed at any point resumes from the last
+    finished window and produces the same transcript as an uninterrupted
+    one.
+    """
+
+    def __init__(self, temp_dir, video_id, model, settings_key=None):
+        self.path = os.path.join(temp_dir, f"{video_id}.{model}.checkpoint.json")
+        self.log_path = os.path.join(
+            temp_dir, f"{video_id}.{model}.checkpoint.segments.jsonl"
+        )
+        # The decoded audio does not depend on the model, so every model's
+        # checkpoint shares it
+        self.pcm_path = os.path.join(temp_dir, f"{video_id}.f32")
+        self.settings_key = settings_key
+        # Bytes of the log covered by the header; anything after them was
+        # appended by a run that died before saving its header
+        self._log_bytes = 0
+
+    def load(self):
+        """Return the saved state, or None if there is nothing to resume.
+
+        The state has the header's fields plus the "segments" and
+        "languages" rebuilt from the log.
+        """
+        self._log_bytes = 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("settings_key") != self.settings_key:
+                logger.info(
+                    "Ignoring checkpoint %s saved with other settings", self.path
+                )
+                return None
+            log_bytes = state.get("log_bytes", 0)
+            log = b""
+            if log_bytes:
+                with open(self.log_path, "rb") as f:
+                    log = f.read(log_bytes)
+            if len(log) < log_bytes:
+                raise OSError(f"{self.log_path} is shorter than its header says")
+            windows = [json.loads(line) for line in log.splitlines()]
+        except FileNotFoundError:
+            return None
+        except (OSError, JSONDecodeError) as e:
+            logger.warning("Ignoring unreadable checkpoint %s: %s", self.path, e)
+            return None
+
+        self._log_bytes = log_bytes
+        state["segments"] = [s for window in windows for s in window["segments"]]
+        state["languages"] = [w["language"] for w in windows if w["language"]]
+        return state
+
+    def save(self, state, window=None):
+        """Append window's record to the log, then atomically replace the header.
+
+        window is {"language", "segments"} for the window just finished.
+        """
+        if window is not None:
+            with open(self.log_path, "ab") as f:
+                f.truncate(self._log_bytes)
+                f.write((json.dumps(window) + "\n").encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+                self._log_bytes = f.tell()
+
+        state = dict(state, settings_key=self.settings_key, log_bytes=self._log_bytes)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+    def remove(self):
+        """Delete the checkpoint and the decoded audio it refers to."""
+        for path in (
+            self.path,
+            self.path + ".tmp",
+            self.log_path,
+            self.pcm_path,
+            self.pcm_path + ".part",
+        ):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._log_bytes = 0
@@ -0,0 +1,197 @@
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+# Per-process model used by pool workers, loaded once by _init_worker
+_worker_model = None
+
+
+def find_split_points(
+    audio, chunk_seconds, search_seconds=30, frame_seconds=0.1, sample_rate=SAMPLE_RATE
+):
+    """Return chunk boundaries (sample indices) placed at the quietest frames.
+
+    Every boundary lies within search_seconds of a multiple of chunk_seconds,
+    at the frame with the lowest RMS energy in that window, so cuts land in
+    pauses rather than mid-word. The list starts at 0 and ends at len(audio).
+    """
+    total = len(audio)
+    chunk = int(chunk_seconds * sample_rate)
+    if chunk <= 0 or total <= chunk:
+        return [0, total]
+
+    frame = max(1, int(frame_seconds * sample_rate))
+    search = int(search_seconds * sample_rate)
+    points = [0]
+    target = chunk
+    while target < total - search:
+        lo = max(points[-1] + frame, target - search)
+        hi = min(total, target + search)
+        window = np.asarray(audio[lo:hi], dtype=np.float32)
+        usable = (len(window) // frame) * frame
+        if usable == 0:
+            points.append(target)
+        else:
+            energy = np.sqrt(np.mean(window[:usable].reshape(-1, frame) ** 2, axis=1))
+            points.append(lo + int(np.argmin(energy)) * frame + frame // 2)
+        target = points[-1] + chunk
+    points.append(total)
+    return points
+
+
+def plan_chunks(audio, chunk_seconds, overlap_seconds=1.0, sample_rate=SAMPLE_RATE):
+    """Split audio into (start, end) sample ranges with a little overlap.
+
+    Each chunk is extended by overlap_seconds past its silence boundary so
+    words cut at the seam are heard in full by one of the two chunks;
+    stitch_segments removes the resulting duplicates.
+    """
+    points = find_split_points(audio, chunk_seconds, sample_rate=sample_rate)
+    overlap = int(overlap_seconds * sample_rate)
+    return [
+        (start, min(len(audio), end + overlap))
+        for start, end in zip(points[:-1], points[1:])
+    ]
+
+
+class SegmentStitcher:
+    """Incrementally merge per-window Whisper results onto one timeline.
+
+    add() shifts a window's segment times to absolute positions and drops
+    segments that start inside the part of the timeline already covered by
+    earlier windows (overlap duplicates). It returns the segments it kept,
+    so callers can emit them as soon as each window is done.
+    """
+
+    def __init__(self):
+        self.segments = []
+        self.languages = []
+        self.covered_until = 0.0
+
+    def add(self, offset, result):
+        """Add one window's result; return the newly kept segments."""
+        if result.get("language"):
+            self.languages.append(result["language"])
+        kept = []
+        for segment in result.get("segments", []):
+            start = segment["start"] + offset
+            end = segment["end"] + offset
+            if self.segments:
+                if (start + end) / 2 < self.covered_until:
+                    continue
+                previous_text = self.segments[-1]["text"].strip()
+                if (
+                    segment["text"].strip() == previous_text
+                    and start < self.covered_until + 1.0
+                ):
+                    continue
+            shifted = dict(segment, start=start, end=end, id=len(self.segments))
+            self.segments.append(shifted)
+            kept.append(shifted)
+            self.covered_until = max(self.covered_until, end)
+        return kept
+
+    def result(self):
+        """Return the merged result in the shape model.transcribe returns."""
+        languages = self.languages
+        return {
+            "text": "".join(segment["text"] for segment in self.segments),
+            "segments": self.segments,
+            "language": max(set(languages), key=languages.count) if languages else None,
+        }
+
+
+def stitch_segments(chunk_results):
+    """Merge per-chunk Whisper results into one result dict.
+
+    chunk_results is a list of (offset_seconds, result) in timeline order;
+    see SegmentStitcher for how overlap duplicates are removed.
+    """
+    stitcher = SegmentStitcher()
+    for offset, result in chunk_results:
+        stitcher.add(offset, result)
+    return stitcher.result()
+
+
+def _init_worker(model_size, threads, backend="whisper"):
+    """Pool initializer: load the Whisper model once for this process."""
+    global _worker_model
+    import torch
+
+    from backends import get_backend
+
+    _worker_model = get_backend(backend).load(model_size, "cpu")
+    # The pool splits the CPUs between workers, overriding TORCH_THREADS
+    torch.set_num_threads(threads)
+
+
+def _transcribe_chunk(samples, options):
+    """Pool task: transcribe one chunk with this process's model."""
+    return _worker_model.transcribe(samples, **options)
+
+
+class ChunkedTranscriber:
+    """Transcribe long audio as silence-aligned chunks in a process pool.
+
+    Each worker process loads the model once and keeps it for the lifetime
+    of the pool, so the pool should be reused across videos and closed with
+    close() when done. CPU only: on GPU a single process is faster.
+    """
+
+    def __init__(
+        self,
+        model_size,
+        workers=None,
+        chunk_minutes=10,
+        overlap_seconds=1.0,
+        backend="whisper",
+    ):
+        self.model_size = model_size
+        self.backend = backend
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_seconds = chunk_minutes * 60
+        self.overlap_seconds = overlap_seconds
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            threads = max(1, (os.cpu_count() or 1) // self.workers)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_size, threads, self.backend),
+            )
+        return self._pool
+
+    def transcribe(self, audio, **options):
+        """Transcribe a 16 kHz float32 array; options go to model.transcribe."""
+        chunks = plan_chunks(audio, self.chunk_seconds, self.overlap_seconds)
+        logger.info("Transcribing %d chunks on %d workers", len(chunks), self.workers)
+
+        pool = self._get_pool()
+        futures = [
+            pool.submit(
+                _transcribe_chunk, np.ascontiguousarray(audio[start:end]), options
+            )
+            for start, end in chunks
+        ]
+        return stitch_segments(
+            [
+                (start / SAMPLE_RATE, future.result())
+                for (start, _), future in zip(chunks, futures)
+            ]
+        )
+
+    def close(self):
+        """Shut down the worker processes."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
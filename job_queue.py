@@ -0,0 +1,201 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+
+class QueueFull(Exception):
+    """Raised by JobQueue.submit when max_pending jobs are already waiting."""
+
+
+class JobQueue:
+    """Durable job queue in an SQLite database.
+
+    Jobs move from queued to running (claimed by one worker under a lease)
+    to done or failed. A worker extends its lease with heartbeat() while it
+    works; a job whose lease expires, because its worker died, is handed to
+    the next claim() again. Every state change is a single transaction, so
+    the queue survives restarts and can be shared by several processes.
+    """
+
+    def __init__(self, db_path, max_pending=100, lease_seconds=300, max_attempts=3):
+        self.db_path = Path(db_path)
+        self.max_pending = max_pending
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    @contextmanager
+    def _transaction(self):
+        """Open a connection, hold the write lock, commit and close."""
+        with self._lock:
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            try:
+                if not self._initialized:
+                    self.db_path.parent.mkdir(parents=True, exist_ok=True)
+                    # WAL keeps its index in shared memory, which hosts
+                    # sharing the file over NFS cannot see; the rollback
+                    # journal only needs POSIX locks. Setting it also turns
+                    # a database left in WAL mode back
+                    connection.execute("PRAGMA journal_mode=DELETE")
+                    connection.execute(
+                        "CREATE TABLE IF NOT EXISTS jobs ("
+                        "id TEXT PRIMARY KEY, url TEXT NOT NULL, "
+                        "refresh INTEGER NOT NULL DEFAULT 0, "
+                        "status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+                        "worker TEXT, lease_expires REAL, "
+                        "created_at REAL NOT NULL, updated_at REAL NOT NULL, "
+                        "result TEXT, error TEXT, timings TEXT)"
+                    )
+                    connection.execute(
+                        "CREATE INDEX IF NOT EXISTS jobs_status "
+                        "ON jobs (status, created_at)"
+                    )
+                    self._initialized = True
+                # BEGIN IMMEDIATE takes the database write lock up front, so
+                # two processes can never claim the same job
+                connection.execute("BEGIN IMMEDIATE")
+                try:
+                    yield connection
+                except BaseException:
+                    connection.execute("ROLLBACK")
+                    raise
+                connection.execute("COMMIT")
+            finally:
+                connection.close()
+
+    @staticmethod
+    def _job(row):
+        """Convert a row to a plain dict with decoded JSON columns."""
+        if row is None:
+            return None
+        job = dict(row)
+        job["refresh"] = bool(job["refresh"])
+        for column in ("result", "timings"):
+            job[column] = json.loads(job[column]) if job[column] else None
+        return job
+
+    def submit(self, url, refresh=False):
+        """Queue a URL and return the new job; raise QueueFull when full."""
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self._transaction() as connection:
+            (pending,) = connection.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')"
+            ).fetchone()
+            if self.max_pending and pending >= self.max_pending:
+                raise QueueFull(f"{pending} jobs are already pending")
+            connection.execute(
+                "INSERT INTO jobs (id, url, refresh, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'queued', ?, ?)",
+                (job_id, url, int(refresh), now, now),
+            )
+            row = connection.execute(
+                "SELECT * FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._job(row)
+
+    def get(self, job_id):
+        """Return a job dict, or None for an unknown ID."""
+        with self._transaction() as connection:
+            row = connection.execute(
+                "SELECT * FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._job(row)
+
+    def claim(self, worker):
+        """Lease the oldest runnable job to worker; return it or None.
+
+        Runnable means queued, or running under an expired lease. A job that
+        has already been claimed max_attempts times is failed instead.
+        """
+        now = time.time()
+        with self._transaction() as connection:
+            while True:
+                row = connection.execute(
+                    "SELECT * FROM jobs WHERE status = 'queued' "
+                    "OR (status = 'running' AND lease_expires < ?) "
+                    "ORDER BY created_at LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is None:
+                    return None
+                if row["attempts"] >= self.max_attempts:
+                    connection.execute(
+                        "UPDATE jobs SET status = 'failed', worker = NULL, "
+                        "error = ?, updated_at = ? WHERE id = ?",
+                        (
+                            f"Abandoned after {row['attempts']} attempts",
+                            now,
+                            row["id"],
+                        ),
+                    )
+                    continue
+                connection.execute(
+                    "UPDATE jobs SET status = 'running', worker = ?, "
+                    "lease_expires = ?, attempts = attempts + 1, updated_at = ? "
+                    "WHERE id = ?",
+                    (worker, now + self.lease_seconds, now, row["id"]),
+                )
+                row = connection.execute(
+                    "SELECT * FROM jobs WHERE id = ?", (row["id"],)
+                ).fetchone()
+                return self._job(row)
+
+    def heartbeat(self, job_id, worker):
+        """Extend worker's lease on a job; False if the lease was lost."""
+        now = time.time()
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (now + self.lease_seconds, now, job_id, worker),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id, worker, result, timings=None):
+        """Mark a job done; False if worker no longer holds its lease."""
+        return self._finish(job_id, worker, "done", result=result, timings=timings)
+
+    def fail(self, job_id, worker, error, timings=None):
+        """Mark a job failed; False if worker no longer holds its lease."""
+        return self._finish(job_id, worker, "failed", error=error, timings=timings)
+
+    def _finish(self, job_id, worker, status, result=None, error=None, timings=None):
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, timings = ?, "
+                "lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (
+                    status,
+                    json.dumps(result) if result is not None else None,
+                    error,
+                    json.dumps(timings) if timings is not None else None,
+                    time.time(),
+                    job_id,
+                    worker,
+                ),
+            )
+        return cursor.rowcount == 1
+
+    def counts(self):
+        """Return the number of jobs per status."""
+        with self._transaction() as connection:
+            rows = connection.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        counts.update({status: count for status, count in rows})
+        return counts
+
+
+def default_queue_path(transcripts_dir):
+    """Queue database used by 'serve' unless JOB_QUEUE_DB is set."""
+    return os.getenv("JOB_QUEUE_DB") or os.path.join(transcripts_dir, "jobs.db")
@@ -0,0 +1,91 @@
+import numpy as np
+
+from chunking import SAMPLE_RATE
+from lazy_imports import lazy_import
+from streaming import PcmFileReader
+
+torch = lazy_import("torch")
+whisper = lazy_import("whisper")
+
+# Whisper detects the language from one 30-second window of audio
+WINDOW_SECONDS = 30
+
+# Windows quieter than this RMS level tell nothing about the language
+MIN_RMS = 1e-3
+
+
+def sample_windows(audio, count=3, window_seconds=WINDOW_SECONDS):
+    """Return [(start_seconds, samples)] for up to count windows of audio.
+
+    The first window is always taken; the others are spread evenly up to
+    the end, so a language switch after the intro still shows. audio is a
+    16 kHz PCM array or a PcmFileReader, of which only the windows are read.
+    """
+    size = int(window_seconds * SAMPLE_RATE)
+    total = len(audio)
+    last = max(0, total - size)
+    count = max(1, count) if last else 1
+    starts = sorted({round(last * i / max(1, count - 1)) for i in range(count)})
+
+    windows = []
+    for start in starts:
+        if isinstance(audio, PcmFileReader):
+            samples, _ = PcmFileReader(audio.path, start).peek(size)
+        else:
+            samples = np.asarray(audio[start : start + size], dtype=np.float32)
+        windows.append((start / SAMPLE_RATE, samples))
+    return windows
+
+
+def detect_language(model, windows, min_confidence=0.6):
+    """Detect the spoken language of windows with one batched encoder pass.
+
+    model is an openai-whisper model (the tiny one is plenty). Returns
+    {"language", "confidence", "low_confidence", "mixed", "windows"}: the
+    language with the highest probability averaged over the windows that
+    are not silent, its averaged probability, whether that is below
+    min_confidence, and whether confident windows disagree.
+    """
+    windows = [(start, w) for start, w in windows if len(w) and _rms(w) >= MIN_RMS]
+    if not windows:
+        return None
+
+    n_mels = model.dims.n_mels
+    mel = torch.stack(
+        [
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(samples), n_mels)
+            for _, samples in windows
+        ]
+    ).to(model.device)
+    with torch.no_grad():
+        _, probs = model.detect_language(mel)
+
+    average = {}
+    for window_probs in probs:
+        for language, p in window_probs.items():
+            average[language] = average.get(language, 0.0) + p / len(probs)
+    language = max(average, key=average.get)
+    confidence = average[language]
+
+    per_window = []
+    for (start, _), window_probs in zip(windows, probs):
+        top = max(window_probs, key=window_probs.get)
+        per_window.append(
+            {
+                "start": round(start, 3),
+                "language": top,
+                "confidence": round(window_probs[top], 4),
+            }
+        )
+    confident = {w["language"] for w in per_window if w["confidence"] >= min_confidence}
+    return {
+        "language": language,
+        "confidence": round(confidence, 4),
+        "low_confidence": confidence < min_confidence,
+        "mixed": len(confident) > 1,
+        "windows": per_window,
+    }
+
+
+def _rms(samples):
+    return float(np.sqrt(np.mean(np.square(samples, dtype=np.float64))))
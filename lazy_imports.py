@@ -0,0 +1,24 @@
+import importlib.util
+import sys
+
+
+def lazy_import(name):
+    """Return a module that is only executed on first attribute access.
+
+    Heavy dependencies (torch, whisper, yt_dlp) are bound at module level
+    this way so that starting the app, or running 'list' and 'help', does
+    not pay for importing them.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named '{name}'", name=name)
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
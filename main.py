@@ -1,14 +1,29 @@
 #!/usr/bin/env python3
 
+import argparse
+from importlib.machinery import PathFinder
+import multiprocessing
 import os
 import sys
 import tempfile
+import threading
+import time
 import re
 from dotenv import load_dotenv
 
-from youtube_downloader import YouTubeDownloader
-from transcriber import WhisperTranscriber
-from transcript_manager import TranscriptManager
+from youtube_downloader import YouTubeDownloader, extract_video_id
+from transcriber import WhisperTranscriber, get_default_language
+from segments import Segment, format_timestamp
+from sync_state import SyncState
+from transcript_manager import TranscriptManager, make_cache_key
+from pipeline import BatchPipeline
+from streaming import PcmFileReader, decode_to_pcm_file, transcribe_stream
+from checkpoint import TranscriptionCheckpoint
+from model_policy import ModelPolicy, ThroughputStats, models_up_to
+from metrics import MetricsLog, MetricsRegistry, peak_rss_bytes, stage_timer
+from job_queue import JobQueue, QueueFull, default_queue_path
+from server import make_server
+from worker import Worker
 from ui import TerminalUI
 
 # Load environment variables
@@ -32,21 +47,64 @@ class YouTubeTranscriptExtractor:
             os.getenv("INCLUDE_TIMESTAMPS", "true").lower() == "true"
         )
         self.debug_mode = os.getenv("DEBUG_MODE", "false").lower() == "true"
+        self.keep_audio = os.getenv("KEEP_AUDIO", "false").lower() == "true"
+        self.download_workers = int(os.getenv("DOWNLOAD_WORKERS", "2"))
+        self.transcribe_workers = int(os.getenv("TRANSCRIBE_WORKERS", "1"))
+        if self.transcribe_workers > 1:
+            # Workers would share one model and only wait for its lock
+            self.ui.print_warning(
+                "TRANSCRIBE_WORKERS is capped at 1 as workers share one model; "
+                "use TRANSCRIBE_PROCESSES or serve --workers for parallel "
+                "inference."
+            )
+            self.transcribe_workers = 1
+        self.max_pending_audio = int(os.getenv("MAX_PENDING_AUDIO", "2"))
+        # sync stops reading a listing after this many already-done videos
+        self.sync_stop_after = int(os.getenv("SYNC_STOP_AFTER_SEEN", "5"))
+        self.preload_model = os.getenv("PRELOAD_MODEL", "false").lower() == "true"
+        self.captions_first = os.getenv("CAPTIONS_FIRST", "false").lower() == "true"
+        self.streaming = os.getenv("STREAMING", "false").lower() == "true"
+        self.stream_window_seconds = float(os.getenv("STREAM_WINDOW_SECONDS", "30"))
+        self.stream_overlap_seconds = float(os.getenv("STREAM_OVERLAP_SECONDS", "5"))
+        self.checkpointing = (
+            os.getenv("CHECKPOINT_TRANSCRIPTION", "false").lower() == "true"
+        )
+        self.metrics_log = open_metrics_log(transcripts_dir)
+        # Automatic model selection (see model_policy.py): each video gets
+        # the largest of AUTO_MODELS expected to stay under MODEL_MAX_RTF
+        # times its duration on this host (0 = always WHISPER_MODEL)
+        self.max_rtf = float(os.getenv("MODEL_MAX_RTF", "0"))
+        self.auto_models = [
+            model.strip()
+            for model in os.getenv("AUTO_MODELS", "tiny,base,small,medium").split(",")
+            if model.strip()
+        ]
 
         self.transcriber = None
+        self._transcribers = {}
+        self._transcribers_lock = threading.Lock()
         self._init_transcriber()
 
     def _init_transcriber(self):
-        """Initialize Whisper transcriber."""
-        try:
-            self.ui.print_info(f"Initializing Whisper {self.whisper_model} model...")
-            self.transcriber = WhisperTranscriber(self.whisper_model)
-            self.ui.print_success("Model loaded successfully!")
-        except Exception as e:
-            self.ui.print_error(f"Failed to load Whisper model: {e}")
-            sys.exit(1)
+        """Initialize Whisper transcriber; the model loads on first use.
 
-    def is_youtube_url(self, url):
+        Set PRELOAD_MODEL=true to load it in a background thread right away.
+        """
+        self.transcriber = WhisperTranscriber(self.whisper_model)
+        with self._transcribers_lock:
+            self._transcribers = {self.whisper_model: self.transcriber}
+        if self.preload_model:
+            self.transcriber.warm_up()
+            self.ui.print_info(
+                f"Loading Whisper {self.whisper_model} model in the background..."
+            )
+        else:
+            self.ui.print_info(
+                f"Whisper {self.whisper_model} model will load on first use."
+            )
+
+    @staticmethod
+    def is_youtube_url(url):
         """Check if the provided string is a valid YouTube URL."""
         youtube_patterns = [
             r"(https?://)?(www\.)?(youtube\.com|youtu\.be)/",
@@ -54,24 +112,197 @@ class YouTubeTranscriptExtractor:
         ]
         return any(re.match(pattern, url) for pattern in youtube_patterns)
 
-    def process_url(self, url):
-        """Process a YouTube URL: download, transcribe, and save."""
+    def _transcriber_for(self, model_size):
+        """Transcriber for model_size; all of them share the model registry."""
+        with self._transcribers_lock:
+            transcriber = self._transcribers.get(model_size)
+            if transcriber is None:
+                transcriber = WhisperTranscriber(model_size)
+                self._transcribers[model_size] = transcriber
+            return transcriber
+
+    def _close_transcribers(self):
+        with self._transcribers_lock:
+            transcribers, self._transcribers = list(self._transcribers.values()), {}
+        for transcriber in transcribers:
+            transcriber.close()
+
+    def model_policy(self, max_rtf=None, sizes=None):
+        """ModelPolicy over AUTO_MODELS, calibrated by the saved job metrics.
+
+        Every transcript's metadata entry carries the metrics of the run
+        that produced it, so the policy learns this host's speed per model
+        as videos are transcribed. sizes replaces AUTO_MODELS as the
+        candidates, smallest first.
+        """
+        self.transcript_manager.refresh()
+        stats = ThroughputStats.from_metrics(
+            entry.get("metrics")
+            for entry in list(self.transcript_manager.metadata.values())
+        )
+        sizes = sizes or self.auto_models
+        labels = [self._transcriber_for(size).model_label for size in sizes]
+        return ModelPolicy(stats, labels, self.max_rtf if max_rtf is None else max_rtf)
+
+    def _choose_transcriber(self, video_info, model=None):
+        """Transcriber for one video.
+
+        model (a size, e.g. from a batch plan) wins; otherwise MODEL_MAX_RTF
+        picks one by duration, or WHISPER_MODEL is used.
+        """
+        if model is None and self.max_rtf:
+            policy = self.model_policy()
+            label = policy.choose(video_info.get("duration"))
+            model = self.auto_models[policy.models.index(label)]
+            self.ui.print_info(
+                f"Using the {model} model (expected "
+                f"{policy.stats.realtime_factor(label):.2f}x real time)."
+            )
+        return self._transcriber_for(model) if model else self.transcriber
+
+    def _cache_key(self, video_id, transcriber=None, source="whisper"):
+        """Transcript cache key for a video under the current settings.
+
+        YouTube captions get a "captions" model of their own, so they never
+        stand in for a Whisper transcript once CAPTIONS_FIRST is turned off.
+        """
+        if not video_id:
+            return None
+        if source == "captions":
+            return make_cache_key(
+                video_id, "captions", get_default_language(), self.include_timestamps
+            )
+        transcriber = transcriber or self.transcriber
+        # Detected languages vary per video; the setting is what the key needs
+        language = "detect" if transcriber.detect_language else get_default_language()
+        return make_cache_key(
+            video_id, transcriber.model_label, language, self.include_timestamps
+        )
+
+    def _load_cached(self, video_id, any_model=False):
+        """Return a cached (transcript, video_info, folder) tuple or None.
+
+        With any_model, a transcript made by any of AUTO_MODELS (largest
+        first) counts, as automatic selection may have picked any of them.
+        Saved captions only count in captions-first mode.
+        """
+        if not video_id:
+            return None
+        cache_keys = []
+        if self.captions_first:
+            cache_keys.append(self._cache_key(video_id, source="captions"))
+        transcribers = [self.transcriber]
+        if any_model:
+            transcribers += [
+                self._transcriber_for(size) for size in reversed(self.auto_models)
+            ]
+        cache_keys += [self._cache_key(video_id, t) for t in transcribers]
+        for cache_key in cache_keys:
+            cached = self.transcript_manager.get_cached_transcript(cache_key)
+            if cached is not None:
+                return cached
+        return None
+
+    def process_url(self, url, refresh=False):
+        """Process a YouTube URL: download, transcribe, and save.
+
+        A transcript saved earlier with the same model, language and
+        timestamp settings is reused unless refresh is True.
+        """
         try:
+            job = self.transcribe_url(url, refresh=refresh)
+            self._print_preview(job["transcript"])
+        except Exception as e:
+            self.ui.print_error(f"Error processing URL: {e}")
+
+    def transcribe_url(self, url, refresh=False):
+        """Resolve, transcribe and save one URL; raise on failure.
+
+        Returns a dict with the formatted transcript, video_info, folder,
+        source ("cache", "captions" or "whisper"), timings (the wall time in
+        seconds of each stage that ran) and metrics (see _job_metrics). Used
+        by process_url and by the job server's workers. Every job, failed
+        ones included, is appended to METRICS_LOG.
+        """
+        timings = {}
+        try:
+            job = self._transcribe_url(url, refresh, timings)
+        except Exception as e:
+            metrics = self._job_metrics(timings, {}, None, status="failed")
+            self._log_metrics(dict(metrics, url=url, error=str(e)))
+            raise
+        self._log_metrics(dict(job["metrics"], url=url))
+        return job
+
+    def _transcribe_url(self, url, refresh, timings):
+        video_id = extract_video_id(url)
+        any_model = self.max_rtf > 0
+        with stage_timer(timings, "cache"):
+            cached = None if refresh else self._load_cached(video_id, any_model)
+        if cached is None:
             # Get video info
             self.ui.print_progress("Fetching video information...")
-            video_info = self.downloader.get_video_info(url)
+            with stage_timer(timings, "resolve"):
+                info = self.downloader.resolve(url)
+            video_id = info.get("id") or video_id
+            cached = None if refresh else self._load_cached(video_id, any_model)
+
+        if cached is not None:
+            formatted_transcript, video_info, video_folder = cached
             self.ui.print_video_info(video_info)
+            self.ui.print_success(
+                f"Using cached transcript from folder: {video_folder}"
+            )
+            return {
+                "transcript": formatted_transcript,
+                "video_info": video_info,
+                "folder": str(video_folder),
+                "source": "cache",
+                "timings": timings,
+                "metrics": self._job_metrics(timings, video_info, "cache"),
+            }
 
-            # Check duration
-            if video_info["duration"] > self.max_duration:
-                hours = self.max_duration // 3600
-                self.ui.print_warning(
-                    f"Video is longer than {hours} hours. This may take a while..."
+        video_info = self.downloader.get_video_info(info)
+        self.ui.print_video_info(video_info)
+        transcriber = self._choose_transcriber(video_info)
+
+        # Check duration
+        if video_info["duration"] > self.max_duration:
+            hours = self.max_duration // 3600
+            self.ui.print_warning(
+                f"Video is longer than {hours} hours. This may take a while..."
+            )
+
+        # Use existing YouTube captions when allowed and available
+        with stage_timer(timings, "captions"):
+            formatted_transcript = self._caption_transcript(info)
+        audio_file = None
+        checkpoint = None
+        downloaded_bytes = None
+        if formatted_transcript is not None:
+            source = "captions"
+            self.ui.print_success("Using existing YouTube captions.")
+        elif self.streaming and not self.keep_audio:
+            source = "whisper"
+            with stage_timer(timings, "transcribe"):
+                formatted_transcript = self._transcribe_streaming(
+                    info, video_id, transcriber
                 )
+            self.ui.print_success("Transcription completed!")
+        elif self.checkpointing and video_id:
+            source = "whisper"
+            checkpoint = self._checkpoint(video_id, transcriber)
+            formatted_transcript, downloaded_bytes = self._transcribe_resumable(
+                url, info, checkpoint, timings, transcriber
+            )
+            self.ui.print_success("Transcription completed!")
+        else:
+            source = "whisper"
 
             # Download audio
             self.ui.print_progress("Downloading audio from YouTube...")
-            audio_file, safe_title, full_info = self.downloader.download_audio(url)
+            with stage_timer(timings, "download"):
+                audio_file, downloaded_bytes = self._download_audio(url, info)
             self.ui.print_success("Audio downloaded successfully!")
 
             # Transcribe
@@ -80,44 +311,696 @@ class YouTubeTranscriptExtractor:
                 "This may take several minutes depending on video length..."
             )
 
-            result = self.transcriber.transcribe(audio_file)
-            formatted_transcript = self.transcriber.format_transcript(
-                result,
-                include_timestamps=self.include_timestamps,
-            )
+            with stage_timer(timings, "transcribe"):
+                formatted_transcript = self._transcribe(
+                    transcriber, audio_file, timings
+                )
             self.ui.print_success("Transcription completed!")
 
-            # Save transcript
-            self.ui.print_progress("Saving transcript...")
+        # Save transcript
+        self.ui.print_progress("Saving transcript...")
+        with stage_timer(timings, "save"):
             txt_path, json_path, video_folder = self.transcript_manager.save_transcript(
-                video_info, formatted_transcript, url
+                video_info,
+                formatted_transcript,
+                url,
+                cache_key=self._cache_key(video_id, transcriber, source),
+                source=source,
+                metrics=self._job_metrics(
+                    timings,
+                    video_info,
+                    source,
+                    downloaded_bytes,
+                    transcriber=transcriber,
+                ),
             )
 
-            self.ui.print_success(f"Transcript saved to folder: {video_folder}")
+        self.ui.print_success(f"Transcript saved to folder: {video_folder}")
+        if audio_file:
+            self._cleanup_audio(audio_file)
+        if checkpoint is not None:
+            checkpoint.remove()
 
-            # Clean up temp audio file
-            try:
-                os.remove(audio_file)
-            except OSError:
-                if self.debug_mode:
-                    self.ui.print_warning(
-                        "Temporary audio file could not be removed; continuing."
-                    )
+        return {
+            "transcript": formatted_transcript,
+            "video_info": video_info,
+            "folder": str(video_folder),
+            "source": source,
+            "timings": timings,
+            "metrics": self._job_metrics(
+                timings, video_info, source, downloaded_bytes, transcriber=transcriber
+            ),
+        }
+
+    def _job_metrics(
+        self,
+        timings,
+        video_info,
+        source,
+        downloaded_bytes=None,
+        status="done",
+        transcriber=None,
+    ):
+        """Per-video metrics saved in metadata.json and METRICS_LOG.
+
+        The transcribe stage includes its model_load, decode, lock_wait and
+        inference parts; realtime_factor is transcribe time less lock_wait
+        (waiting for a shared model) / audio duration and peak_rss_bytes is
+        the process's peak so far.
+        """
+        whisper = source == "whisper"
+        audio_seconds = video_info.get("duration") or None
+        transcribe_seconds = timings.get("transcribe")
+        if transcribe_seconds:
+            transcribe_seconds -= timings.get("lock_wait", 0.0)
+        return {
+            "video_id": video_info.get("id"),
+            "status": status,
+            "source": source,
+            "model": (transcriber or self.transcriber).model_label if whisper else None,
+            "timings": {stage: round(seconds, 3) for stage, seconds in timings.items()},
+            "audio_seconds": audio_seconds,
+            "downloaded_bytes": downloaded_bytes,
+            "realtime_factor": (
+                round(transcribe_seconds / audio_seconds, 6)
+                if whisper and transcribe_seconds and audio_seconds
+                else None
+            ),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "recorded_at": round(time.time(), 3),
+        }
+
+    def _log_metrics(self, record):
+        """Append a job record to METRICS_LOG unless it is disabled."""
+        if self.metrics_log is None:
+            return
+        try:
+            self.metrics_log.append(record)
+        except OSError as e:
+            if self.debug_mode:
+                self.ui.print_warning(f"Could not write metrics log: {e}")
+
+    @staticmethod
+    def _file_size(path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return None
+
+    def run_job(self, url, refresh=False):
+        """Job queue entry point: transcribe_url with a JSON-friendly result."""
+        job = self.transcribe_url(url, refresh=refresh)
+        return {
+            "result": {
+                "folder": job["folder"],
+                "video_id": job["video_info"].get("id"),
+                "title": job["video_info"].get("title"),
+                "source": job["source"],
+            },
+            "timings": job["timings"],
+        }
+
+    def _print_preview(self, formatted_transcript):
+        """Print the first 500 characters of a transcript."""
+        print("\n" + "=" * 60)
+        print("TRANSCRIPT PREVIEW (first 500 characters):")
+        print("=" * 60)
+        preview = formatted_transcript["full_text"][:500]
+        print(
+            preview + "..." if len(formatted_transcript["full_text"]) > 500 else preview
+        )
+        print("=" * 60 + "\n")
 
-            # Show preview
-            print("\n" + "=" * 60)
-            print("TRANSCRIPT PREVIEW (first 500 characters):")
-            print("=" * 60)
-            preview = formatted_transcript["full_text"][:500]
-            print(
-                preview + "..."
-                if len(formatted_transcript["full_text"]) > 500
-                else preview
+    def _caption_transcript(self, info):
+        """Return formatted YouTube captions in captions-first mode, or None."""
+        if not self.captions_first:
+            return None
+        try:
+            result = self.downloader.fetch_captions(
+                info, language=get_default_language()
+            )
+        except Exception as e:
+            self.ui.print_warning(f"Could not fetch captions: {e}")
+            return None
+        if result is None:
+            return None
+        return self.transcriber.format_transcript(
+            result, include_timestamps=self.include_timestamps
+        )
+
+    def _transcribe_streaming(self, info, video_id, transcriber):
+        """Decode the audio stream while it downloads and print segments live.
+
+        Segments are also appended to a partial transcript in TEMP_DIR as they
+        arrive; it is removed once the full transcript is saved.
+        """
+        self.ui.print_progress("Streaming audio from YouTube into Whisper...")
+        stream_url, headers = self.downloader.stream_source(info)
+        partial_path = os.path.join(
+            self.downloader.temp_dir, f"{video_id or 'stream'}.partial.txt"
+        )
+
+        with open(partial_path, "w", encoding="utf-8") as partial:
+
+            def on_segment(segment):
+                line = Segment.from_result(segment).timestamped()
+                print(line)
+                partial.write(line + "\n")
+                partial.flush()
+
+            result = transcribe_stream(
+                stream_url,
+                transcriber.transcribe_window,
+                headers=headers,
+                on_segment=on_segment,
+                window_seconds=self.stream_window_seconds,
+                overlap_seconds=self.stream_overlap_seconds,
+            )
+
+        formatted_transcript = transcriber.format_transcript(
+            result, include_timestamps=self.include_timestamps
+        )
+        try:
+            os.remove(partial_path)
+        except OSError:
+            pass
+        return formatted_transcript
+
+    def _checkpoint(self, video_id, transcriber):
+        """Checkpoint for a video under transcriber's model and settings.
+
+        A checkpoint saved under any other setting that changes the output
+        is not resumed, so a transcript is never stitched from two.
+        """
+        settings_key = ":".join(
+            str(setting)
+            for setting in (
+                self._cache_key(video_id, transcriber),
+                *transcriber.output_settings,
+            )
+        )
+        return TranscriptionCheckpoint(
+            self.downloader.temp_dir,
+            video_id,
+            transcriber.model_label,
+            settings_key,
+        )
+
+    def _transcribe_resumable(self, url, info, checkpoint, timings, transcriber):
+        """Transcribe window by window, checkpointing progress in TEMP_DIR.
+
+        The audio is decoded once to a raw PCM file next to the checkpoint.
+        If an earlier run was interrupted, that file is reused instead of
+        downloading again and transcription resumes after the last finished
+        window. Both files are removed once the transcript is saved.
+        Returns (formatted transcript, bytes downloaded or None).
+        """
+        downloaded_bytes = None
+        if os.path.exists(checkpoint.pcm_path):
+            self.ui.print_info("Reusing audio decoded by an earlier run.")
+        else:
+            self.ui.print_progress("Downloading audio from YouTube...")
+            with stage_timer(timings, "download"):
+                audio_file, downloaded_bytes = self._download_audio(url, info)
+            self.ui.print_success("Audio downloaded successfully!")
+            # Decode under a temporary name so a crash never leaves a
+            # truncated file that looks complete
+            with stage_timer(timings, "decode"):
+                decode_to_pcm_file(audio_file, checkpoint.pcm_path + ".part")
+            os.replace(checkpoint.pcm_path + ".part", checkpoint.pcm_path)
+            self._cleanup_audio(audio_file)
+
+        reader = PcmFileReader(checkpoint.pcm_path)
+        state = checkpoint.load()
+        if state is not None:
+            done = state["position"] / max(len(reader), 1)
+            self.ui.print_info(f"Resuming transcription at {done:.0%}.")
+
+        self.ui.print_progress("Transcribing audio with Whisper...")
+        with stage_timer(timings, "transcribe"):
+            result = transcriber.transcribe_pcm_file(
+                reader, checkpoint=checkpoint, timings=timings
+            )
+        formatted_transcript = transcriber.format_transcript(
+            result, include_timestamps=self.include_timestamps
+        )
+        return formatted_transcript, downloaded_bytes
+
+    def _transcribe(self, transcriber, audio_file, timings=None):
+        """Run Whisper on a downloaded file and format the result."""
+        result = transcriber.transcribe(audio_file, timings=timings)
+        return transcriber.format_transcript(
+            result,
+            include_timestamps=self.include_timestamps,
+        )
+
+    def _download_audio(self, url, info):
+        """Fetch a video's audio; return (path, bytes downloaded).
+
+        Audio served by the audio cache counts as 0 bytes downloaded.
+        """
+        audio_file, _, full_info = self.downloader.download_audio(
+            url, info=info, keep_audio=self.keep_audio
+        )
+        if full_info.get("audio_cache_hit"):
+            self.ui.print_info("Using cached audio.")
+            return audio_file, 0
+        return audio_file, self._file_size(audio_file)
+
+    def _cleanup_audio(self, audio_file):
+        """Remove a temp audio file unless it is cached or to be kept."""
+        if self.downloader.release_audio(audio_file):
+            return
+        if self.keep_audio:
+            self.ui.print_info(f"Audio kept at: {audio_file}")
+            return
+        try:
+            os.remove(audio_file)
+        except OSError:
+            if self.debug_mode:
+                self.ui.print_warning(
+                    "Temporary audio file could not be removed; continuing."
+                )
+
+    def _download_job(self, url, refresh=False, model=None):
+        """Batch download stage: resolve the video and fetch its audio.
+
+        Videos with a cached transcript are passed through without a download.
+        model is the size planned for the video, if any.
+        """
+        timings = {}
+        any_model = bool(model or self.max_rtf)
+        cached = (
+            None if refresh else self._load_cached(extract_video_id(url), any_model)
+        )
+        if cached is not None:
+            return {"url": url, "video_info": cached[1], "cached_folder": cached[2]}
+
+        with stage_timer(timings, "resolve"):
+            info = self.downloader.resolve(url)
+        cached = None if refresh else self._load_cached(info.get("id"), any_model)
+        if cached is not None:
+            return {"url": url, "video_info": cached[1], "cached_folder": cached[2]}
+
+        video_info = self.downloader.get_video_info(info)
+        with stage_timer(timings, "captions"):
+            captions = self._caption_transcript(info)
+        if captions is not None:
+            return {
+                "url": url,
+                "video_info": video_info,
+                "captions": captions,
+                "timings": timings,
+            }
+
+        with stage_timer(timings, "download"):
+            audio_file, downloaded_bytes = self._download_audio(url, info)
+        return {
+            "url": url,
+            "video_info": video_info,
+            "audio_file": audio_file,
+            "downloaded_bytes": downloaded_bytes,
+            "timings": timings,
+            "transcriber": self._choose_transcriber(video_info, model),
+        }
+
+    def _transcribe_job(self, job):
+        """Batch transcription stage: transcribe, save and clean up one job."""
+        if job.get("cached_folder"):
+            return job["cached_folder"]
+        if job.get("captions"):
+            return self._save_job(job, job["captions"], "captions")
+
+        timings = job["timings"]
+        transcriber = job.get("transcriber") or self.transcriber
+        try:
+            with stage_timer(timings, "transcribe"):
+                formatted_transcript = self._transcribe(
+                    transcriber, job["audio_file"], timings
+                )
+        finally:
+            self._cleanup_audio(job["audio_file"])
+        return self._save_job(job, formatted_transcript, "whisper", transcriber)
+
+    def _transcribe_jobs(self, jobs):
+        """Batch transcription stage for several ready jobs at once.
+
+        Short Whisper jobs sharing a transcriber with batched decoding go
+        through one transcribe_many call, so their windows share model
+        passes; the others are handled one by one by _transcribe_job.
+        Returns one video folder, or the exception raised, per job.
+        """
+        outcomes = [None] * len(jobs)
+        groups = {}
+        for index, job in enumerate(jobs):
+            transcriber = job.get("transcriber") or self.transcriber
+            if self._batchable(job, transcriber):
+                groups.setdefault(transcriber, []).append(index)
+
+        for transcriber, indexes in groups.items():
+            if len(indexes) > 1:
+                self._transcribe_together(jobs, indexes, transcriber, outcomes)
+
+        for index, job in enumerate(jobs):
+            if outcomes[index] is None:
+                try:
+                    outcomes[index] = self._transcribe_job(job)
+                except Exception as error:
+                    outcomes[index] = error
+        return outcomes
+
+    @staticmethod
+    def _batchable(job, transcriber):
+        """Whether a job's audio can be decoded in a batch with others.
+
+        Captioned, cached and long videos (over CHUNK_MINUTES) are not, nor
+        is anything in LOW_MEMORY_AUDIO mode.
+        """
+        duration = job["video_info"].get("duration") or 0
+        return bool(
+            job.get("audio_file")
+            and transcriber.batched
+            and not transcriber.low_memory
+            and 0 < duration <= transcriber.chunk_minutes * 60
+        )
+
+    def _transcribe_together(self, jobs, indexes, transcriber, outcomes):
+        """Transcribe jobs[indexes] in one transcribe_many call and save each.
+
+        Every job's transcribe stage is the sum of its share of the shared
+        stages (see WhisperTranscriber.transcribe_many).
+        """
+        batch = [jobs[index] for index in indexes]
+        batch_timings = [{} for _ in batch]
+        try:
+            results = transcriber.transcribe_many(
+                [job["audio_file"] for job in batch], batch_timings
             )
-            print("=" * 60 + "\n")
+        except Exception as error:
+            results = [error] * len(batch)
+        finally:
+            for job in batch:
+                self._cleanup_audio(job["audio_file"])
 
+        for index, job, result, timings in zip(indexes, batch, results, batch_timings):
+            if isinstance(result, Exception):
+                outcomes[index] = result
+                continue
+            job["timings"].update(timings)
+            job["timings"]["transcribe"] = sum(timings.values())
+            formatted_transcript = transcriber.format_transcript(
+                result, include_timestamps=self.include_timestamps
+            )
+            try:
+                outcomes[index] = self._save_job(
+                    job, formatted_transcript, "whisper", transcriber
+                )
+            except Exception as error:
+                outcomes[index] = error
+
+    def _save_job(self, job, formatted_transcript, source, transcriber=None):
+        """Save a batch job's transcript and metrics; return its folder."""
+        metrics = self._job_metrics(
+            job["timings"],
+            job["video_info"],
+            source,
+            job.get("downloaded_bytes"),
+            transcriber=transcriber,
+        )
+        _, _, video_folder = self.transcript_manager.save_transcript(
+            job["video_info"],
+            formatted_transcript,
+            job["url"],
+            cache_key=self._cache_key(job["video_info"]["id"], transcriber, source),
+            source=source,
+            metrics=metrics,
+        )
+        self._log_metrics(dict(metrics, url=job["url"]))
+        return video_folder
+
+    def _list_batch(self, source):
+        """URLs of a batch source, or None after printing why there are none."""
+        try:
+            self.ui.print_progress("Listing videos...")
+            urls = self.downloader.expand_source(source)
         except Exception as e:
-            self.ui.print_error(f"Error processing URL: {e}")
+            self.ui.print_error(f"Error reading batch source: {e}")
+            return None
+
+        if not urls:
+            self.ui.print_info("No videos found.")
+            return None
+        self.ui.print_info(f"Found {len(urls)} videos.")
+        return urls
+
+    def process_batch(self, source, refresh=False, deadline_hours=None):
+        """Transcribe every video in a URL file, playlist or channel.
+
+        Downloads run ahead of transcription in a bounded pipeline sized by
+        DOWNLOAD_WORKERS, TRANSCRIBE_WORKERS and MAX_PENDING_AUDIO. With
+        deadline_hours, models are planned up front (see plan_batch) so the
+        batch is expected to finish in time.
+        """
+        urls = self._list_batch(source)
+        if not urls:
+            return []
+        models = None
+        if deadline_hours:
+            plan = self._plan(urls, deadline_hours=deadline_hours, refresh=refresh)
+            self._print_plan_summary(plan)
+            models = {row["url"]: row["model"] for row in plan["videos"]}
+        return self._run_batch(urls, refresh=refresh, models=models)
+
+    def plan_batch(self, source, deadline_hours=None, max_rtf=None, refresh=False):
+        """Print the models and expected processing time for a batch.
+
+        A dry run: videos are resolved for their durations but nothing is
+        downloaded or transcribed. Returns the plan (see _plan).
+        """
+        urls = self._list_batch(source)
+        if not urls:
+            return None
+        plan = self._plan(urls, deadline_hours, max_rtf, refresh)
+
+        print("\n" + "=" * 80)
+        print("BATCH PLAN:")
+        print("=" * 80)
+        for i, row in enumerate(plan["videos"], 1):
+            print(f"\n{i}. {row['title']}")
+            if row["error"]:
+                print(f"   Error: {row['error']}")
+            elif row["cached"]:
+                print("   Cached transcript, nothing to do")
+            else:
+                estimate = "measured" if row["measured"] else "estimated"
+                print(
+                    f"   Duration: {format_timestamp(row['duration'] or 0)}  "
+                    f"Model: {row['model']} ({estimate} speed)  "
+                    f"Expected: {format_timestamp(row['expected'])}"
+                )
+        print("=" * 80)
+        self._print_plan_summary(plan)
+        return plan
+
+    def _plan(self, urls, deadline_hours=None, max_rtf=None, refresh=False):
+        """Assign a model size to every video of a batch.
+
+        Returns {"videos": [{"url", "title", "duration", "model", "label",
+        "expected", "measured", "cached", "error"}], "total_seconds",
+        "deadline_seconds"}. Cached videos cost nothing; the total assumes
+        Whisper runs one video at a time, as the in-process transcribers
+        share each model.
+
+        With a real-time factor budget, models come from all of AUTO_MODELS.
+        A deadline alone only moves videos from WHISPER_MODEL down to the
+        smaller AUTO_MODELS, never up to a bigger model.
+        """
+        max_rtf = self.max_rtf if max_rtf is None else max_rtf
+        if max_rtf:
+            sizes = self.auto_models
+        elif deadline_hours:
+            sizes = models_up_to(self.auto_models, self.whisper_model)
+        else:
+            sizes = [self.whisper_model]
+        policy = self.model_policy(max_rtf, sizes)
+
+        videos = []
+        for url in urls:
+            row = {
+                "url": url,
+                "title": url,
+                "duration": None,
+                "model": None,
+                "label": None,
+                "expected": 0.0,
+                "measured": False,
+                "cached": False,
+                "error": None,
+            }
+            videos.append(row)
+            cached = None
+            if not refresh:
+                cached = self._load_cached(extract_video_id(url), any_model=True)
+            try:
+                if cached is None:
+                    info = self.downloader.resolve(url)
+                    if not refresh:
+                        cached = self._load_cached(info.get("id"), any_model=True)
+            except Exception as e:
+                row["error"] = str(e)
+                continue
+            video_info = cached[1] if cached is not None else info
+            row["title"] = video_info.get("title") or url
+            row["duration"] = video_info.get("duration") or 0
+            row["cached"] = cached is not None
+
+        pending = [row for row in videos if not row["cached"] and not row["error"]]
+        deadline_seconds = deadline_hours * 3600 if deadline_hours else None
+        labels, expected, total = policy.plan(
+            [row["duration"] for row in pending], deadline_seconds
+        )
+        for row, label, seconds in zip(pending, labels, expected):
+            row["model"] = sizes[policy.models.index(label)]
+            row["label"] = label
+            row["expected"] = seconds
+            row["measured"] = policy.stats.measured(label)
+        return {
+            "videos": videos,
+            "total_seconds": total,
+            "deadline_seconds": deadline_seconds,
+        }
+
+    def _print_plan_summary(self, plan):
+        counts = {}
+        for row in plan["videos"]:
+            if row["model"]:
+                counts[row["model"]] = counts.get(row["model"], 0) + 1
+        models = ", ".join(f"{count} x {model}" for model, count in counts.items())
+        self.ui.print_info(
+            f"Expected processing time: {format_timestamp(plan['total_seconds'])}"
+            + (f" ({models})" if models else "")
+        )
+        deadline = plan["deadline_seconds"]
+        if deadline and plan["total_seconds"] > deadline:
+            self.ui.print_warning(
+                f"Even the smallest model is expected to miss the "
+                f"{format_timestamp(deadline)} deadline."
+            )
+
+    def _run_batch(self, urls, refresh=False, models=None):
+        """Download and transcribe urls in the batch pipeline.
+
+        models maps URLs to the model size to use (default: see
+        _choose_transcriber). With batched decoding, up to DECODE_BATCH_SIZE
+        downloaded videos (also bounded by MAX_PENDING_AUDIO) are
+        transcribed together.
+        """
+        models = models or {}
+        total = len(urls)
+
+        def on_event(event, index, url, detail):
+            prefix = f"[{index + 1}/{total}]"
+            if event == "downloaded":
+                self.ui.print_progress(
+                    f"{prefix} Downloaded: {detail['video_info']['title']}"
+                )
+            elif event == "completed":
+                self.ui.print_success(f"{prefix} Saved to folder: {detail}")
+            elif event == "failed":
+                self.ui.print_error(f"{prefix} {url}: {detail}")
+
+        pipeline = BatchPipeline(
+            lambda url: self._download_job(url, refresh=refresh, model=models.get(url)),
+            self._transcribe_job,
+            download_workers=self.download_workers,
+            transcribe_workers=self.transcribe_workers,
+            max_pending=self.max_pending_audio,
+            on_event=on_event,
+            transcribe_batch=self._transcribe_jobs,
+            batch_size=(
+                self.transcriber.decode_batch_size if self.transcriber.batched else 1
+            ),
+        )
+        results = pipeline.run(urls)
+
+        failures = sum(1 for result in results if result["error"] is not None)
+        self.ui.print_info(
+            f"Batch finished: {total - failures} succeeded, {failures} failed."
+        )
+        return results
+
+    def sync(self, sources, mark_seen=False):
+        """Transcribe only the uploads that are new since each source's last sync.
+
+        sources are playlist or channel URLs, or files listing them. Each
+        source's watermark (see SyncState) lists the videos already done, so
+        the listing stops at the first run of known videos. Videos that fail
+        are retried on the next sync. With mark_seen the current uploads are
+        recorded without transcribing them, to start following a channel
+        from now on. Returns the batch results.
+        """
+        state = SyncState(self.transcript_manager.output_dir / "sync_state.json")
+        all_results = []
+        for source in self._sync_sources(sources):
+            watermark = state.get(source) or {}
+            try:
+                self.ui.print_progress(f"Listing new videos: {source}")
+                videos = self.downloader.list_new_videos(
+                    source,
+                    watermark.get("seen_ids", []),
+                    since=watermark.get("last_upload_date"),
+                    stop_after=self.sync_stop_after,
+                )
+            except Exception as e:
+                self.ui.print_error(f"Error listing {source}: {e}")
+                continue
+            listed = {video_id for video_id, _, _ in videos}
+            videos += [
+                (video_id, f"https://www.youtube.com/watch?v={video_id}", None)
+                for video_id in watermark.get("retry_ids", [])
+                if video_id not in listed
+            ]
+
+            if mark_seen:
+                state.advance(source, [(v, date) for v, _, date in videos])
+                self.ui.print_info(f"Marked {len(videos)} videos as seen.")
+                continue
+            if not videos:
+                self.ui.print_info("No new videos.")
+                continue
+            self.ui.print_info(f"Found {len(videos)} new videos.")
+
+            # Oldest first, so an interrupted sync leaves the newest for later
+            videos.reverse()
+            results = self._run_batch([url for _, url, _ in videos])
+            done = [
+                (video_id, upload_date)
+                for (video_id, _, upload_date), result in zip(videos, results)
+                if result["error"] is None
+            ]
+            failed = [
+                video_id
+                for (video_id, _, _), result in zip(videos, results)
+                if result["error"] is not None
+            ]
+            state.advance(source, done[::-1], failed_ids=failed)
+            all_results.extend(results)
+        return all_results
+
+    @staticmethod
+    def _sync_sources(sources):
+        """Expand files of source URLs (one per line, # comments)."""
+        expanded = []
+        for source in sources:
+            if os.path.isfile(source):
+                with open(source, "r", encoding="utf-8") as f:
+                    lines = (line.strip() for line in f)
+                    expanded.extend(
+                        line for line in lines if line and not line.startswith("#")
+                    )
+            else:
+                expanded.append(source)
+        return expanded
 
     def show_settings(self):
         """Show and handle settings menu."""
@@ -137,6 +1020,7 @@ class YouTubeTranscriptExtractor:
             if new_model != self.whisper_model:
                 self.whisper_model = new_model
                 self.ui.print_info(f"Switching to {new_model} model...")
+                self._close_transcribers()
                 self._init_transcriber()
             else:
                 self.ui.print_info("Model unchanged.")
@@ -163,6 +1047,38 @@ class YouTubeTranscriptExtractor:
 
         print("=" * 80 + "\n")
 
+    def search_transcripts(self, query):
+        """Search saved transcripts and print matching segments."""
+        try:
+            hits = self.transcript_manager.search(query)
+        except Exception as e:
+            self.ui.print_error(f"Search failed: {e}")
+            return
+
+        if not hits:
+            self.ui.print_info(f"No transcripts mention '{query}'.")
+            return
+
+        print("\n" + "=" * 80)
+        print(f"SEARCH RESULTS FOR '{query}':")
+        print("=" * 80)
+
+        for i, hit in enumerate(hits, 1):
+            timestamp = f" [{hit['timestamp']}]" if hit["timestamp"] else ""
+            print(f"\n{i}. {hit['title']}{timestamp}")
+            print(f"   {hit['snippet']}")
+            folder = self.transcript_manager.get_video_folder(hit["id"])
+            if folder:
+                print(f"   Folder: {folder}")
+
+        print("=" * 80 + "\n")
+
+    def rebuild_search_index(self):
+        """Re-index every saved transcript."""
+        self.ui.print_progress("Rebuilding search index...")
+        count = self.transcript_manager.rebuild_search_index()
+        self.ui.print_success(f"Indexed {count} transcripts.")
+
     def run(self):
         """Main application loop."""
         self.ui.print_header()
@@ -186,6 +1102,22 @@ class YouTubeTranscriptExtractor:
                 elif user_input.lower() == "list":
                     self.list_transcripts()
 
+                elif user_input.lower().startswith("search "):
+                    self.search_transcripts(user_input[len("search ") :].strip())
+
+                elif user_input.lower() == "reindex":
+                    self.rebuild_search_index()
+
+                elif user_input.lower().startswith("refresh "):
+                    url = user_input[len("refresh ") :].strip()
+                    if self.is_youtube_url(url):
+                        self.process_url(url, refresh=True)
+                    else:
+                        self.ui.print_error("Usage: refresh <YouTube URL>")
+
+                elif user_input.lower().startswith("batch "):
+                    self.process_batch(user_input[len("batch ") :].strip())
+
                 elif user_input.lower() == "clear":
                     self.ui.clear_screen()
                     self.ui.print_header()
@@ -211,16 +1143,244 @@ class YouTubeTranscriptExtractor:
                 self.ui.print_error(f"Unexpected error: {e}")
 
 
+def missing_dependencies():
+    """Return required packages that are not installed, without importing them.
+
+    Importing torch alone takes seconds. PathFinder also skips sys.modules,
+    where touching a lazily imported module would load it.
+    """
+    return [
+        dependency
+        for dependency in ("yt_dlp", "whisper", "torch")
+        if PathFinder.find_spec(dependency) is None
+    ]
+
+
+def open_metrics_log(transcripts_dir):
+    """Job metrics log from METRICS_LOG (default metrics.jsonl; "none" = off)."""
+    path = os.getenv("METRICS_LOG", "")
+    if path.lower() == "none":
+        return None
+    return MetricsLog(path or os.path.join(transcripts_dir, "metrics.jsonl"))
+
+
+def metrics_renderer():
+    """Return a function rendering METRICS_LOG as Prometheus text, or None.
+
+    Each call folds in only the records appended since the previous one.
+    """
+    metrics_log = open_metrics_log(os.getenv("TRANSCRIPTS_DIR", "transcripts"))
+    if metrics_log is None:
+        return None
+    registry = MetricsRegistry()
+
+    def render():
+        metrics_log.update(registry)
+        return registry.render()
+
+    return render
+
+
+def open_job_queue():
+    """Job queue configured by JOB_QUEUE_DB, JOB_QUEUE_MAX and JOB_LEASE_SECONDS."""
+    return JobQueue(
+        default_queue_path(os.getenv("TRANSCRIPTS_DIR", "transcripts")),
+        max_pending=int(os.getenv("JOB_QUEUE_MAX", "100")),
+        lease_seconds=float(os.getenv("JOB_LEASE_SECONDS", "300")),
+    )
+
+
+def worker_main(stop_event):
+    """Worker process for 'serve': keep a model warm and run queued jobs."""
+    os.environ["PRELOAD_MODEL"] = "true"
+    app = YouTubeTranscriptExtractor()
+    Worker(open_job_queue(), app.run_job).run(stop_event)
+
+
+def start_workers(workers):
+    """Start worker processes; return (processes, stop_event)."""
+    context = multiprocessing.get_context("spawn")
+    stop_event = context.Event()
+    processes = [
+        context.Process(target=worker_main, args=(stop_event,), daemon=True)
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    return processes, stop_event
+
+
+def stop_workers(processes, stop_event):
+    """Ask workers to stop after their current job and wait for them."""
+    stop_event.set()
+    for process in processes:
+        process.join()
+
+
+def serve(host, port, workers):
+    """Run the HTTP job API with worker processes until interrupted."""
+    processes, stop_event = start_workers(workers)
+    server = make_server(
+        open_job_queue(),
+        host,
+        port,
+        is_valid_url=YouTubeTranscriptExtractor.is_youtube_url,
+        render_metrics=metrics_renderer(),
+    )
+    print(f"Serving on http://{host}:{port} with {workers} worker(s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        stop_workers(processes, stop_event)
+
+
+def run_workers(workers):
+    """Pull jobs from the (possibly shared) queue until interrupted.
+
+    Run this on every host that should transcribe: all of them point
+    JOB_QUEUE_DB and TRANSCRIPTS_DIR at the same shared storage.
+    """
+    processes, stop_event = start_workers(workers)
+    print(f"{workers} worker(s) pulling jobs from {open_job_queue().db_path}")
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_workers(processes, stop_event)
+
+
+def enqueue(source, refresh=False):
+    """Queue every video of a URL, URL file, playlist or channel.
+
+    Waits and retries while the queue is full instead of dropping videos.
+    """
+    urls = YouTubeDownloader(
+        temp_dir=os.getenv("TEMP_DIR", tempfile.gettempdir())
+    ).expand_source(source)
+    job_queue = open_job_queue()
+    for url in urls:
+        while True:
+            try:
+                job = job_queue.submit(url, refresh=refresh)
+                break
+            except QueueFull:
+                time.sleep(5)
+        print(f"{job['id']}  {url}")
+    return len(urls)
+
+
+def parse_args(argv=None):
+    """Parse command-line arguments; no command starts the interactive app."""
+    parser = argparse.ArgumentParser(description="YouTube Transcript Extractor")
+    subparsers = parser.add_subparsers(dest="command")
+
+    batch = subparsers.add_parser(
+        "batch", help="Transcribe a URL file, playlist or channel"
+    )
+    batch.add_argument("source", help="File of URLs, playlist URL or channel URL")
+    batch.add_argument("--download-workers", type=int, help="Parallel downloads")
+    batch.add_argument(
+        "--transcribe-workers",
+        type=int,
+        help="Transcription workers (capped at 1: they would share one model)",
+    )
+    batch.add_argument(
+        "--max-pending", type=int, help="Maximum downloaded files waiting on disk"
+    )
+    batch.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Re-transcribe videos even if a cached transcript exists",
+    )
+    batch.add_argument(
+        "--deadline",
+        type=float,
+        metavar="HOURS",
+        help="Pick smaller models where needed to finish within HOURS",
+    )
+
+    plan = subparsers.add_parser(
+        "plan", help="Print the models and expected time for a batch (dry run)"
+    )
+    plan.add_argument("source", help="File of URLs, playlist URL or channel URL")
+    plan.add_argument("--deadline", type=float, metavar="HOURS")
+    plan.add_argument(
+        "--max-rtf",
+        type=float,
+        help="Real-time factor budget per video (default: MODEL_MAX_RTF)",
+    )
+
+    search = subparsers.add_parser("search", help="Search saved transcripts")
+    search.add_argument("query", help="Words or phrase to look for")
+
+    subparsers.add_parser("reindex", help="Rebuild the transcript search index")
+
+    sync_parser = subparsers.add_parser(
+        "sync", help="Transcribe new uploads of followed channels and playlists"
+    )
+    sync_parser.add_argument(
+        "sources", nargs="+", help="Channel or playlist URLs, or files listing them"
+    )
+    sync_parser.add_argument(
+        "--mark-seen",
+        action="store_true",
+        help="Record the current uploads as done without transcribing them",
+    )
+
+    serve_parser = subparsers.add_parser(
+        "serve", help="Run the HTTP job API with a pool of worker processes"
+    )
+    serve_parser.add_argument(
+        "--host", default=os.getenv("SERVE_HOST", "127.0.0.1"), help="Bind address"
+    )
+    serve_parser.add_argument(
+        "--port", type=int, default=int(os.getenv("SERVE_PORT", "8000"))
+    )
+    serve_parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("SERVE_WORKERS", "1")),
+        help="Worker processes, each keeping a Whisper model loaded",
+    )
+
+    worker = subparsers.add_parser(
+        "worker", help="Run queue workers (several hosts may share one queue)"
+    )
+    worker.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("SERVE_WORKERS", "1")),
+        help="Worker processes on this host",
+    )
+
+    enqueue_parser = subparsers.add_parser(
+        "enqueue", help="Add a URL, URL file, playlist or channel to the job queue"
+    )
+    enqueue_parser.add_argument("source", help="URL, file of URLs or playlist URL")
+    enqueue_parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Re-transcribe videos even if a cached transcript exists",
+    )
+
+    subparsers.add_parser(
+        "metrics", help="Print job metrics in the Prometheus text format"
+    )
+
+    return parser.parse_args(argv)
+
+
 def main():
     """Entry point."""
     # Check dependencies
-    try:
-        import importlib
-
-        for dependency in ("yt_dlp", "whisper", "torch"):
-            importlib.import_module(dependency)
-    except ImportError as e:
-        print(f"Missing dependency: {e}")
+    missing = missing_dependencies()
+    if missing:
+        print(f"Missing dependency: {', '.join(missing)}")
         print("\nPlease install requirements:")
         print("  pip install -r requirements.txt")
         print("\nNote: You may also need to install ffmpeg:")
@@ -229,6 +1389,50 @@ def main():
         print("  Windows: Download from https://ffmpeg.org")
         sys.exit(1)
 
+    args = parse_args()
+    if args.command == "batch":
+        if args.download_workers:
+            os.environ["DOWNLOAD_WORKERS"] = str(args.download_workers)
+        if args.transcribe_workers:
+            os.environ["TRANSCRIBE_WORKERS"] = str(args.transcribe_workers)
+        if args.max_pending:
+            os.environ["MAX_PENDING_AUDIO"] = str(args.max_pending)
+        app = YouTubeTranscriptExtractor()
+        results = app.process_batch(
+            args.source, refresh=args.refresh, deadline_hours=args.deadline
+        )
+        sys.exit(1 if any(result["error"] for result in results) else 0)
+
+    if args.command == "plan":
+        YouTubeTranscriptExtractor().plan_batch(
+            args.source, deadline_hours=args.deadline, max_rtf=args.max_rtf
+        )
+        return
+    if args.command == "search":
+        YouTubeTranscriptExtractor().search_transcripts(args.query)
+        return
+    if args.command == "reindex":
+        YouTubeTranscriptExtractor().rebuild_search_index()
+        return
+    if args.command == "sync":
+        results = YouTubeTranscriptExtractor().sync(
+            args.sources, mark_seen=args.mark_seen
+        )
+        sys.exit(1 if any(result["error"] for result in results) else 0)
+    if args.command == "serve":
+        serve(args.host, args.port, args.workers)
+        return
+    if args.command == "worker":
+        run_workers(args.workers)
+        return
+    if args.command == "metrics":
+        render = metrics_renderer()
+        print(render() if render else "METRICS_LOG is disabled", end="")
+        return
+    if args.command == "enqueue":
+        enqueue(args.source, refresh=args.refresh)
+        return
+
     app = YouTubeTranscriptExtractor()
     app.run()
 
@@ -0,0 +1,179 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Histogram buckets (upper bounds) for stage wall times in seconds
+STAGE_BUCKETS = (0.1, 0.5, 1, 5, 15, 60, 300, 900, 3600)
+# Histogram buckets for the real-time factor (processing time / audio length)
+RTF_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4)
+
+METRIC_HELP = {
+    "yte_jobs_total": ("counter", "Processed videos by transcript source and status"),
+    "yte_stage_seconds": ("histogram", "Wall time of each processing stage"),
+    "yte_realtime_factor": ("histogram", "Transcription time / audio duration"),
+    "yte_audio_seconds_total": ("counter", "Seconds of audio transcribed"),
+    "yte_downloaded_bytes_total": ("counter", "Bytes of audio downloaded"),
+    "yte_peak_rss_bytes": ("gauge", "Highest peak RSS reported by a job"),
+}
+
+
+@contextmanager
+def stage_timer(timings, stage):
+    """Add the wall time of the enclosed block to timings[stage] (seconds)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - started
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process so far, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class MetricsRegistry:
+    """Counters, gauges and histograms rendered in Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}  # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> [bucket counts, sum, count]
+        self._buckets = {}  # name -> bucket bounds
+
+    @staticmethod
+    def _labels(labels):
+        return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+    def inc(self, name, value=1, **labels):
+        key = (name, self._labels(labels))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def set_max(self, name, value, **labels):
+        """Set a gauge to value if it is higher than the current one."""
+        key = (name, self._labels(labels))
+        with self._lock:
+            self._values[key] = max(self._values.get(key, value), value)
+
+    def observe(self, name, value, buckets, **labels):
+        key = (name, self._labels(labels))
+        with self._lock:
+            self._buckets[name] = buckets
+            counts, total, count = self._histograms.get(
+                key, ([0] * len(buckets), 0.0, 0)
+            )
+            counts = [c + (value <= bound) for c, bound in zip(counts, buckets)]
+            self._histograms[key] = (counts, total + value, count + 1)
+
+    def record_job(self, record):
+        """Fold one job record (see YouTubeTranscriptExtractor) into the metrics."""
+        self.inc(
+            "yte_jobs_total", source=record.get("source"), status=record.get("status")
+        )
+        for stage, seconds in (record.get("timings") or {}).items():
+            self.observe("yte_stage_seconds", seconds, STAGE_BUCKETS, stage=stage)
+        if record.get("realtime_factor") is not None:
+            self.observe(
+                "yte_realtime_factor",
+                record["realtime_factor"],
+                RTF_BUCKETS,
+                model=record.get("model"),
+            )
+        if record.get("source") == "whisper" and record.get("audio_seconds"):
+            self.inc(
+                "yte_audio_seconds_total",
+                record["audio_seconds"],
+                model=record.get("model"),
+            )
+        if record.get("downloaded_bytes"):
+            self.inc("yte_downloaded_bytes_total", record["downloaded_bytes"])
+        if record.get("peak_rss_bytes"):
+            self.set_max("yte_peak_rss_bytes", record["peak_rss_bytes"])
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+
+        def series(name, labels, value):
+            text = ",".join(f'{k}="{v}"' for k, v in labels)
+            value = int(value) if float(value).is_integer() else value
+            return f"{name}{{{text}}} {value}" if text else f"{name} {value}"
+
+        with self._lock:
+            values = sorted(self._values.items())
+            histograms = sorted(self._histograms.items())
+            buckets = dict(self._buckets)
+
+        lines = []
+        for name, (kind, help_text) in METRIC_HELP.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (metric, labels), value in values:
+                if metric == name:
+                    lines.append(series(name, labels, value))
+            for (metric, labels), (counts, total, count) in histograms:
+                if metric != name:
+                    continue
+                bounds = [f"{bound:g}" for bound in buckets[name]] + ["+Inf"]
+                for bound, bucket_count in zip(bounds, counts + [count]):
+                    bucket_labels = labels + (("le", bound),)
+                    lines.append(series(f"{name}_bucket", bucket_labels, bucket_count))
+                lines.append(series(f"{name}_sum", labels, total))
+                lines.append(series(f"{name}_count", labels, count))
+        return "\n".join(lines) + "\n"
+
+
+class MetricsLog:
+    """Append-only JSONL log of job records, shared by every process.
+
+    append() writes each record with a single O_APPEND write, like the
+    transcript journal. update() folds records appended since the previous
+    call into a MetricsRegistry, so a scrape never rereads the whole log.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._offset = 0
+        self._lock = threading.Lock()
+
+    def append(self, record):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line.encode("utf-8"))
+        finally:
+            os.close(fd)
+
+    def update(self, registry):
+        """Record new complete lines in registry; return how many."""
+        with self._lock:
+            try:
+                with open(self.path, "rb") as f:
+                    f.seek(self._offset)
+                    data = f.read()
+            except FileNotFoundError:
+                return 0
+            # Leave a line that is still being written for the next call
+            complete = data[: data.rfind(b"\n") + 1]
+            self._offset += len(complete)
+
+        count = 0
+        for line in complete.splitlines():
+            try:
+                registry.record_job(json.loads(line))
+            except (ValueError, TypeError, AttributeError):
+                continue
+            count += 1
+        return count
@@ -0,0 +1,150 @@
+import heapq
+import statistics
+
+# Rough CPU real-time factors of fp32 openai-whisper, used until this host
+# has measured a model (and scaled by how fast it measured the others)
+DEFAULT_RTF = {
+    "tiny": 0.08,
+    "base": 0.15,
+    "small": 0.45,
+    "medium": 1.3,
+    "large": 2.6,
+}
+
+# Stages outside Whisper that every transcribed video pays
+OVERHEAD_STAGES = ("resolve", "download", "save")
+
+# Recent runs per model that the estimate is based on
+HISTORY_RUNS = 20
+
+
+def _prior_rtf(model):
+    return DEFAULT_RTF.get(model.split("-", 1)[0], DEFAULT_RTF["large"])
+
+
+def models_up_to(models, limit):
+    """The models smaller (faster by DEFAULT_RTF) than limit, then limit.
+
+    Keeps the order of models, so candidates stay smallest first.
+    """
+    return [m for m in models if _prior_rtf(m) < _prior_rtf(limit)] + [limit]
+
+
+class ThroughputStats:
+    """Per-model real-time factors learned from earlier runs on this host.
+
+    Built from the job metrics saved with every transcript (see
+    YouTubeTranscriptExtractor._job_metrics): the estimate for a model is
+    the median real-time factor of its last HISTORY_RUNS Whisper runs.
+    Models that have not run yet get their DEFAULT_RTF scaled by how this
+    host compares with the defaults on the models it has run.
+    """
+
+    def __init__(self, rtf=None, overhead_seconds=0.0):
+        self.rtf = dict(rtf or {})
+        self.overhead_seconds = overhead_seconds
+
+    @classmethod
+    def from_metrics(cls, records):
+        """Learn from job metrics records, in any order."""
+        runs = {}
+        overheads = []
+        records = sorted(
+            (r for r in records if r and r.get("status", "done") == "done"),
+            key=lambda r: r.get("recorded_at") or 0,
+        )
+        for record in records:
+            if record.get("source") != "whisper":
+                continue
+            if record.get("realtime_factor") and record.get("model"):
+                runs.setdefault(record["model"], []).append(record["realtime_factor"])
+            timings = record.get("timings") or {}
+            if any(stage in timings for stage in OVERHEAD_STAGES):
+                overheads.append(sum(timings.get(s, 0.0) for s in OVERHEAD_STAGES))
+        rtf = {
+            model: statistics.median(values[-HISTORY_RUNS:])
+            for model, values in runs.items()
+        }
+        overhead = statistics.median(overheads[-HISTORY_RUNS:]) if overheads else 0.0
+        return cls(rtf, overhead)
+
+    def measured(self, model):
+        return model in self.rtf
+
+    def realtime_factor(self, model):
+        """Measured or estimated real-time factor of model on this host."""
+        if model in self.rtf:
+            return self.rtf[model]
+        prior = _prior_rtf(model)
+        ratios = [
+            rtf / DEFAULT_RTF[m.split("-", 1)[0]]
+            for m, rtf in self.rtf.items()
+            if m.split("-", 1)[0] in DEFAULT_RTF
+        ]
+        return prior * (statistics.median(ratios) if ratios else 1.0)
+
+    def expected_seconds(self, model, duration):
+        """Expected wall time to process a video of duration seconds."""
+        return self.overhead_seconds + self.realtime_factor(model) * duration
+
+
+class ModelPolicy:
+    """Pick a Whisper model per video against a throughput budget.
+
+    models are the candidates from smallest (fastest) to largest, as model
+    labels (see WhisperTranscriber.model_label). With max_rtf, a video gets
+    the largest model expected to finish within max_rtf times its duration,
+    overhead included, so short videos lean towards smaller models; if none
+    fits, the smallest. plan() additionally fits a batch into a deadline.
+    """
+
+    def __init__(self, stats, models, max_rtf=0):
+        self.stats = stats
+        self.models = list(models)
+        self.max_rtf = max_rtf
+
+    def choose(self, duration):
+        """Model for one video of duration seconds."""
+        if not self.max_rtf or not duration:
+            return self.models[-1]
+        for model in reversed(self.models):
+            if self.stats.expected_seconds(model, duration) <= self.max_rtf * duration:
+                return model
+        return self.models[0]
+
+    def plan(self, durations, deadline_seconds=None, parallelism=1):
+        """Assign a model to every video and estimate the batch wall time.
+
+        Returns (models, expected_seconds, total_seconds): one model and
+        expected time per duration, and the batch total divided across
+        parallelism workers. With deadline_seconds, videos are moved to
+        smaller models, biggest saving first, until the total fits or every
+        video is on the smallest model.
+        """
+        index_of = {model: i for i, model in enumerate(self.models)}
+        chosen = [index_of[self.choose(d)] for d in durations]
+
+        def cost(i, level):
+            return self.stats.expected_seconds(self.models[level], durations[i] or 0)
+
+        total = sum(cost(i, level) for i, level in enumerate(chosen))
+        if deadline_seconds:
+            budget = deadline_seconds * parallelism
+            savings = [
+                (cost(i, level - 1) - cost(i, level), i)
+                for i, level in enumerate(chosen)
+                if level > 0
+            ]
+            heapq.heapify(savings)
+            while total > budget and savings:
+                saving, i = heapq.heappop(savings)
+                total += saving
+                chosen[i] -= 1
+                if chosen[i] > 0:
+                    heapq.heappush(
+                        savings, (cost(i, chosen[i] - 1) - cost(i, chosen[i]), i)
+                    )
+
+        models = [self.models[level] for level in chosen]
+        expected = [cost(i, level) for i, level in enumerate(chosen)]
+        return models, expected, total / max(1, parallelism)
@@ -0,0 +1,169 @@
+import gc
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+def _tensors(values):
+    """Yield the tensors in state_dict values, inside tuples included."""
+    for value in values:
+        if isinstance(value, (tuple, list)):
+            yield from _tensors(value)
+        elif hasattr(value, "element_size"):
+            yield value
+
+
+def estimate_model_bytes(model):
+    """Approximate in-memory size of a torch model's weights and buffers.
+
+    Counted from state_dict(), which also holds the packed int8 weights of
+    dynamically quantized layers that parameters() does not list, plus the
+    buffers kept out of it. Tensors sharing memory are counted once.
+    """
+    try:
+        tensors = list(_tensors(model.state_dict().values()))
+        tensors += list(model.buffers())
+    except AttributeError:
+        return 0
+    sizes = {}
+    for tensor in tensors:
+        try:
+            key = (tensor.data_ptr(), tensor.numel())
+        except RuntimeError:  # sparse tensors have no single storage
+            key = id(tensor)
+        sizes[key] = tensor.numel() * tensor.element_size()
+    return sum(sizes.values())
+
+
+class ModelRegistry:
+    """Process-wide LRU cache of loaded models.
+
+    Keeps at most max_models models and, when memory_budget_mb is set, at
+    most that many megabytes of weights. Evicted models are dropped and
+    their memory handed back to the allocator, so switching back and forth
+    between recently used model sizes is instant.
+
+    Whisper's decoding installs forward hooks on the model, so one model
+    must not run two transcriptions at once: callers sharing weights
+    serialize inference with lock_for(key).
+    """
+
+    def __init__(self, max_models=2, memory_budget_mb=0):
+        self.max_models = max_models
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self._models = OrderedDict()  # key -> (model, size_bytes)
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._inference_locks = {}
+
+    def get(self, key, loader):
+        """Return the model for key, calling loader() to load it on a miss."""
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key][0]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Concurrent callers asking for the same key wait for a single load
+        with load_lock:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    return self._models[key][0]
+
+            model = loader()
+            size = estimate_model_bytes(model)
+            with self._lock:
+                self._models[key] = (model, size)
+                evicted = self._evict(keep=key)
+            logger.info("Loaded model %s (%.0f MB)", key, size / 1024 / 1024)
+
+        if evicted:
+            self._release(evicted)
+        return model
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._models
+
+    def keys(self):
+        """Loaded model keys, least recently used first."""
+        with self._lock:
+            return list(self._models)
+
+    def lock_for(self, key):
+        """Lock serializing inference on the shared model for key."""
+        with self._lock:
+            return self._inference_locks.setdefault(key, threading.Lock())
+
+    def evict(self, key):
+        """Drop one model from the registry."""
+        with self._lock:
+            entry = self._models.pop(key, None)
+        if entry is not None:
+            evicted = [(key, entry[0])]
+            del entry
+            self._release(evicted)
+
+    def clear(self):
+        """Drop every loaded model."""
+        with self._lock:
+            evicted = [(key, entry[0]) for key, entry in self._models.items()]
+            self._models.clear()
+        self._release(evicted)
+
+    def _evict(self, keep):
+        """Pop least recently used models beyond the limits (lock held)."""
+        evicted = []
+        total = sum(size for _, size in self._models.values())
+        for key in list(self._models):
+            over_count = self.max_models and len(self._models) > self.max_models
+            over_budget = self.memory_budget and total > self.memory_budget
+            if not (over_count or over_budget):
+                break
+            if key == keep:
+                continue
+            model, size = self._models.pop(key)
+            total -= size
+            evicted.append((key, model))
+        return evicted
+
+    def _release(self, evicted):
+        """Free evicted models, including cached CUDA memory."""
+        keys = [key for key, _ in evicted]
+        # Drop the last references before collecting
+        evicted.clear()
+        for key in keys:
+            logger.info("Evicted model %s", key)
+        gc.collect()
+        # Only touch torch if it was already imported (and actually loaded)
+        torch = sys.modules.get("torch")
+        if torch is not None and "torch._C" in sys.modules:
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Return the registry shared by every transcriber in this process.
+
+    Sized by WHISPER_MAX_MODELS and MODEL_MEMORY_BUDGET_MB (0 = no budget).
+    """
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = ModelRegistry(
+                max_models=int(os.getenv("WHISPER_MAX_MODELS", "2")),
+                memory_budget_mb=float(os.getenv("MODEL_MEMORY_BUDGET_MB", "0")),
+            )
+        return _default_registry
@@ -0,0 +1,152 @@
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class BatchPipeline:
+    """Overlap downloads and transcription with a bounded producer/consumer queue.
+
+    A pool of download workers runs ``download(item)`` and hands the result to
+    a queue that ``transcribe_workers`` threads drain with ``transcribe(job)``.
+    At most ``max_pending`` downloaded jobs (audio files on disk) exist at any
+    time: a download slot is only freed once its job has been transcribed, so
+    downloads run ahead of transcription without filling the disk.
+
+    With ``transcribe_batch`` and a ``batch_size`` above 1, a worker takes
+    the jobs already waiting (up to ``batch_size``, which ``max_pending``
+    also bounds) and hands them to ``transcribe_batch(jobs)`` together; it
+    returns one result per job, or the exception for a job that failed.
+    """
+
+    def __init__(
+        self,
+        download,
+        transcribe,
+        download_workers=2,
+        transcribe_workers=1,
+        max_pending=2,
+        on_event=None,
+        transcribe_batch=None,
+        batch_size=1,
+    ):
+        if download_workers < 1 or transcribe_workers < 1 or max_pending < 1:
+            raise ValueError("Worker counts and max_pending must be at least 1")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.download = download
+        self.transcribe = transcribe
+        self.transcribe_batch = transcribe_batch
+        self.batch_size = batch_size if transcribe_batch is not None else 1
+        self.download_workers = download_workers
+        self.transcribe_workers = transcribe_workers
+        self.max_pending = max_pending
+        self.on_event = on_event
+
+    def _emit(self, event, index, item, detail=None):
+        """Report progress to the optional on_event(event, index, item, detail)."""
+        if self.on_event is not None:
+            self.on_event(event, index, item, detail)
+
+    def run(self, items):
+        """Process every item and return one result dict per item, in order.
+
+        Each result has ``item``, ``result`` (the transcribe return value) and
+        ``error`` (the exception raised by either stage, or None).
+        """
+        items = list(items)
+        results = [{"item": item, "result": None, "error": None} for item in items]
+        todo = queue.Queue()
+        for index, item in enumerate(items):
+            todo.put((index, item))
+
+        ready = queue.Queue()
+        slots = threading.Semaphore(self.max_pending)
+
+        def download_worker():
+            while True:
+                try:
+                    index, item = todo.get_nowait()
+                except queue.Empty:
+                    return
+                slots.acquire()
+                self._emit("download_started", index, item)
+                try:
+                    job = self.download(item)
+                except Exception as error:
+                    slots.release()
+                    logger.debug("Download failed for %s", item, exc_info=True)
+                    results[index]["error"] = error
+                    self._emit("failed", index, item, error)
+                    continue
+                self._emit("downloaded", index, item, job)
+                ready.put((index, item, job))
+
+        def take_batch():
+            """Wait for one ready job, then add any others already waiting."""
+            entry = ready.get()
+            if entry is _STOP:
+                return None
+            batch = [entry]
+            while len(batch) < self.batch_size:
+                try:
+                    entry = ready.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    ready.put(_STOP)
+                    break
+                batch.append(entry)
+            return batch
+
+        def transcribe_batch(batch):
+            """Return one result or exception per (index, item, job) entry."""
+            try:
+                if len(batch) == 1:
+                    return [self.transcribe(batch[0][2])]
+                return self.transcribe_batch([job for _, _, job in batch])
+            except Exception as error:
+                return [error] * len(batch)
+
+        def transcribe_worker():
+            while True:
+                batch = take_batch()
+                if batch is None:
+                    return
+                for index, item, job in batch:
+                    self._emit("transcribe_started", index, item, job)
+                outcomes = transcribe_batch(batch)
+                for (index, item, _), outcome in zip(batch, outcomes):
+                    if isinstance(outcome, Exception):
+                        logger.debug(
+                            "Transcription failed for %s", item, exc_info=outcome
+                        )
+                        results[index]["error"] = outcome
+                        self._emit("failed", index, item, outcome)
+                    else:
+                        results[index]["result"] = outcome
+                        self._emit("completed", index, item, outcome)
+                    slots.release()
+
+        downloaders = [
+            threading.Thread(target=download_worker, daemon=True)
+            for _ in range(self.download_workers)
+        ]
+        transcribers = [
+            threading.Thread(target=transcribe_worker, daemon=True)
+            for _ in range(self.transcribe_workers)
+        ]
+        for thread in downloaders + transcribers:
+            thread.start()
+
+        for thread in downloaders:
+            thread.join()
+        for _ in transcribers:
+            ready.put(_STOP)
+        for thread in transcribers:
+            thread.join()
+
+        return results
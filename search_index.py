@@ -0,0 +1,109 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from segments import Segment, format_timestamp
+
+
+class SearchIndex:
+    """Full-text index of transcript segments in an SQLite FTS5 table.
+
+    The index is updated incrementally as transcripts are saved or removed,
+    so queries never rescan the archive. rebuild() recreates it from scratch
+    for archives saved before the index existed.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    @contextmanager
+    def _transaction(self):
+        """Open a connection, commit on success and always close it."""
+        with self._lock:
+            connection = sqlite3.connect(self.db_path, timeout=30)
+            try:
+                if not self._initialized:
+                    # Not WAL: its shared-memory index breaks when hosts
+                    # share the archive over a network filesystem
+                    connection.execute("PRAGMA journal_mode=DELETE")
+                    connection.execute(
+                        "CREATE VIRTUAL TABLE IF NOT EXISTS segments USING fts5("
+                        "text, transcript_id UNINDEXED, title UNINDEXED, "
+                        "start UNINDEXED)"
+                    )
+                    self._initialized = True
+                with connection:
+                    yield connection
+            finally:
+                connection.close()
+
+    @staticmethod
+    def _rows(transcript_id, title, transcript_data):
+        """Yield (text, transcript_id, title, start) rows for one transcript."""
+        segments = transcript_data.get("segments") or []
+        if not segments:
+            yield transcript_data["full_text"], transcript_id, title, None
+            return
+        for segment in map(Segment.parse, segments):
+            yield segment.text, transcript_id, title, format_timestamp(segment.start)
+
+    def add_transcript(self, transcript_id, title, transcript_data):
+        """Index every segment of a saved transcript."""
+        with self._transaction() as connection:
+            connection.execute(
+                "DELETE FROM segments WHERE transcript_id = ?", (transcript_id,)
+            )
+            connection.executemany(
+                "INSERT INTO segments (text, transcript_id, title, start) "
+                "VALUES (?, ?, ?, ?)",
+                self._rows(transcript_id, title, transcript_data),
+            )
+
+    def remove_transcript(self, transcript_id):
+        """Drop a transcript's segments from the index."""
+        with self._transaction() as connection:
+            connection.execute(
+                "DELETE FROM segments WHERE transcript_id = ?", (transcript_id,)
+            )
+
+    def search(self, query, limit=20):
+        """Return the best matching segments for an FTS5 query.
+
+        Each hit has id, title, timestamp (None without segment timestamps)
+        and a snippet with the matched terms wrapped in [brackets]. Input
+        that is not valid FTS5 syntax is searched as a plain phrase.
+        """
+        sql = (
+            "SELECT transcript_id, title, start, "
+            "snippet(segments, 0, '[', ']', '...', 12) "
+            "FROM segments WHERE segments MATCH ? ORDER BY rank LIMIT ?"
+        )
+        with self._transaction() as connection:
+            try:
+                rows = connection.execute(sql, (query, limit)).fetchall()
+            except sqlite3.OperationalError:
+                phrase = '"' + query.replace('"', '""') + '"'
+                rows = connection.execute(sql, (phrase, limit)).fetchall()
+
+        return [
+            {"id": row[0], "title": row[1], "timestamp": row[2], "snippet": row[3]}
+            for row in rows
+        ]
+
+    def rebuild(self, transcripts):
+        """Replace the index with (transcript_id, title, transcript_data) items."""
+        count = 0
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM segments")
+            for transcript_id, title, transcript_data in transcripts:
+                connection.executemany(
+                    "INSERT INTO segments (text, transcript_id, title, start) "
+                    "VALUES (?, ?, ?, ?)",
+                    self._rows(transcript_id, title, transcript_data),
+                )
+                count += 1
+            connection.execute("INSERT INTO segments(segments) VALUES ('optimize')")
+        return count
@@ -0,0 +1,102 @@
+import re
+from array import array
+
+# "[mm:ss - mm:ss] text" lines saved by versions before structured segments
+LEGACY_SEGMENT_PATTERN = re.compile(
+    r"^\[(?P<start>[\d:]+) - (?P<end>[\d:]+)\] (?P<text>.*)$"
+)
+
+
+def format_timestamp(seconds):
+    """Convert seconds to HH:MM:SS, or MM:SS under an hour."""
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    seconds = int(seconds % 60)
+
+    if hours > 0:
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+def _clock_seconds(text):
+    """Seconds in a "[hh:]mm:ss" timestamp."""
+    seconds = 0
+    for part in text.split(":"):
+        seconds = seconds * 60 + int(part)
+    return float(seconds)
+
+
+class Segment:
+    """One transcript segment: times in seconds, text and decoder stats.
+
+    Slots keep a multi-hour transcript at a few hundred bytes per segment;
+    tokens are stored as a compact array of token IDs.
+    """
+
+    __slots__ = ("start", "end", "text", "avg_logprob", "no_speech_prob", "tokens")
+
+    def __init__(
+        self, start, end, text, avg_logprob=None, no_speech_prob=None, tokens=None
+    ):
+        self.start = start
+        self.end = end
+        self.text = text
+        self.avg_logprob = avg_logprob
+        self.no_speech_prob = no_speech_prob
+        self.tokens = array("I", tokens) if tokens is not None else None
+
+    @classmethod
+    def from_result(cls, segment):
+        """Build a Segment from a Whisper (or captions) segment dict."""
+        return cls(
+            float(segment["start"]),
+            float(segment["end"]),
+            segment["text"].strip(),
+            segment.get("avg_logprob"),
+            segment.get("no_speech_prob"),
+            segment.get("tokens"),
+        )
+
+    @classmethod
+    def parse(cls, value):
+        """Build a Segment from a saved dict, a legacy string or a Segment."""
+        if isinstance(value, Segment):
+            return value
+        if isinstance(value, dict):
+            return cls.from_result(value)
+        match = LEGACY_SEGMENT_PATTERN.match(value)
+        if match is None:
+            return cls(0.0, 0.0, value.strip())
+        return cls(
+            _clock_seconds(match.group("start")),
+            _clock_seconds(match.group("end")),
+            match.group("text"),
+        )
+
+    def to_dict(self):
+        """Compact JSON-ready dict; unknown decoder stats are left out."""
+        data = {"start": round(self.start, 3), "end": round(self.end, 3)}
+        data["text"] = self.text
+        if self.avg_logprob is not None:
+            data["avg_logprob"] = round(self.avg_logprob, 4)
+        if self.no_speech_prob is not None:
+            data["no_speech_prob"] = round(self.no_speech_prob, 4)
+        if self.tokens is not None:
+            data["tokens"] = self.tokens.tolist()
+        return data
+
+    def timestamped(self):
+        """The "[mm:ss - mm:ss] text" line of the timestamped transcript."""
+        start = format_timestamp(self.start)
+        end = format_timestamp(self.end)
+        return f"[{start} - {end}] {self.text}"
+
+    def __eq__(self, other):
+        if not isinstance(other, Segment):
+            return NotImplemented
+        return all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+    def __repr__(self):
+        return f"Segment({self.start!r}, {self.end!r}, {self.text!r})"
@@ -0,0 +1,139 @@
+import json
+import logging
+import re
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from job_queue import QueueFull
+
+logger = logging.getLogger(__name__)
+
+JOB_PATH = re.compile(r"^/jobs/(?P<id>[0-9a-f]+)(?P<transcript>/transcript)?$")
+
+# Fields of a job exposed by the API
+JOB_FIELDS = (
+    "id",
+    "url",
+    "status",
+    "attempts",
+    "worker",
+    "created_at",
+    "updated_at",
+    "error",
+    "result",
+    "timings",
+)
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """JSON API over a JobQueue.
+
+    POST /jobs                  {"url": ..., "refresh": false} -> 202 job
+    GET  /jobs/<id>             job status, result and stage timings
+    GET  /jobs/<id>/transcript  saved transcript.json of a finished job
+    GET  /health                job counts per status
+    GET  /metrics               job metrics in the Prometheus text format
+
+    A full queue answers 429 with Retry-After so clients back off.
+    """
+
+    server_version = "YouTubeTranscriptExtractor"
+
+    def _send(self, status, body, headers=None):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status, message, headers=None):
+        self._send(status, {"error": message}, headers)
+
+    def do_POST(self):
+        if self.path != "/jobs":
+            return self._error(HTTPStatus.NOT_FOUND, "Not found")
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            url = body["url"]
+        except (ValueError, KeyError, TypeError):
+            return self._error(HTTPStatus.BAD_REQUEST, 'Expected JSON {"url": ...}')
+        if not isinstance(url, str) or not self.server.is_valid_url(url):
+            return self._error(HTTPStatus.BAD_REQUEST, "Not a YouTube URL")
+
+        try:
+            job = self.server.queue.submit(url, refresh=bool(body.get("refresh")))
+        except QueueFull as e:
+            return self._error(
+                HTTPStatus.TOO_MANY_REQUESTS,
+                str(e),
+                {"Retry-After": str(self.server.retry_after)},
+            )
+        self._send(
+            HTTPStatus.ACCEPTED,
+            self._view(job),
+            {"Location": f"/jobs/{job['id']}"},
+        )
+
+    def do_GET(self):
+        if self.path == "/metrics" and self.server.render_metrics is not None:
+            data = self.server.render_metrics().encode("utf-8")
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        if self.path == "/health":
+            return self._send(
+                HTTPStatus.OK, {"status": "ok", "jobs": self.server.queue.counts()}
+            )
+
+        match = JOB_PATH.match(self.path)
+        job = self.server.queue.get(match.group("id")) if match else None
+        if job is None:
+            return self._error(HTTPStatus.NOT_FOUND, "Not found")
+        if not match.group("transcript"):
+            return self._send(HTTPStatus.OK, self._view(job))
+
+        if job["status"] != "done":
+            return self._error(HTTPStatus.CONFLICT, f"Job is {job['status']}, not done")
+        transcript_path = Path(job["result"]["folder"]) / "transcript.json"
+        try:
+            with open(transcript_path, "r", encoding="utf-8") as f:
+                transcript = json.load(f)
+        except OSError:
+            return self._error(HTTPStatus.GONE, "Transcript is no longer available")
+        self._send(HTTPStatus.OK, transcript)
+
+    @staticmethod
+    def _view(job):
+        return {field: job[field] for field in JOB_FIELDS}
+
+    def log_message(self, format, *args):
+        logger.info("%s %s", self.address_string(), format % args)
+
+
+def make_server(
+    queue,
+    host="127.0.0.1",
+    port=8000,
+    is_valid_url=None,
+    retry_after=5,
+    render_metrics=None,
+):
+    """Create (but do not start) the HTTP server for a JobQueue.
+
+    render_metrics, if given, returns the text served at /metrics.
+    """
+    server = ThreadingHTTPServer((host, port), JobRequestHandler)
+    server.daemon_threads = True
+    server.queue = queue
+    server.is_valid_url = is_valid_url or (lambda url: url.startswith("http"))
+    server.retry_after = retry_after
+    server.render_metrics = render_metrics
+    return server
@@ -0,0 +1,286 @@
+import os
+import subprocess
+import tempfile
+import threading
+
+import numpy as np
+
+from chunking import SAMPLE_RATE, SegmentStitcher
+
+# Bytes read from ffmpeg per pipe read (float32 samples)
+READ_BLOCK_BYTES = 64 * 1024
+
+
+class PcmRingBuffer:
+    """Fixed-size ring buffer of float32 PCM shared by a reader and a decoder.
+
+    write() blocks while the buffer is full, which stops reading from ffmpeg
+    and, through the pipe, stops the download: memory stays at capacity no
+    matter how long the audio is.
+    """
+
+    def __init__(self, capacity):
+        self._data = np.zeros(capacity, dtype=np.float32)
+        self._start = 0  # index of the oldest unread sample
+        self._count = 0
+        self._closed = False
+        self._error = None
+        self._condition = threading.Condition()
+
+    @property
+    def capacity(self):
+        return len(self._data)
+
+    def write(self, samples):
+        """Append samples, blocking while there is no room."""
+        offset = 0
+        while offset < len(samples):
+            with self._condition:
+                while self._count == self.capacity and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                room = self.capacity - self._count
+                n = min(room, len(samples) - offset)
+                end = (self._start + self._count) % self.capacity
+                first = min(n, self.capacity - end)
+                self._data[end : end + first] = samples[offset : offset + first]
+                self._data[: n - first] = samples[offset + first : offset + n]
+                self._count += n
+                offset += n
+                self._condition.notify_all()
+
+    def close(self, error=None):
+        """Mark the end of the stream (optionally with a producer error)."""
+        with self._condition:
+            self._closed = True
+            self._error = error
+            self._condition.notify_all()
+
+    def peek(self, size):
+        """Return up to size oldest samples without consuming them.
+
+        Blocks until size samples are buffered or the stream has ended.
+        Returns (samples, finished) where finished means no more samples will
+        follow the returned ones.
+        """
+        if size > self.capacity:
+            raise ValueError("Window is larger than the ring buffer")
+        with self._condition:
+            while self._count < size and not self._closed:
+                self._condition.wait()
+            if self._error is not None:
+                raise self._error
+            n = min(size, self._count)
+            indices = (self._start + np.arange(n)) % self.capacity
+            finished = self._closed and n == self._count
+            return self._data[indices].copy(), finished
+
+    def consume(self, size):
+        """Drop the size oldest samples, freeing room for the writer."""
+        with self._condition:
+            size = min(size, self._count)
+            self._start = (self._start + size) % self.capacity
+            self._count -= size
+            self._condition.notify_all()
+
+
+class PcmFileReader:
+    """Read windows of a raw float32 PCM file through short-lived memory maps.
+
+    Has the same peek()/consume() interface as PcmRingBuffer, so the
+    windowed transcriber can run over a file decoded once by ffmpeg. Each
+    window is mapped, copied and unmapped, so resident memory is bounded by
+    the window size rather than by the length of the audio.
+    """
+
+    def __init__(self, path, position=0):
+        self.path = str(path)
+        self.total = os.path.getsize(self.path) // 4
+        self.position = position
+
+    def __len__(self):
+        return self.total
+
+    def peek(self, size):
+        """Return (samples, finished) for the next size samples."""
+        n = max(0, min(size, self.total - self.position))
+        if n == 0:
+            return np.zeros(0, dtype=np.float32), True
+        mapped = np.memmap(
+            self.path, dtype=np.float32, mode="r", offset=self.position * 4, shape=(n,)
+        )
+        samples = np.array(mapped)
+        del mapped
+        return samples, self.position + n >= self.total
+
+    def consume(self, size):
+        """Advance past size samples."""
+        self.position = min(self.total, self.position + size)
+
+
+def _decoder_command(source, output, headers=None):
+    """ffmpeg command decoding source to 16 kHz mono f32le at output."""
+    command = ["ffmpeg", "-nostdin", "-loglevel", "error", "-y"]
+    if headers:
+        command += ["-headers", "".join(f"{k}: {v}\r\n" for k, v in headers.items())]
+    command += ["-i", source, "-f", "f32le", "-ac", "1", "-ar", str(SAMPLE_RATE)]
+    return command + [output]
+
+
+def start_decoder(source, headers=None, stderr=None):
+    """Start ffmpeg decoding source (URL or path) to 16 kHz mono f32le on stdout.
+
+    stderr is a file for ffmpeg's log. It must not be a pipe that is only
+    read at the end: reconnect errors on a long stream would fill it and
+    block ffmpeg.
+    """
+    return subprocess.Popen(
+        _decoder_command(source, "-", headers),
+        stdout=subprocess.PIPE,
+        stderr=stderr if stderr is not None else subprocess.DEVNULL,
+    )
+
+
+def decode_to_pcm_file(source, pcm_path, headers=None):
+    """Decode source once into a raw 16 kHz mono float32 file for PcmFileReader."""
+    completed = subprocess.run(
+        _decoder_command(source, str(pcm_path), headers),
+        capture_output=True,
+    )
+    if completed.returncode != 0:
+        stderr = completed.stderr.decode("utf-8", errors="replace").strip()
+        raise RuntimeError(f"ffmpeg failed to decode {source}: {stderr}")
+    return pcm_path
+
+
+def pump(stream, ring):
+    """Copy float32 samples from a binary stream into a ring buffer until EOF."""
+    pending = b""
+    try:
+        while True:
+            block = stream.read(READ_BLOCK_BYTES)
+            if not block:
+                break
+            block = pending + block
+            usable = len(block) - len(block) % 4
+            pending = block[usable:]
+            ring.write(np.frombuffer(block[:usable], dtype=np.float32))
+    except Exception as error:
+        ring.close(error)
+        return
+    ring.close()
+
+
+class StreamingTranscriber:
+    """Transcribe fixed windows of a PCM stream as soon as they fill up.
+
+    Windows of window_seconds overlap by overlap_seconds. Segments that end
+    inside the overlap are left for the next window, which starts right
+    after the last accepted segment, so no word is cut at a seam. Accepted
+    segments are passed to on_segment immediately.
+    """
+
+    def __init__(self, transcribe_window, window_seconds=30, overlap_seconds=5):
+        if overlap_seconds >= window_seconds:
+            raise ValueError("overlap_seconds must be shorter than window_seconds")
+        self.transcribe_window = transcribe_window
+        self.window = int(window_seconds * SAMPLE_RATE)
+        self.overlap = int(overlap_seconds * SAMPLE_RATE)
+
+    def run(self, ring, on_segment=None, checkpoint=None):
+        """Consume the ring buffer until the stream ends; return the result.
+
+        With a TranscriptionCheckpoint, progress is saved after every window
+        and a saved state is resumed from. ring must then be seekable through
+        consume() (a PcmFileReader), since skipped audio is not re-read.
+        """
+        stitcher = SegmentStitcher()
+        position = 0  # absolute sample index of the window start
+        prompt = None
+        state = checkpoint.load() if checkpoint is not None else None
+        if state is not None:
+            stitcher.segments = state["segments"]
+            stitcher.languages = state["languages"]
+            stitcher.covered_until = state["covered_until"]
+            position = state["position"]
+            prompt = state["prompt"]
+            ring.consume(position)
+
+        while True:
+            samples, finished = ring.peek(self.window)
+            if len(samples) == 0:
+                break
+
+            result = self.transcribe_window(samples, initial_prompt=prompt)
+            limit = len(samples) if finished else len(samples) - self.overlap
+            accepted = [
+                segment
+                for segment in result.get("segments", [])
+                if finished or segment["end"] * SAMPLE_RATE <= limit
+            ]
+            window_result = dict(result, segments=accepted)
+            kept = stitcher.add(position / SAMPLE_RATE, window_result)
+            if on_segment is not None:
+                for segment in kept:
+                    on_segment(segment)
+
+            if finished:
+                break
+            if accepted:
+                advance = int(accepted[-1]["end"] * SAMPLE_RATE)
+                # Always make progress, even on very short accepted segments
+                advance = max(advance, SAMPLE_RATE)
+                prompt = "".join(segment["text"] for segment in accepted)[-200:]
+            else:
+                advance = limit
+            ring.consume(advance)
+            position += advance
+
+            if checkpoint is not None:
+                checkpoint.save(
+                    {
+                        "position": position,
+                        "prompt": prompt,
+                        "covered_until": stitcher.covered_until,
+                    },
+                    window={"language": result.get("language"), "segments": kept},
+                )
+
+        return stitcher.result()
+
+
+def transcribe_stream(
+    source,
+    transcribe_window,
+    headers=None,
+    on_segment=None,
+    window_seconds=30,
+    overlap_seconds=5,
+):
+    """Decode source with a single ffmpeg process and transcribe it as it arrives.
+
+    Memory is bounded by the ring buffer (two windows of PCM) regardless of
+    the audio length.
+    """
+    streamer = StreamingTranscriber(transcribe_window, window_seconds, overlap_seconds)
+    ring = PcmRingBuffer(2 * streamer.window)
+    with tempfile.TemporaryFile() as log:
+        process = start_decoder(source, headers, stderr=log)
+        reader = threading.Thread(target=pump, args=(process.stdout, ring), daemon=True)
+        reader.start()
+        try:
+            result = streamer.run(ring, on_segment=on_segment)
+        except BaseException:
+            ring.close()
+            process.kill()
+            reader.join()
+            process.wait()
+            raise
+
+        reader.join()
+        if process.wait() != 0:
+            log.seek(0)
+            stderr = log.read().decode("utf-8", errors="replace").strip()
+            raise RuntimeError(f"ffmpeg failed to decode the audio stream: {stderr}")
+    return result
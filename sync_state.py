@@ -0,0 +1,90 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from json import JSONDecodeError
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock
+    fcntl = None
+
+# Most recent video IDs remembered per source
+SEEN_IDS_LIMIT = 1000
+
+
+class SyncState:
+    """Per-source watermarks for 'sync', kept in one JSON file.
+
+    A watermark holds the IDs of the newest videos already transcribed
+    (newest first), the latest upload date seen when the listing reports
+    one, and the IDs that failed last time and should be retried. Updates
+    are read-modify-write under an flock and replace the file atomically,
+    so hosts sharing TRANSCRIPTS_DIR can sync different sources at once.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.path + ".lock", "a") as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except JSONDecodeError:
+            # Never happens with atomic writes; start over rather than crash
+            return {}
+
+    def get(self, source):
+        """Return the watermark for source, or None before its first sync."""
+        with self._locked():
+            return self._read().get(source)
+
+    def advance(self, source, videos, failed_ids=()):
+        """Record transcribed videos and the IDs to retry on the next sync.
+
+        videos is a list of (video_id, upload_date) in listing order, newest
+        first; upload_date (YYYYMMDD) may be None.
+        """
+        with self._locked():
+            state = self._read()
+            previous = state.get(source) or {}
+            new_ids = [video_id for video_id, _ in videos]
+            seen = new_ids + [
+                video_id
+                for video_id in previous.get("seen_ids", [])
+                if video_id not in set(new_ids)
+            ]
+            dates = [date for _, date in videos if date]
+            if previous.get("last_upload_date"):
+                dates.append(previous["last_upload_date"])
+            state[source] = {
+                "seen_ids": seen[:SEEN_IDS_LIMIT],
+                "last_upload_date": max(dates) if dates else None,
+                "retry_ids": list(failed_ids),
+                "synced_at": datetime.now().isoformat(),
+            }
+
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+            return state[source]
@@ -0,0 +1,65 @@
+import os
+import threading
+import time
+
+from audio_cache import AudioCache
+
+
+def _writer(data, calls=None, delay=0.0):
+    def download(directory):
+        if calls is not None:
+            calls.append(directory)
+        time.sleep(delay)
+        path = os.path.join(directory, "audio.webm")
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    return download
+
+
+def test_concurrent_fetches_download_once(tmp_path):
+    cache = AudioCache(tmp_path)
+    calls = []
+    results = []
+
+    def fetch():
+        results.append(cache.fetch("abc", "native", _writer(b"x", calls, 0.2)))
+
+    threads = [threading.Thread(target=fetch) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert {path for path, _ in results} == {str(tmp_path / "abc.native.webm")}
+    assert sorted(hit for _, hit in results) == [False, True, True]
+    # Nothing but the entry and its lock file is left behind
+    assert sorted(os.listdir(tmp_path)) == [".abc.native.lock", "abc.native.webm"]
+
+
+def test_eviction_drops_least_recently_used_unleased_entries(tmp_path):
+    cache = AudioCache(tmp_path, max_bytes=15)
+    oldest, _ = cache.fetch("old", "native", _writer(b"1" * 10))
+    leased, _ = cache.fetch("leased", "native", _writer(b"2" * 10))
+    cache.release(oldest)
+    os.utime(oldest, (1, 1))
+    os.utime(leased, (2, 2))
+
+    newest, _ = cache.fetch("new", "native", _writer(b"3" * 10))
+
+    assert not os.path.exists(oldest)
+    assert os.path.exists(leased) and os.path.exists(newest)
+
+
+def test_sidecar_files_are_not_entries(tmp_path):
+    cache = AudioCache(tmp_path, max_bytes=15)
+    path, _ = cache.fetch("abc", "native", _writer(b"x" * 10))
+    cache.release(path)
+    (tmp_path / "abc.native.f32").write_bytes(b"0" * 100)
+    (tmp_path / "abc.native.webm.part").write_bytes(b"0" * 100)
+
+    assert cache.fetch("abc", "native", _writer(b"y")) == (path, True)
+    assert [entry[0] for entry in cache.entries()] == [tmp_path / "abc.native.webm"]
+    assert cache.evict() == []
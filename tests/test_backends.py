@@ -0,0 +1,61 @@
+import importlib.util
+
+import pytest
+import torch
+import whisper
+
+import backends
+import transcriber as transcriber_module
+from model_registry import ModelRegistry
+
+
+class _TinyWhisper(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.proj = whisper.model.Linear(8, 8)
+        self.norm = torch.nn.LayerNorm(8)
+
+    def forward(self, x):
+        return self.norm(self.proj(x))
+
+
+def test_int8_backend_quantizes_whisper_linear_layers(monkeypatch):
+    monkeypatch.setattr(
+        backends.whisper, "load_model", lambda *args, **kwargs: _TinyWhisper()
+    )
+
+    model = backends.get_backend("whisper-int8").load("tiny", "cpu")
+
+    assert isinstance(model.proj, torch.ao.nn.quantized.dynamic.Linear)
+    assert model(torch.ones(2, 8)).shape == (2, 8)
+
+
+def test_backend_is_part_of_the_model_key(monkeypatch):
+    monkeypatch.setenv("USE_GPU", "true")
+    monkeypatch.setattr(torch.cuda, "is_available", lambda: True)
+    registry = ModelRegistry()
+
+    default = transcriber_module.WhisperTranscriber("base", registry=registry)
+    int8 = transcriber_module.WhisperTranscriber(
+        "base", registry=registry, backend="whisper-int8"
+    )
+
+    assert default.model_key == ("whisper", "base", "cuda")
+    assert int8.model_key == ("whisper-int8", "base", "cpu")
+    assert (default.model_label, int8.model_label) == ("base", "base-whisper-int8")
+
+
+def test_unknown_backend_is_rejected(monkeypatch):
+    monkeypatch.setenv("WHISPER_BACKEND", "onnx")
+
+    with pytest.raises(ValueError):
+        backends.get_backend()
+
+
+@pytest.mark.skipif(
+    importlib.util.find_spec("faster_whisper") is not None,
+    reason="faster-whisper is installed",
+)
+def test_faster_whisper_needs_the_package():
+    with pytest.raises(RuntimeError):
+        backends.get_backend("faster-whisper")
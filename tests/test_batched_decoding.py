@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+import batched_decoding
+from batched_decoding import decode_batched, parse_segments
+from chunking import SAMPLE_RATE
+
+
+class _Tokenizer:
+    timestamp_begin = 1000
+
+    def decode(self, tokens):
+        return "".join(f" w{token}" for token in tokens)
+
+
+def _result(tokens, **overrides):
+    fields = {
+        "tokens": tokens,
+        "language": "en",
+        "avg_logprob": -0.2,
+        "no_speech_prob": 0.01,
+        "temperature": 0.0,
+        "compression_ratio": 1.2,
+    }
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+def test_parse_segments_splits_on_timestamp_pairs():
+    # <|0.00|> 1 2 <|2.00|><|2.00|> 3 <|4.00|> 4 (cut off at the window end)
+    tokens = [1000, 1, 2, 1100, 1100, 3, 1200, 4]
+
+    segments = parse_segments(_Tokenizer(), _result(tokens), duration=5.0)
+
+    assert [(s["start"], s["end"], s["text"]) for s in segments] == [
+        (0.0, 2.0, " w1 w2"),
+        (2.0, 4.0, " w3"),
+        (4.0, 5.0, " w4"),
+    ]
+
+
+def test_windows_of_several_audios_share_batches(monkeypatch):
+    batches = []
+    temperatures = []
+
+    def decode(model, mel, options):
+        batches.append(len(mel))
+        temperatures.append(options.temperature)
+        results = []
+        for _ in range(len(mel)):
+            # The first window of the first batch is retried once
+            retry = len(batches) == 1 and not results
+            results.append(
+                _result([1000, 7, 1100], avg_logprob=-2.0 if retry else -0.2)
+            )
+        return results
+
+    monkeypatch.setattr(batched_decoding.whisper, "decode", decode)
+    monkeypatch.setattr(
+        batched_decoding.whisper.tokenizer,
+        "get_tokenizer",
+        lambda *a, **k: _Tokenizer(),
+    )
+    model = SimpleNamespace(
+        dims=SimpleNamespace(n_mels=80),
+        is_multilingual=True,
+        num_languages=99,
+        device="cpu",
+    )
+    rng = np.random.default_rng(0)
+    long_audio = rng.uniform(-0.3, 0.3, 70 * SAMPLE_RATE).astype(np.float32)
+    short_audio = long_audio[: 20 * SAMPLE_RATE]
+
+    long_result, short_result = decode_batched(
+        model, [long_audio, short_audio], batch_size=2
+    )
+
+    assert batches == [2, 2, 1]
+    assert temperatures == [0.0, 0.0, 0.2]
+    assert len(long_result["segments"]) == 3
+    assert long_result["segments"][1]["start"] > 26
+    assert [s["start"] for s in short_result["segments"]] == [0.0]
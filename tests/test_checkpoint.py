@@ -0,0 +1,107 @@
+import json
+
+import numpy as np
+import pytest
+
+from checkpoint import TranscriptionCheckpoint
+from chunking import SAMPLE_RATE
+from streaming import PcmFileReader, StreamingTranscriber
+
+
+class _Interrupted(Exception):
+    pass
+
+
+def _window_transcriber(fail_after=None):
+    """Fake transcribe_window naming segments by absolute second and prompt."""
+    calls = []
+
+    def transcribe_window(samples, initial_prompt=None):
+        if fail_after is not None and len(calls) == fail_after:
+            raise _Interrupted()
+        calls.append(initial_prompt)
+        segments = []
+        for start in range(0, len(samples) // SAMPLE_RATE - 2, 3):
+            absolute = int(samples[start * SAMPLE_RATE])
+            text = f" s{absolute}p{len(initial_prompt or '')}"
+            segments.append({"start": start, "end": start + 3, "text": text})
+        return {"segments": segments, "language": "en"}
+
+    return transcribe_window, calls
+
+
+def _pcm_file(tmp_path, seconds):
+    path = tmp_path / "video123.f32"
+    np.repeat(np.arange(seconds, dtype=np.float32), SAMPLE_RATE).tofile(path)
+    return path
+
+
+def test_resumed_run_matches_uninterrupted_run(tmp_path):
+    pcm_path = _pcm_file(tmp_path, 120)
+    transcribe_window, _ = _window_transcriber()
+    expected = StreamingTranscriber(transcribe_window, 30, 5).run(
+        PcmFileReader(pcm_path)
+    )
+
+    checkpoint = TranscriptionCheckpoint(tmp_path, "video123", "base", "settings")
+    failing, _ = _window_transcriber(fail_after=2)
+    with pytest.raises(_Interrupted):
+        StreamingTranscriber(failing, 30, 5).run(
+            PcmFileReader(pcm_path), checkpoint=checkpoint
+        )
+    assert checkpoint.load()["position"] > 0
+
+    resumed_window, calls = _window_transcriber()
+    result = StreamingTranscriber(resumed_window, 30, 5).run(
+        PcmFileReader(pcm_path), checkpoint=checkpoint
+    )
+
+    assert result == expected
+    # Only the windows after the checkpoint were transcribed again
+    assert calls[0] is not None
+    checkpoint.remove()
+    assert not pcm_path.exists()
+
+
+def test_checkpoint_from_other_settings_is_ignored(tmp_path):
+    TranscriptionCheckpoint(tmp_path, "video123", "base", "old").save({"position": 1})
+
+    assert TranscriptionCheckpoint(tmp_path, "video123", "base", "new").load() is None
+    assert TranscriptionCheckpoint(tmp_path, "video123", "small", "old").load() is None
+    assert (
+        TranscriptionCheckpoint(tmp_path, "video123", "base", "old").load()["position"]
+        == 1
+    )
+
+
+def test_windows_are_appended_and_unsaved_tail_is_dropped(tmp_path):
+    pcm_path = _pcm_file(tmp_path, 120)
+    transcribe_window, _ = _window_transcriber()
+    expected = StreamingTranscriber(transcribe_window, 30, 5).run(
+        PcmFileReader(pcm_path)
+    )
+
+    checkpoint = TranscriptionCheckpoint(tmp_path, "video123", "base", "settings")
+    failing, _ = _window_transcriber(fail_after=3)
+    with pytest.raises(_Interrupted):
+        StreamingTranscriber(failing, 30, 5).run(
+            PcmFileReader(pcm_path), checkpoint=checkpoint
+        )
+    # The header holds no segments; each window is one log line
+    with open(checkpoint.path, encoding="utf-8") as f:
+        assert "segments" not in json.load(f)
+    with open(checkpoint.log_path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 3
+    # A window appended by a run killed before it saved the header
+    with open(checkpoint.log_path, "a", encoding="utf-8") as f:
+        f.write('{"language": "en", "segments": [{"text": " stale"}]}\n')
+
+    resumed_window, _ = _window_transcriber()
+    result = StreamingTranscriber(resumed_window, 30, 5).run(
+        PcmFileReader(pcm_path),
+        checkpoint=TranscriptionCheckpoint(tmp_path, "video123", "base", "settings"),
+    )
+
+    assert result == expected
+    with open(checkpoint.log_path, encoding="utf-8") as f:
+        assert "stale" not in f.read()
@@ -0,0 +1,69 @@
+import numpy as np
+
+from chunking import SAMPLE_RATE, find_split_points, plan_chunks, stitch_segments
+
+
+def _tone_with_pauses(seconds, pauses):
+    """Synthetic speech-like noise with silent gaps at the given seconds."""
+    rng = np.random.default_rng(0)
+    audio = rng.uniform(-0.5, 0.5, int(seconds * SAMPLE_RATE)).astype(np.float32)
+    for pause in pauses:
+        start = int(pause * SAMPLE_RATE)
+        audio[start : start + SAMPLE_RATE // 2] = 0.0
+    return audio
+
+
+def test_split_points_land_in_silence():
+    audio = _tone_with_pauses(300, pauses=[112, 231])
+
+    points = find_split_points(audio, chunk_seconds=120, search_seconds=20)
+
+    assert points[0] == 0 and points[-1] == len(audio)
+    assert len(points) == 4
+    assert abs(points[1] / SAMPLE_RATE - 112.25) < 0.3
+    assert abs(points[2] / SAMPLE_RATE - 231.25) < 0.3
+
+
+def test_short_audio_is_a_single_chunk():
+    audio = np.zeros(10 * SAMPLE_RATE, dtype=np.float32)
+
+    assert plan_chunks(audio, chunk_seconds=60) == [(0, len(audio))]
+
+
+def test_chunks_overlap_and_cover_the_audio():
+    audio = _tone_with_pauses(300, pauses=[112, 231])
+
+    chunks = plan_chunks(audio, chunk_seconds=120, overlap_seconds=1.0)
+
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(audio)
+    for (_, end), (next_start, _) in zip(chunks, chunks[1:]):
+        assert end - next_start == SAMPLE_RATE
+
+
+def test_stitch_shifts_timestamps_and_drops_seam_duplicates():
+    first = {
+        "language": "en",
+        "segments": [
+            {"start": 0.0, "end": 4.0, "text": " Hello there."},
+            {"start": 4.0, "end": 60.5, "text": " General Kenobi."},
+        ],
+    }
+    second = {
+        "language": "en",
+        "segments": [
+            {"start": 0.0, "end": 0.4, "text": " General Kenobi."},
+            {"start": 1.0, "end": 5.0, "text": " You are a bold one."},
+        ],
+    }
+
+    result = stitch_segments([(0.0, first), (60.0, second)])
+
+    assert [segment["text"] for segment in result["segments"]] == [
+        " Hello there.",
+        " General Kenobi.",
+        " You are a bold one.",
+    ]
+    assert result["segments"][2]["start"] == 61.0
+    assert result["segments"][2]["end"] == 65.0
+    assert result["text"] == " Hello there. General Kenobi. You are a bold one."
+    assert result["language"] == "en"
@@ -0,0 +1,69 @@
+import sqlite3
+import time
+
+import pytest
+
+from job_queue import JobQueue, QueueFull
+
+
+def test_jobs_are_claimed_once_in_submission_order(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.db")
+    first = queue.submit("https://youtu.be/aaaaaaaaaaa")
+    second = queue.submit("https://youtu.be/bbbbbbbbbbb")
+
+    assert queue.claim("w1")["id"] == first["id"]
+    assert queue.claim("w2")["id"] == second["id"]
+    assert queue.claim("w3") is None
+
+    assert queue.complete(first["id"], "w1", {"folder": "x"}, {"transcribe": 1.5})
+    job = queue.get(first["id"])
+    assert job["status"] == "done"
+    assert job["result"] == {"folder": "x"}
+    assert job["timings"] == {"transcribe": 1.5}
+
+
+def test_submit_rejects_when_full(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.db", max_pending=1)
+    queue.submit("https://youtu.be/aaaaaaaaaaa")
+
+    with pytest.raises(QueueFull):
+        queue.submit("https://youtu.be/bbbbbbbbbbb")
+
+
+def test_expired_lease_is_reclaimed_and_old_worker_cannot_finish(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.db", lease_seconds=0.05)
+    job = queue.submit("https://youtu.be/aaaaaaaaaaa")
+    queue.claim("dead-worker")
+
+    time.sleep(0.1)
+    reclaimed = queue.claim("w2")
+
+    assert reclaimed["id"] == job["id"]
+    assert reclaimed["attempts"] == 2
+    assert not queue.heartbeat(job["id"], "dead-worker")
+    assert not queue.complete(job["id"], "dead-worker", {})
+    assert queue.heartbeat(job["id"], "w2")
+
+
+def test_job_is_failed_after_max_attempts(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.db", lease_seconds=0.01, max_attempts=1)
+    job = queue.submit("https://youtu.be/aaaaaaaaaaa")
+    queue.claim("dead-worker")
+
+    time.sleep(0.05)
+
+    assert queue.claim("w2") is None
+    assert queue.get(job["id"])["status"] == "failed"
+
+
+def test_queue_leaves_wal_mode_for_shared_storage(tmp_path):
+    db_path = tmp_path / "jobs.db"
+    connection = sqlite3.connect(db_path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.close()
+
+    JobQueue(db_path).submit("https://youtu.be/aaaaaaaaaaa")
+
+    connection = sqlite3.connect(db_path)
+    assert connection.execute("PRAGMA journal_mode").fetchone() == ("delete",)
+    connection.close()
@@ -0,0 +1,48 @@
+import numpy as np
+
+from chunking import SAMPLE_RATE
+from language_detection import detect_language, sample_windows
+
+
+class _FakeModel:
+    dims = type("Dims", (), {"n_mels": 80})()
+    device = "cpu"
+
+    def __init__(self, probs):
+        self.probs = probs
+
+    def detect_language(self, mel):
+        assert len(mel) == len(self.probs)
+        return None, self.probs
+
+
+def _windows(count):
+    rng = np.random.default_rng(0)
+    return [
+        (i * 30.0, rng.uniform(-0.3, 0.3, 30 * SAMPLE_RATE).astype(np.float32))
+        for i in range(count)
+    ]
+
+
+def test_confident_windows_that_disagree_are_flagged_as_mixed():
+    model = _FakeModel([{"en": 0.95, "es": 0.05}, {"en": 0.35, "es": 0.65}])
+
+    detection = detect_language(model, _windows(2))
+
+    assert detection["language"] == "en"
+    assert detection["mixed"] and not detection["low_confidence"]
+    assert [w["language"] for w in detection["windows"]] == ["en", "es"]
+
+
+def test_silent_windows_are_skipped_and_low_confidence_is_flagged():
+    audio = np.zeros(120 * SAMPLE_RATE, dtype=np.float32)
+    audio[-30 * SAMPLE_RATE :] = _windows(1)[0][1]
+    windows = sample_windows(audio, 3)
+    model = _FakeModel([{"fr": 0.4, "en": 0.35, "de": 0.25}])
+
+    detection = detect_language(model, windows)
+
+    assert [start for start, _ in windows] == [0.0, 45.0, 90.0]
+    assert detection["windows"][0]["start"] == 90.0
+    assert detection["low_confidence"] and not detection["mixed"]
+    assert detect_language(model, windows[:1]) is None
@@ -0,0 +1,105 @@
+import pytest
+
+import main as main_module
+from model_policy import DEFAULT_RTF, ModelPolicy, ThroughputStats, models_up_to
+
+
+def record(model, rtf, recorded_at, overhead=0.0, source="whisper"):
+    return {
+        "model": model,
+        "realtime_factor": rtf,
+        "recorded_at": recorded_at,
+        "source": source,
+        "status": "done",
+        "timings": {"resolve": overhead, "download": 0.0, "save": 0.0},
+    }
+
+
+def test_stats_learn_median_rtf_and_scale_unmeasured_priors():
+    records = [
+        record("base", 0.9, "2024-01-01T00:00:01", overhead=4.0),
+        record("base", 0.3, "2024-01-01T00:00:02", overhead=2.0),
+        record("base", 0.3, "2024-01-01T00:00:03", overhead=6.0),
+        record("tiny", 5.0, "2024-01-01T00:00:04", source="captions"),
+        None,
+    ]
+
+    stats = ThroughputStats.from_metrics(records)
+
+    assert stats.realtime_factor("base") == 0.3
+    assert stats.overhead_seconds == 4.0
+    assert stats.measured("base") and not stats.measured("tiny")
+    # This host runs base at twice the default RTF, so small is assumed to
+    # be twice as slow as its default too
+    assert stats.realtime_factor("small") == pytest.approx(DEFAULT_RTF["small"] * 2)
+
+
+def test_choose_leans_to_smaller_models_for_short_videos():
+    stats = ThroughputStats({"tiny": 0.1, "base": 0.2, "small": 0.5}, 30.0)
+    policy = ModelPolicy(stats, ["tiny", "base", "small"], max_rtf=0.6)
+
+    assert policy.choose(3600) == "small"
+    assert policy.choose(120) == "base"
+    assert policy.choose(10) == "tiny"
+    assert ModelPolicy(stats, ["tiny", "base", "small"]).choose(10) == "small"
+
+
+def test_plan_downgrades_the_biggest_savings_to_meet_a_deadline():
+    stats = ThroughputStats({"tiny": 0.1, "base": 0.2, "small": 0.5})
+    policy = ModelPolicy(stats, ["tiny", "base", "small"])
+
+    models, expected, total = policy.plan([3600, 600], deadline_seconds=1200)
+
+    assert models == ["base", "small"]
+    assert expected == pytest.approx([720, 300])
+    assert total == pytest.approx(1020)
+    assert policy.plan([3600], deadline_seconds=60)[0] == ["tiny"]
+
+
+def test_plan_batch_skips_cached_videos(monkeypatch, tmp_path):
+    monkeypatch.setenv("TRANSCRIPTS_DIR", str(tmp_path))
+    monkeypatch.setenv("USE_GPU", "false")
+    monkeypatch.setenv("AUTO_MODELS", "tiny,base")
+    app = main_module.YouTubeTranscriptExtractor()
+    urls = [
+        "https://www.youtube.com/watch?v=aaaaaaaaaaa",
+        "https://www.youtube.com/watch?v=bbbbbbbbbbb",
+    ]
+    cached = ({}, {"id": "aaaaaaaaaaa", "title": "Old", "duration": 60}, "old")
+    monkeypatch.setattr(app.downloader, "expand_source", lambda source: urls)
+    monkeypatch.setattr(
+        app.downloader,
+        "resolve",
+        lambda url: {"id": "bbbbbbbbbbb", "title": "New", "duration": 3600},
+    )
+    monkeypatch.setattr(
+        app,
+        "_load_cached",
+        lambda video_id, any_model=False: (
+            cached if video_id == "aaaaaaaaaaa" else None
+        ),
+    )
+
+    plan = app.plan_batch("urls.txt", deadline_hours=0.1)
+
+    old, new = plan["videos"]
+    assert old["cached"] and old["model"] is None
+    assert new["model"] == "tiny" and not new["measured"]
+    assert plan["total_seconds"] == pytest.approx(DEFAULT_RTF["tiny"] * 3600)
+
+
+def test_deadline_never_raises_the_configured_model(monkeypatch, tmp_path):
+    monkeypatch.setenv("TRANSCRIPTS_DIR", str(tmp_path))
+    monkeypatch.setenv("USE_GPU", "false")
+    monkeypatch.setenv("WHISPER_MODEL", "base")
+    monkeypatch.setenv("AUTO_MODELS", "tiny,base,small,medium")
+    app = main_module.YouTubeTranscriptExtractor()
+    monkeypatch.setattr(app.downloader, "resolve", lambda url: {"duration": 60})
+    urls = ["https://www.youtube.com/watch?v=aaaaaaaaaaa"]
+
+    assert app._plan(urls, deadline_hours=24)["videos"][0]["model"] == "base"
+    assert app._plan(urls, deadline_hours=0.001)["videos"][0]["model"] == "tiny"
+    assert models_up_to(["tiny", "small"], "base-whisper-int8") == [
+        "tiny",
+        "base-whisper-int8",
+    ]
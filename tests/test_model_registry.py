@@ -0,0 +1,101 @@
+import threading
+import warnings
+
+import torch
+
+from model_registry import ModelRegistry, estimate_model_bytes
+
+
+class _FakeModel:
+    def __init__(self, name):
+        self.name = name
+
+
+def _loader(name, loads):
+    def load():
+        loads.append(name)
+        return _FakeModel(name)
+
+    return load
+
+
+def test_cached_models_are_not_reloaded():
+    registry = ModelRegistry(max_models=2)
+    loads = []
+
+    first = registry.get("tiny", _loader("tiny", loads))
+    second = registry.get("tiny", _loader("tiny", loads))
+
+    assert first is second
+    assert loads == ["tiny"]
+
+
+def test_least_recently_used_model_is_evicted():
+    registry = ModelRegistry(max_models=2)
+    loads = []
+
+    registry.get("tiny", _loader("tiny", loads))
+    registry.get("base", _loader("base", loads))
+    registry.get("tiny", _loader("tiny", loads))
+    registry.get("small", _loader("small", loads))
+
+    assert registry.keys() == ["tiny", "small"]
+    assert "base" not in registry
+
+
+def test_memory_budget_limits_loaded_models(monkeypatch):
+    monkeypatch.setattr(
+        "model_registry.estimate_model_bytes", lambda model: 600 * 1024 * 1024
+    )
+    registry = ModelRegistry(max_models=5, memory_budget_mb=1000)
+    loads = []
+
+    registry.get("small", _loader("small", loads))
+    registry.get("medium", _loader("medium", loads))
+
+    # Two 600 MB models do not fit a 1000 MB budget; the newest is kept
+    assert registry.keys() == ["medium"]
+
+
+def test_concurrent_requests_share_one_load():
+    registry = ModelRegistry()
+    loads = []
+
+    def slow_load():
+        loads.append("base")
+        return _FakeModel("base")
+
+    models = []
+    threads = [
+        threading.Thread(target=lambda: models.append(registry.get("base", slow_load)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loads == ["base"]
+    assert all(model is models[0] for model in models)
+
+
+def test_lock_for_returns_the_same_lock_per_key():
+    registry = ModelRegistry()
+
+    assert registry.lock_for("base") is registry.lock_for("base")
+    assert registry.lock_for("base") is not registry.lock_for("tiny")
+
+
+def test_quantized_weights_count_toward_the_model_size():
+    model = torch.nn.Sequential(torch.nn.Linear(256, 256), torch.nn.LayerNorm(256))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        quantized = torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+
+    # fp32: 256 x 256 weights, the bias and the LayerNorm's two vectors
+    assert estimate_model_bytes(model) == (256 * 256 + 3 * 256) * 4
+    # The packed int8 weights count, at a quarter of their fp32 size
+    size = estimate_model_bytes(quantized)
+    assert 256 * 256 + 3 * 256 * 4 <= size < estimate_model_bytes(model) / 2
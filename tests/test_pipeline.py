@@ -0,0 +1,129 @@
+import threading
+import time
+
+import pytest
+
+from pipeline import BatchPipeline
+
+
+def test_results_are_returned_in_input_order():
+    pipeline = BatchPipeline(
+        download=lambda url: url.upper(),
+        transcribe=lambda job: f"{job}!",
+        download_workers=3,
+        transcribe_workers=2,
+        max_pending=2,
+    )
+
+    results = pipeline.run(["a", "b", "c", "d"])
+
+    assert [result["result"] for result in results] == ["A!", "B!", "C!", "D!"]
+    assert all(result["error"] is None for result in results)
+
+
+def test_pending_downloads_never_exceed_limit():
+    lock = threading.Lock()
+    pending = {"now": 0, "peak": 0}
+
+    def download(item):
+        with lock:
+            pending["now"] += 1
+            pending["peak"] = max(pending["peak"], pending["now"])
+        return item
+
+    def transcribe(job):
+        time.sleep(0.01)
+        with lock:
+            pending["now"] -= 1
+        return job
+
+    pipeline = BatchPipeline(
+        download, transcribe, download_workers=4, transcribe_workers=1, max_pending=2
+    )
+    pipeline.run(range(10))
+
+    assert pending["peak"] <= 2
+
+
+def test_download_and_transcription_overlap():
+    def download(item):
+        time.sleep(0.05)
+        return item
+
+    def transcribe(job):
+        time.sleep(0.05)
+        return job
+
+    pipeline = BatchPipeline(download, transcribe, download_workers=1, max_pending=2)
+
+    started = time.perf_counter()
+    pipeline.run(range(6))
+    elapsed = time.perf_counter() - started
+
+    # Sequential processing would take 6 * (0.05 + 0.05) = 0.6 s
+    assert elapsed < 0.5
+
+
+def test_failures_are_reported_per_item():
+    def download(item):
+        if item == "bad":
+            raise RuntimeError("unavailable")
+        return item
+
+    events = []
+    pipeline = BatchPipeline(
+        download,
+        lambda job: job,
+        on_event=lambda event, index, item, detail: events.append((event, item)),
+    )
+
+    results = pipeline.run(["good", "bad", "good"])
+
+    assert isinstance(results[1]["error"], RuntimeError)
+    assert results[0]["result"] == "good" and results[2]["result"] == "good"
+    assert ("failed", "bad") in events
+
+
+def test_waiting_jobs_are_transcribed_as_one_batch():
+    first_started = threading.Event()
+    all_downloaded = threading.Event()
+    downloaded = []
+    batches = []
+
+    def download(item):
+        if item != "a":
+            first_started.wait(1)
+        downloaded.append(item)
+        if len(downloaded) == 4:
+            all_downloaded.set()
+        return item
+
+    def transcribe(job):
+        batches.append([job])
+        first_started.set()
+        all_downloaded.wait(1)
+        time.sleep(0.05)
+        return job
+
+    def transcribe_batch(jobs):
+        batches.append(jobs)
+        return [RuntimeError("bad") if job == "c" else job for job in jobs]
+
+    pipeline = BatchPipeline(
+        download,
+        transcribe,
+        download_workers=1,
+        max_pending=4,
+        transcribe_batch=transcribe_batch,
+        batch_size=4,
+    )
+    results = pipeline.run(["a", "b", "c", "d"])
+
+    assert batches == [["a"], ["b", "c", "d"]]
+    assert [result["result"] for result in results] == ["a", "b", None, "d"]
+    assert isinstance(results[2]["error"], RuntimeError)
+
+
+def test_invalid_worker_counts_are_rejected():
+    with pytest.raises(ValueError):
+        BatchPipeline(lambda item: item, lambda job: job, max_pending=0)
@@ -0,0 +1,228 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pytest
+
+import main as main_module
+import transcriber as transcriber_module
+from job_queue import JobQueue
+from server import make_server
+from worker import Worker
+
+VIDEO_URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+
+class _DummyModel:
+    def transcribe(self, *args, **kwargs):
+        return {
+            "text": " Hello world",
+            "segments": [{"start": 0.0, "end": 2.0, "text": " Hello world"}],
+            "language": "en",
+        }
+
+
+@pytest.fixture
+def app(monkeypatch, tmp_path):
+    monkeypatch.setenv("TRANSCRIPTS_DIR", str(tmp_path / "transcripts"))
+    monkeypatch.setenv("TEMP_DIR", str(tmp_path))
+    monkeypatch.setenv("USE_GPU", "false")
+    monkeypatch.setattr(
+        transcriber_module.whisper, "load_model", lambda *args, **kwargs: _DummyModel()
+    )
+    monkeypatch.setattr(
+        transcriber_module.whisper,
+        "load_audio",
+        lambda path: np.zeros(16000, dtype=np.float32),
+    )
+    app = main_module.YouTubeTranscriptExtractor()
+
+    info = {"id": "dQw4w9WgXcQ", "title": "Test video", "duration": 2}
+    audio_file = tmp_path / "audio.webm"
+
+    def download_audio(url, info=None, keep_audio=None):
+        audio_file.write_bytes(b"audio")
+        return str(audio_file), "Test video", info
+
+    monkeypatch.setattr(app.downloader, "resolve", lambda url: info)
+    monkeypatch.setattr(app.downloader, "download_audio", download_audio)
+    return app
+
+
+def _request(base, path, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(
+        base + path, data=data, method="POST" if data else "GET"
+    )
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.load(response), response.headers
+    except urllib.error.HTTPError as error:
+        return error.code, json.load(error), error.headers
+
+
+def test_submit_poll_and_fetch_transcript(app, tmp_path):
+    queue = JobQueue(tmp_path / "jobs.db", max_pending=1)
+    server = make_server(
+        queue,
+        port=0,
+        is_valid_url=app.is_youtube_url,
+        render_metrics=main_module.metrics_renderer(),
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        status, job, _ = _request(base, "/jobs", {"url": VIDEO_URL})
+        assert status == 202
+        assert job["status"] == "queued"
+
+        status, body, headers = _request(base, "/jobs", {"url": VIDEO_URL})
+        assert status == 429
+        assert headers["Retry-After"]
+
+        assert _request(base, "/jobs", {"url": "not a url"})[0] == 400
+        assert _request(base, f"/jobs/{job['id']}/transcript")[0] == 409
+
+        assert Worker(queue, app.run_job).run_once()
+
+        status, job, _ = _request(base, f"/jobs/{job['id']}")
+        assert status == 200
+        assert job["status"] == "done"
+        assert job["result"]["video_id"] == "dQw4w9WgXcQ"
+        assert {
+            "resolve",
+            "download",
+            "transcribe",
+            "model_load",
+            "decode",
+            "inference",
+            "save",
+            "total",
+        } <= set(job["timings"])
+
+        status, transcript, _ = _request(base, f"/jobs/{job['id']}/transcript")
+        assert status == 200
+        assert transcript["transcript"]["full_text"] == "Hello world"
+
+        status, health, _ = _request(base, "/health")
+        assert health["jobs"]["done"] == 1
+
+        with urllib.request.urlopen(base + "/metrics") as response:
+            exposition = response.read().decode()
+        assert 'yte_jobs_total{source="whisper",status="done"} 1' in exposition
+        assert 'yte_stage_seconds_count{stage="inference"} 1' in exposition
+        assert 'yte_realtime_factor_bucket{model="base",le="+Inf"} 1' in exposition
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_worker_records_failures(app, tmp_path, monkeypatch):
+    def broken(url):
+        raise RuntimeError("video unavailable")
+
+    monkeypatch.setattr(app.downloader, "resolve", broken)
+    queue = JobQueue(tmp_path / "jobs.db")
+    job = queue.submit(VIDEO_URL, refresh=True)
+
+    Worker(queue, app.run_job).run_once()
+
+    job = queue.get(job["id"])
+    assert job["status"] == "failed"
+    assert job["error"] == "video unavailable"
+
+
+def test_metrics_are_saved_with_the_transcript(app, tmp_path):
+    job = app.transcribe_url(VIDEO_URL)
+
+    with open(f"{job['folder']}/metadata.json", encoding="utf-8") as f:
+        metrics = json.load(f)["metrics"]
+    assert metrics["model"] == "base"
+    assert metrics["audio_seconds"] == 2
+    assert metrics["downloaded_bytes"] == len(b"audio")
+    assert metrics["realtime_factor"] > 0
+    assert metrics["peak_rss_bytes"] > 0
+
+    log = (tmp_path / "transcripts" / "metrics.jsonl").read_text().splitlines()
+    assert json.loads(log[-1])["timings"]["save"] >= 0
+
+
+def test_realtime_factor_excludes_waiting_for_the_model(app):
+    lock = app.transcriber.registry.lock_for(app.transcriber.model_key)
+    lock.acquire()
+    threading.Timer(0.5, lock.release).start()
+
+    metrics = app.transcribe_url(VIDEO_URL, refresh=True)["metrics"]
+
+    assert metrics["timings"]["lock_wait"] >= 0.4
+    assert metrics["realtime_factor"] < 0.1
+
+
+def test_transcribe_workers_are_capped_at_one(app, monkeypatch):
+    monkeypatch.setenv("TRANSCRIBE_WORKERS", "4")
+
+    assert main_module.YouTubeTranscriptExtractor().transcribe_workers == 1
+
+
+def test_checkpoints_are_not_resumed_across_output_settings(app, monkeypatch):
+    keys = {app._checkpoint("dQw4w9WgXcQ", app.transcriber).settings_key}
+    for name, value in (("VAD", "true"), ("DECODE_BATCH_SIZE", "4")):
+        monkeypatch.setenv(name, value)
+        transcriber = transcriber_module.WhisperTranscriber("base")
+        keys.add(app._checkpoint("dQw4w9WgXcQ", transcriber).settings_key)
+
+    assert len(keys) == 3
+
+
+def test_queued_short_videos_are_decoded_in_one_batch(app, monkeypatch, tmp_path):
+    ids = ["aaaaaaaaaaa", "bbbbbbbbbbb", "ccccccccccc", "ddddddddddd"]
+    first_decode = threading.Event()
+    all_downloaded = threading.Event()
+    downloaded = []
+    calls = []
+
+    def download_audio(url, info=None, keep_audio=None):
+        if info["id"] != ids[0]:
+            first_decode.wait(5)
+        audio_file = tmp_path / f"{info['id']}.webm"
+        audio_file.write_bytes(b"audio")
+        downloaded.append(info["id"])
+        if len(downloaded) == len(ids):
+            all_downloaded.set()
+        return str(audio_file), info["title"], info
+
+    def decode_batched(model, audios, batch_size, language=None, fp16=False):
+        calls.append(len(audios))
+        if not first_decode.is_set():
+            # Hold the first video until the others are queued behind it
+            first_decode.set()
+            all_downloaded.wait(5)
+            time.sleep(0.1)
+        segment = {"start": 0.0, "end": 2.0, "text": " Hello"}
+        return [
+            {"text": " Hello", "segments": [segment], "language": "en"} for _ in audios
+        ]
+
+    monkeypatch.setattr(
+        app.downloader,
+        "resolve",
+        lambda url: {"id": url[-11:], "title": url[-11:], "duration": 2},
+    )
+    monkeypatch.setattr(app.downloader, "download_audio", download_audio)
+    monkeypatch.setattr(transcriber_module, "decode_batched", decode_batched)
+    monkeypatch.setattr(app.transcriber, "decode_batch_size", 4)
+    app.max_pending_audio = 4
+
+    results = app._run_batch([f"https://youtu.be/{video_id}" for video_id in ids])
+
+    assert calls == [1, 3]
+    assert all(result["error"] is None for result in results)
+    for result in results:
+        with open(f"{result['result']}/metadata.json", encoding="utf-8") as f:
+            metrics = json.load(f)["metrics"]
+        assert {"decode", "inference", "transcribe"} <= set(metrics["timings"])
+        assert metrics["realtime_factor"] > 0
+    assert not list(tmp_path.glob("*.webm"))
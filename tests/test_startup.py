@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP_SCRIPT = """
+import sys
+import main
+
+assert main.missing_dependencies() == []
+app = main.YouTubeTranscriptExtractor()
+app.list_transcripts()
+loaded = [
+    name
+    for name, marker in (
+        ("torch", "torch._C"),
+        ("whisper", "whisper.model"),
+        ("yt_dlp", "yt_dlp.YoutubeDL"),
+    )
+    if marker in sys.modules
+]
+print("LOADED=" + ",".join(loaded))
+"""
+
+
+def test_startup_does_not_import_heavy_dependencies(tmp_path):
+    env = dict(
+        os.environ,
+        TRANSCRIPTS_DIR=str(tmp_path),
+        PRELOAD_MODEL="false",
+        TERM="dumb",
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", STARTUP_SCRIPT],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert "LOADED=\n" in completed.stdout
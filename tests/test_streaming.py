@@ -0,0 +1,126 @@
+import io
+import sys
+import threading
+
+import numpy as np
+
+from chunking import SAMPLE_RATE
+import streaming
+from streaming import PcmFileReader, PcmRingBuffer, StreamingTranscriber, pump
+
+
+def _fake_transcribe_window(samples, initial_prompt=None):
+    """Emit one 4 s segment per 4 s of audio, named after its absolute second.
+
+    The test audio stores its absolute second in every sample, so the text
+    shows whether timestamps were shifted correctly.
+    """
+    segments = []
+    for start in range(0, len(samples) // SAMPLE_RATE - 3, 4):
+        absolute = int(samples[start * SAMPLE_RATE])
+        segments.append({"start": start, "end": start + 4, "text": f" s{absolute}"})
+    return {"segments": segments, "language": "en"}
+
+
+def _labelled_audio(seconds):
+    return np.repeat(np.arange(seconds, dtype=np.float32), SAMPLE_RATE)
+
+
+def test_ring_buffer_wraps_and_preserves_order():
+    ring = PcmRingBuffer(8)
+    ring.write(np.arange(6, dtype=np.float32))
+    ring.consume(4)
+    ring.write(np.arange(6, 12, dtype=np.float32))
+    ring.close()
+
+    samples, finished = ring.peek(8)
+
+    assert samples.tolist() == [4, 5, 6, 7, 8, 9, 10, 11]
+    assert finished
+
+
+def test_ring_buffer_blocks_writer_when_full():
+    ring = PcmRingBuffer(4)
+    writer = threading.Thread(
+        target=ring.write, args=(np.arange(10, dtype=np.float32),), daemon=True
+    )
+    writer.start()
+    writer.join(timeout=0.1)
+    assert writer.is_alive()
+
+    received = []
+    while len(received) < 10:
+        samples, _ = ring.peek(min(4, 10 - len(received)))
+        received.extend(samples.tolist())
+        ring.consume(len(samples))
+    writer.join(timeout=1)
+
+    assert received == list(range(10))
+    assert not writer.is_alive()
+
+
+def test_pump_copies_float32_stream_into_ring():
+    audio = np.linspace(-1, 1, 1000, dtype=np.float32)
+    ring = PcmRingBuffer(2000)
+
+    pump(io.BytesIO(audio.tobytes()), ring)
+
+    samples, finished = ring.peek(2000)
+    assert finished
+    np.testing.assert_array_equal(samples, audio)
+
+
+def test_streamed_segments_have_absolute_times_without_duplicates():
+    audio = _labelled_audio(100)
+    ring = PcmRingBuffer(60 * SAMPLE_RATE)
+    producer = threading.Thread(target=pump, args=(io.BytesIO(audio.tobytes()), ring))
+    producer.start()
+
+    emitted = []
+    streamer = StreamingTranscriber(
+        _fake_transcribe_window, window_seconds=30, overlap_seconds=5
+    )
+    result = streamer.run(ring, on_segment=emitted.append)
+    producer.join()
+
+    texts = [segment["text"] for segment in result["segments"]]
+    assert texts == [f" s{second}" for second in range(0, 100, 4)]
+    assert [segment["start"] for segment in result["segments"]] == list(
+        range(0, 100, 4)
+    )
+    assert emitted == result["segments"]
+    assert result["language"] == "en"
+
+
+def test_pcm_file_reader_windows_match_in_memory_result(tmp_path):
+    audio = _labelled_audio(100)
+    pcm_path = tmp_path / "audio.f32"
+    audio.tofile(pcm_path)
+
+    reader = PcmFileReader(pcm_path)
+    window, finished = reader.peek(30 * SAMPLE_RATE)
+    assert len(reader) == len(audio)
+    assert window[-1] == 29 and not finished
+
+    streamer = StreamingTranscriber(
+        _fake_transcribe_window, window_seconds=30, overlap_seconds=5
+    )
+    result = streamer.run(reader)
+
+    texts = [segment["text"] for segment in result["segments"]]
+    assert texts == [f" s{second}" for second in range(0, 100, 4)]
+
+
+def test_chatty_decoder_does_not_block_on_its_log(monkeypatch):
+    # A decoder logging far more than a pipe buffer before its audio
+    script = (
+        "import sys; sys.stderr.write('reconnecting\\n' * 100000); "
+        "sys.stdout.buffer.write(bytes(4 * 16000 * 8))"
+    )
+    monkeypatch.setattr(
+        streaming, "_decoder_command", lambda *args: [sys.executable, "-c", script]
+    )
+
+    result = streaming.transcribe_stream("stream", _fake_transcribe_window)
+
+    assert result["segments"]
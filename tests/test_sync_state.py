@@ -0,0 +1,50 @@
+import main as main_module
+from sync_state import SyncState
+
+CHANNEL = "https://www.youtube.com/@example"
+
+
+def test_advance_keeps_newest_ids_first_and_latest_date(tmp_path):
+    state = SyncState(tmp_path / "sync_state.json")
+    state.advance(CHANNEL, [("bbbbbbbbbbb", "20240102"), ("aaaaaaaaaaa", None)])
+
+    watermark = state.advance(
+        CHANNEL, [("ccccccccccc", None)], failed_ids=["ddddddddddd"]
+    )
+
+    assert watermark["seen_ids"] == ["ccccccccccc", "bbbbbbbbbbb", "aaaaaaaaaaa"]
+    assert watermark["last_upload_date"] == "20240102"
+    assert SyncState(tmp_path / "sync_state.json").get(CHANNEL)["retry_ids"] == [
+        "ddddddddddd"
+    ]
+
+
+def test_sync_transcribes_new_uploads_and_retries_failures(monkeypatch, tmp_path):
+    monkeypatch.setenv("TRANSCRIPTS_DIR", str(tmp_path))
+    monkeypatch.setenv("USE_GPU", "false")
+    app = main_module.YouTubeTranscriptExtractor()
+    listings = [
+        [("new2", "u2", None), ("new1", "u1", None)],
+        [],
+    ]
+    calls = []
+
+    def list_new_videos(source, known_ids, since=None, stop_after=5):
+        calls.append(sorted(known_ids))
+        return listings.pop(0)
+
+    def run_batch(urls, refresh=False):
+        calls.append(urls)
+        return [
+            {"item": url, "result": None, "error": "boom" if url == "u1" else None}
+            for url in urls
+        ]
+
+    monkeypatch.setattr(app.downloader, "list_new_videos", list_new_videos)
+    monkeypatch.setattr(app, "_run_batch", run_batch)
+
+    app.sync([CHANNEL])
+    app.sync([CHANNEL])
+
+    retry_url = "https://www.youtube.com/watch?v=new1"
+    assert calls == [[], ["u1", "u2"], ["new2"], [retry_url]]
@@ -1,4 +1,12 @@
+import os
+import threading
+
+import numpy as np
+
 import transcriber as transcriber_module
+from audio_cache import AudioCache
+from chunking import SAMPLE_RATE
+from model_registry import ModelRegistry
 
 
 class _DummyModel:
@@ -19,7 +27,7 @@ def _make_transcriber(monkeypatch):
     monkeypatch.setattr(
         transcriber_module.whisper, "load_model", lambda *args, **kwargs: dummy_model
     )
-    return transcriber_module.WhisperTranscriber("base")
+    return transcriber_module.WhisperTranscriber("base", registry=ModelRegistry())
 
 
 def test_format_transcript_with_timestamps(monkeypatch):
@@ -28,8 +36,9 @@ def test_format_transcript_with_timestamps(monkeypatch):
     result = transcriber.model.transcribe(None)
     formatted = transcriber.format_transcript(result, include_timestamps=True)
 
-    assert formatted["segments"]
-    assert formatted["segments"][0].startswith("[")
+    first = formatted["segments"][0]
+    assert (first.start, first.end, first.text) == (0.0, 5.0, "Hello")
+    assert first.timestamped() == "[00:00 - 00:05] Hello"
 
 
 def test_format_transcript_without_timestamps(monkeypatch):
@@ -39,3 +48,223 @@ def test_format_transcript_without_timestamps(monkeypatch):
     formatted = transcriber.format_transcript(result, include_timestamps=False)
 
     assert formatted["segments"] == []
+
+
+def test_model_loads_on_first_use(monkeypatch):
+    loads = []
+    monkeypatch.setenv("USE_GPU", "false")
+    monkeypatch.setattr(
+        transcriber_module.whisper,
+        "load_model",
+        lambda *args, **kwargs: loads.append(args) or _DummyModel(),
+    )
+
+    transcriber = transcriber_module.WhisperTranscriber(
+        "base", registry=ModelRegistry()
+    )
+    assert not transcriber.is_loaded
+    assert loads == []
+
+    transcriber.warm_up().join()
+    transcriber.transcribe("audio.webm")
+
+    assert transcriber.is_loaded
+    assert loads == [("base",)]
+
+
+def test_transcribers_share_registry_models(monkeypatch):
+    loads = []
+    monkeypatch.setenv("USE_GPU", "false")
+    monkeypatch.setattr(
+        transcriber_module.whisper,
+        "load_model",
+        lambda size, **kwargs: loads.append(size) or _DummyModel(),
+    )
+    registry = ModelRegistry(max_models=2)
+
+    for size in ("tiny", "medium", "tiny", "medium"):
+        transcriber_module.WhisperTranscriber(size, registry=registry).model
+
+    assert loads == ["tiny", "medium"]
+
+
+def test_waiting_for_a_shared_model_is_not_inference_time(monkeypatch):
+    transcriber = _make_transcriber(monkeypatch)
+    lock = transcriber.registry.lock_for(transcriber.model_key)
+    lock.acquire()
+    threading.Timer(0.3, lock.release).start()
+    timings = {}
+
+    transcriber.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32), timings)
+
+    assert timings["lock_wait"] >= 0.25
+    assert timings["inference"] < 0.25
+
+
+def test_pcm_file_is_transcribed_in_bounded_windows(monkeypatch, tmp_path):
+    windows = []
+
+    class _WindowModel(_DummyModel):
+        def transcribe(self, audio, **kwargs):
+            windows.append(len(audio))
+            return super().transcribe(audio, **kwargs)
+
+    monkeypatch.setenv("USE_GPU", "false")
+    monkeypatch.setattr(
+        transcriber_module.whisper, "load_model", lambda *args, **kwargs: _WindowModel()
+    )
+    pcm_path = tmp_path / "audio.f32"
+    np.zeros(70 * SAMPLE_RATE, dtype=np.float32).tofile(pcm_path)
+
+    transcriber = transcriber_module.WhisperTranscriber(
+        "base", registry=ModelRegistry()
+    )
+    result = transcriber.transcribe(str(pcm_path))
+
+    assert windows and max(windows) <= 30 * SAMPLE_RATE
+    assert result["segments"][0]["text"] == "Hello"
+
+
+def test_low_memory_pcm_is_kept_out_of_the_audio_cache(monkeypatch, tmp_path):
+    cache = AudioCache(tmp_path / "cache", max_bytes=1)
+
+    def download(directory):
+        path = tmp_path / "download.webm"
+        path.write_bytes(b"audio")
+        return path
+
+    audio, _ = cache.fetch("abc", "native", download)
+    decoded = []
+
+    def decode_to_pcm_file(source, pcm_path, headers=None):
+        np.zeros(10 * SAMPLE_RATE, dtype=np.float32).tofile(pcm_path)
+        decoded.append(pcm_path)
+        # While the PCM exists the cache still sees only its own entry
+        assert cache.fetch("abc", "native", download) == (audio, True)
+        assert [str(entry[0]) for entry in cache.entries()] == [audio]
+        return pcm_path
+
+    monkeypatch.setenv("LOW_MEMORY_AUDIO", "true")
+    monkeypatch.setenv("TEMP_DIR", str(tmp_path))
+    monkeypatch.setattr(transcriber_module, "decode_to_pcm_file", decode_to_pcm_file)
+
+    result = _make_transcriber(monkeypatch).transcribe(audio)
+
+    assert result["segments"][0]["text"] == "Hello"
+    assert os.path.dirname(decoded[0]) == str(tmp_path)
+    assert not os.path.exists(decoded[0]) and os.path.exists(audio)
+
+
+def test_vad_skips_silence_and_restores_timestamps(monkeypatch):
+    heard = []
+
+    class _SpeechModel:
+        def transcribe(self, audio, **kwargs):
+            heard.append(len(audio))
+            return {
+                "text": " Hello",
+                "segments": [{"start": 0.5, "end": 2.0, "text": " Hello"}],
+                "language": "en",
+            }
+
+    monkeypatch.setenv("USE_GPU", "false")
+    monkeypatch.setenv("VAD", "true")
+    monkeypatch.setattr(
+        transcriber_module.whisper, "load_model", lambda *args, **kwargs: _SpeechModel()
+    )
+    audio = np.zeros(60 * SAMPLE_RATE, dtype=np.float32)
+    rng = np.random.default_rng(0)
+    audio[40 * SAMPLE_RATE : 45 * SAMPLE_RATE] = rng.uniform(-0.3, 0.3, 5 * SAMPLE_RATE)
+
+    transcriber = transcriber_module.WhisperTranscriber(
+        "base", registry=ModelRegistry()
+    )
+    timings = {}
+    result = transcriber.transcribe(audio, timings=timings)
+
+    assert heard[0] < 6 * SAMPLE_RATE
+    assert abs(result["segments"][0]["start"] - 40.2) < 0.1
+    assert "vad" in timings
+
+
+def test_detected_language_is_pinned_for_transcription(monkeypatch):
+    languages = []
+
+    class _GermanModel:
+        dims = type("Dims", (), {"n_mels": 80})()
+        device = "cpu"
+
+        def detect_language(self, mel):
+            return None, [{"de": 0.9, "en": 0.1} for _ in range(len(mel))]
+
+        def transcribe(self, audio, **kwargs):
+            languages.append(kwargs["language"])
+            return {"text": " Hallo", "segments": [], "language": "de"}
+
+    monkeypatch.setenv("USE_GPU", "false")
+    monkeypatch.setenv("DETECT_LANGUAGE", "true")
+    monkeypatch.setattr(
+        transcriber_module.whisper, "load_model", lambda *args, **kwargs: _GermanModel()
+    )
+    rng = np.random.default_rng(0)
+    audio = rng.uniform(-0.3, 0.3, 90 * SAMPLE_RATE).astype(np.float32)
+
+    transcriber = transcriber_module.WhisperTranscriber(
+        "base", registry=ModelRegistry()
+    )
+    timings = {}
+    result = transcriber.transcribe(audio, timings=timings)
+    formatted = transcriber.format_transcript(result)
+
+    assert languages == ["de"]
+    assert "language" in timings
+    assert formatted["language_detection"]["confidence"] == 0.9
+    assert len(formatted["language_detection"]["windows"]) == 3
+
+
+def test_batched_audios_get_vad_and_language_detection(monkeypatch):
+    calls = []
+
+    class _GermanModel:
+        dims = type("Dims", (), {"n_mels": 80})()
+        device = "cpu"
+
+        def detect_language(self, mel):
+            return None, [{"de": 0.9, "en": 0.1} for _ in range(len(mel))]
+
+    def decode_batched(model, audios, batch_size, language=None, fp16=False):
+        calls.append(([len(audio) for audio in audios], language))
+        segment = {"start": 0.5, "end": 2.0, "text": " Hallo"}
+        return [
+            {"text": " Hallo", "segments": [segment], "language": "de"} for _ in audios
+        ]
+
+    monkeypatch.setenv("USE_GPU", "false")
+    monkeypatch.setenv("VAD", "true")
+    monkeypatch.setenv("DETECT_LANGUAGE", "true")
+    monkeypatch.setenv("DECODE_BATCH_SIZE", "4")
+    monkeypatch.setattr(
+        transcriber_module.whisper, "load_model", lambda *args, **kwargs: _GermanModel()
+    )
+    monkeypatch.setattr(transcriber_module, "decode_batched", decode_batched)
+    speech = np.zeros(60 * SAMPLE_RATE, dtype=np.float32)
+    rng = np.random.default_rng(0)
+    speech[40 * SAMPLE_RATE : 45 * SAMPLE_RATE] = rng.uniform(
+        -0.3, 0.3, 5 * SAMPLE_RATE
+    )
+    silence = np.zeros(60 * SAMPLE_RATE, dtype=np.float32)
+
+    transcriber = transcriber_module.WhisperTranscriber(
+        "base", registry=ModelRegistry()
+    )
+    timings = [{}, {}, {}]
+    results = transcriber.transcribe_many([speech, silence, speech.copy()], timings)
+
+    [(lengths, language)] = calls
+    assert language == "de"
+    assert len(lengths) == 2 and max(lengths) < 6 * SAMPLE_RATE
+    assert abs(results[0]["segments"][0]["start"] - 40.2) < 0.1
+    assert results[1]["segments"] == []
+    assert results[2]["language_detection"]["confidence"] == 0.9
+    assert {"vad", "language", "inference"} <= set(timings[0])
+    assert "inference" not in timings[1]
@@ -1,5 +1,8 @@
 import json
-from transcript_manager import TranscriptManager
+import multiprocessing
+
+import main as main_module
+from transcript_manager import TranscriptManager, make_cache_key
 
 
 def _video_info(title="Example Video"):
@@ -29,8 +32,7 @@ def test_save_transcript_generates_unique_metadata(tmp_path):
         _video_info("Second"), _transcript(), "https://youtu.be/second"
     )
 
-    with open(manager.metadata_file, "r", encoding="utf-8") as handle:
-        stored_metadata = json.load(handle)
+    stored_metadata = TranscriptManager(output_dir=tmp_path).metadata
 
     assert len(stored_metadata) == 2
 
@@ -53,7 +55,238 @@ def test_load_metadata_recovers_from_corrupted_file(tmp_path):
     manager.save_transcript(_video_info(), _transcript(), "https://youtu.be/example")
     assert manager.metadata_file.exists()
 
-    with open(manager.metadata_file, "r", encoding="utf-8") as handle:
-        stored_metadata = json.load(handle)
+    stored_metadata = TranscriptManager(output_dir=tmp_path).metadata
 
     assert len(stored_metadata) == 1
+
+
+def test_legacy_metadata_is_migrated_to_journal(tmp_path):
+    legacy = {
+        "20240101_000000_abcd1234": {
+            "title": "Old",
+            "url": "https://youtu.be/old",
+            "folder": "20240101_000000_abcd1234_Old",
+            "txt_file": "transcript.txt",
+            "transcribed_at": "2024-01-01T00:00:00",
+        }
+    }
+    (tmp_path / "metadata.json").write_text(json.dumps(legacy), encoding="utf-8")
+
+    manager = TranscriptManager(output_dir=tmp_path)
+
+    assert manager.metadata == legacy
+    assert not (tmp_path / "metadata.json").exists()
+    assert (tmp_path / "metadata.json.migrated").exists()
+    assert TranscriptManager(output_dir=tmp_path).metadata == legacy
+
+
+def test_save_appends_a_single_journal_record(tmp_path):
+    manager = TranscriptManager(output_dir=tmp_path)
+    manager.save_transcript(_video_info("First"), _transcript(), "first")
+    size_after_first = manager.metadata_file.stat().st_size
+
+    manager.save_transcript(_video_info("Second"), _transcript(), "second")
+
+    lines = manager.metadata_file.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 2
+    # The first record is untouched by the second save
+    assert manager.metadata_file.stat().st_size > size_after_first
+    assert json.loads(lines[0])["entry"]["title"] == "First"
+
+
+def test_torn_journal_record_is_skipped(tmp_path):
+    manager = TranscriptManager(output_dir=tmp_path)
+    manager.save_transcript(_video_info("Kept"), _transcript(), "kept")
+    with open(manager.metadata_file, "a", encoding="utf-8") as handle:
+        handle.write('{"op": "put", "key": "partial", "ent')
+
+    reloaded = TranscriptManager(output_dir=tmp_path)
+
+    assert [entry["title"] for entry in reloaded.metadata.values()] == ["Kept"]
+
+
+def test_journal_is_compacted(tmp_path, monkeypatch):
+    monkeypatch.setattr(TranscriptManager, "COMPACT_MIN_RECORDS", 4)
+    monkeypatch.setenv("TRANSCRIPT_CACHE_MAX_ENTRIES", "1")
+    manager = TranscriptManager(output_dir=tmp_path)
+
+    for video_id in "abcdef":
+        cache_key = make_cache_key(video_id, "base", "en", True)
+        manager.save_transcript(
+            _video_info(video_id), _transcript(), video_id, cache_key=cache_key
+        )
+
+    lines = manager.metadata_file.read_text(encoding="utf-8").splitlines()
+    assert len(lines) <= 4
+    reloaded = TranscriptManager(output_dir=tmp_path)
+    assert [entry["title"] for entry in reloaded.metadata.values()] == ["f"]
+
+
+def test_cached_transcript_is_returned_and_replaced(tmp_path):
+    manager = TranscriptManager(output_dir=tmp_path)
+    cache_key = make_cache_key("dQw4w9WgXcQ", "base", "en", True)
+
+    assert manager.get_cached_transcript(cache_key) is None
+
+    _, _, first_folder = manager.save_transcript(
+        _video_info(), _transcript(), "https://youtu.be/example", cache_key=cache_key
+    )
+    transcript, video_info, folder = manager.get_cached_transcript(cache_key)
+    assert transcript["full_text"] == "Hello world"
+    assert video_info["title"] == "Example Video"
+    assert folder == first_folder
+
+    # Saving the same key again replaces the earlier folder instead of
+    # accumulating duplicates
+    _, _, second_folder = manager.save_transcript(
+        _video_info(), _transcript(), "https://youtu.be/example", cache_key=cache_key
+    )
+    assert not first_folder.exists()
+    assert len(manager.metadata) == 1
+    assert manager.get_cached_transcript(cache_key)[2] == second_folder
+
+
+def test_cache_key_depends_on_transcription_settings():
+    base = make_cache_key("dQw4w9WgXcQ", "base", "en", True)
+
+    assert base == make_cache_key("dQw4w9WgXcQ", "base", "en", True)
+    assert base != make_cache_key("dQw4w9WgXcQ", "tiny", "en", True)
+    assert base != make_cache_key("dQw4w9WgXcQ", "base", None, True)
+    assert base != make_cache_key("dQw4w9WgXcQ", "base", "en", False)
+
+
+def test_cache_evicts_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setenv("TRANSCRIPT_CACHE_MAX_ENTRIES", "2")
+    manager = TranscriptManager(output_dir=tmp_path)
+    keys = [make_cache_key(video_id, "base", "en", True) for video_id in "abc"]
+
+    manager.save_transcript(_video_info("A"), _transcript(), "a", cache_key=keys[0])
+    manager.save_transcript(_video_info("B"), _transcript(), "b", cache_key=keys[1])
+    # Touch A so that B becomes the least recently used entry
+    manager.get_cached_transcript(keys[0])
+    manager.save_transcript(_video_info("C"), _transcript(), "c", cache_key=keys[2])
+
+    assert manager.get_cached_transcript(keys[0]) is not None
+    assert manager.get_cached_transcript(keys[1]) is None
+    assert manager.get_cached_transcript(keys[2]) is not None
+    assert len(list(p for p in tmp_path.iterdir() if p.is_dir())) == 2
+
+
+def test_saved_transcripts_are_searchable(tmp_path):
+    manager = TranscriptManager(output_dir=tmp_path)
+    manager.save_transcript(
+        _video_info("Cooking Show"),
+        {
+            "full_text": "Add the flour. Whisk the eggs.",
+            "segments": [
+                "[00:00 - 00:05] Add the flour.",
+                "[01:10 - 01:15] Whisk the eggs.",
+            ],
+            "language": "en",
+        },
+        "https://youtu.be/cooking",
+    )
+    manager.save_transcript(_video_info("Other"), _transcript(), "other")
+
+    hits = manager.search("eggs")
+
+    assert len(hits) == 1
+    assert hits[0]["title"] == "Cooking Show"
+    assert hits[0]["timestamp"] == "01:10"
+    assert "[eggs]" in hits[0]["snippet"]
+    # Unbalanced quotes are searched as a phrase instead of raising
+    assert manager.search('the "flour')[0]["timestamp"] == "00:00"
+
+
+def test_search_index_follows_removals_and_rebuilds(tmp_path):
+    manager = TranscriptManager(output_dir=tmp_path)
+    cache_key = make_cache_key("a", "base", "en", True)
+    manager.save_transcript(_video_info(), _transcript(), "a", cache_key=cache_key)
+    manager.save_transcript(_video_info(), _transcript(), "a", cache_key=cache_key)
+
+    assert len(manager.search("hello")) == 1
+
+    manager.search_index.db_path.unlink()
+    manager.search_index = type(manager.search_index)(manager.search_index.db_path)
+    assert manager.search("hello") == []
+
+    assert manager.rebuild_search_index() == 1
+    assert len(manager.search("hello")) == 1
+
+
+def test_transcript_source_is_recorded(tmp_path):
+    manager = TranscriptManager(output_dir=tmp_path)
+
+    _, _, folder = manager.save_transcript(
+        _video_info(), _transcript(), "https://youtu.be/example", source="captions"
+    )
+
+    with open(folder / "metadata.json", "r", encoding="utf-8") as handle:
+        assert json.load(handle)["transcript_source"] == "captions"
+    assert next(iter(manager.metadata.values()))["source"] == "captions"
+
+
+def _save_many(output_dir, worker, count):
+    manager = TranscriptManager(output_dir=output_dir)
+    for index in range(count):
+        manager.save_transcript(
+            _video_info(f"{worker}-{index}"),
+            _transcript(),
+            f"https://youtu.be/{worker}{index}",
+            cache_key=f"{worker}-{index}",
+        )
+        # Cache hits append superseding records, so compactions happen too
+        for _ in range(3):
+            manager.get_cached_transcript(f"{worker}-{index}")
+
+
+def test_processes_share_one_journal(tmp_path, monkeypatch):
+    monkeypatch.setattr(TranscriptManager, "COMPACT_MIN_RECORDS", 5)
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(target=_save_many, args=(tmp_path, worker, 15))
+        for worker in range(6)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+
+    stored_metadata = TranscriptManager(output_dir=tmp_path).metadata
+    assert len(stored_metadata) == 90
+
+
+def test_manager_sees_entries_saved_by_another_manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(TranscriptManager, "COMPACT_MIN_RECORDS", 2)
+    first = TranscriptManager(output_dir=tmp_path)
+    second = TranscriptManager(output_dir=tmp_path)
+
+    first.save_transcript(_video_info("A"), _transcript(), "u", cache_key="a")
+    # Compaction in the second manager replaces the journal file
+    for key in "bcd":
+        second.save_transcript(_video_info(key), _transcript(), "u", cache_key=key)
+
+    assert first.get_cached_transcript("d") is not None
+    assert len(first.list_transcripts()) == 4
+    assert len(TranscriptManager(output_dir=tmp_path).metadata) == 4
+
+
+def test_saved_captions_only_count_in_captions_first_mode(tmp_path, monkeypatch):
+    monkeypatch.setenv("TRANSCRIPTS_DIR", str(tmp_path))
+    monkeypatch.setenv("USE_GPU", "false")
+    monkeypatch.setenv("CAPTIONS_FIRST", "true")
+    app = main_module.YouTubeTranscriptExtractor()
+    video_id = "dQw4w9WgXcQ"
+    app.transcript_manager.save_transcript(
+        dict(_video_info(), id=video_id),
+        _transcript(),
+        "https://youtu.be/example",
+        cache_key=app._cache_key(video_id, source="captions"),
+        source="captions",
+    )
+
+    assert app._cache_key(video_id, source="captions") != app._cache_key(video_id)
+    assert app._load_cached(video_id) is not None
+    app.captions_first = False
+    assert app._load_cached(video_id) is None
@@ -0,0 +1,86 @@
+import json
+
+from segments import Segment
+from transcript_manager import TranscriptManager
+from transcript_writers import write_transcript
+
+
+def _document(segments):
+    return {
+        "video_info": {"title": "Talk", "duration": 3700, "uploader": "Channel"},
+        "url": "https://youtu.be/talk",
+        "transcript": {
+            "full_text": " ".join(segment.text for segment in segments),
+            "segments": segments,
+            "language": "en",
+        },
+    }
+
+
+def test_writers_render_every_format_in_one_pass(tmp_path):
+    segments = [
+        Segment(0.0, 2.5, "Hello there.", avg_logprob=-0.2, tokens=[50364, 2425]),
+        Segment(3661.25, 3663.0, "Goodbye."),
+    ]
+
+    files = write_transcript(
+        tmp_path, _document(segments), ["txt", "timestamped", "srt", "vtt", "jsonl"]
+    )
+
+    assert set(files) == {"txt", "timestamped", "srt", "vtt", "jsonl"}
+    assert (tmp_path / "transcript_timestamped.txt").read_text().splitlines() == [
+        "[00:00 - 00:02] Hello there.",
+        "[01:01:01 - 01:01:03] Goodbye.",
+    ]
+    assert (tmp_path / "transcript.srt").read_text() == (
+        "1\n00:00:00,000 --> 00:00:02,500\nHello there.\n\n"
+        "2\n01:01:01,250 --> 01:01:03,000\nGoodbye.\n\n"
+    )
+    assert (
+        (tmp_path / "transcript.vtt")
+        .read_text()
+        .startswith("WEBVTT\n\n00:00:00.000 --> 00:00:02.500\nHello there.\n\n")
+    )
+    records = [json.loads(line) for line in open(tmp_path / "transcript.jsonl")]
+    assert records[0] == {
+        "start": 0.0,
+        "end": 2.5,
+        "text": "Hello there.",
+        "avg_logprob": -0.2,
+        "tokens": [50364, 2425],
+    }
+
+
+def test_json_document_round_trips_through_the_cache(tmp_path):
+    manager = TranscriptManager(output_dir=tmp_path)
+    segments = [Segment(0.0, 2.5, "Hello"), Segment(2.5, 4.0, "world")]
+    document = _document(segments)
+
+    _, json_path, folder = manager.save_transcript(
+        document["video_info"], document["transcript"], document["url"], "key"
+    )
+    transcript, video_info, _ = manager.get_cached_transcript("key")
+
+    with open(json_path, encoding="utf-8") as f:
+        saved = json.load(f)
+    assert saved["video_info"]["title"] == "Talk"
+    assert saved["transcript"]["segments"][1] == {
+        "start": 2.5,
+        "end": 4.0,
+        "text": "world",
+    }
+    assert transcript["segments"] == segments
+    # Subtitles are opt-in
+    assert sorted(path.name for path in folder.iterdir()) == [
+        "metadata.json",
+        "transcript.json",
+        "transcript.txt",
+        "transcript_timestamped.txt",
+    ]
+
+
+def test_legacy_string_segments_are_parsed():
+    segment = Segment.parse("[01:02:03 - 01:02:05] Old archive line")
+
+    assert (segment.start, segment.end) == (3723.0, 3725.0)
+    assert segment.text == "Old archive line"
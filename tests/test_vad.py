@@ -0,0 +1,60 @@
+import numpy as np
+
+from chunking import SAMPLE_RATE
+from vad import SpeechTimeline, detect_speech
+
+
+def _speech_with_silence(layout):
+    """Noise for ("speech", seconds) parts and zeros for ("silence", seconds)."""
+    rng = np.random.default_rng(0)
+    parts = [
+        (
+            rng.uniform(-0.3, 0.3, int(seconds * SAMPLE_RATE))
+            if kind == "speech"
+            else np.zeros(int(seconds * SAMPLE_RATE))
+        )
+        for kind, seconds in layout
+    ]
+    return np.concatenate(parts).astype(np.float32)
+
+
+def test_detect_speech_drops_long_silence_and_keeps_short_pauses():
+    audio = _speech_with_silence(
+        [("silence", 10), ("speech", 5), ("silence", 0.5), ("speech", 5)]
+        + [("silence", 20), ("speech", 3)]
+    )
+
+    spans = detect_speech(audio, padding_seconds=0.2)
+
+    seconds = [(start / SAMPLE_RATE, end / SAMPLE_RATE) for start, end in spans]
+    assert len(seconds) == 2
+    assert abs(seconds[0][0] - 9.8) < 0.05 and abs(seconds[0][1] - 20.7) < 0.05
+    assert abs(seconds[1][0] - 40.3) < 0.05 and seconds[1][1] == len(audio) / 16000
+
+
+def test_silent_audio_has_no_speech():
+    assert detect_speech(np.zeros(5 * SAMPLE_RATE, dtype=np.float32)) == []
+
+
+def test_timeline_maps_compacted_times_back():
+    spans = [(10 * SAMPLE_RATE, 20 * SAMPLE_RATE), (50 * SAMPLE_RATE, 55 * SAMPLE_RATE)]
+    timeline = SpeechTimeline(spans, 60 * SAMPLE_RATE)
+    audio = np.arange(60 * SAMPLE_RATE, dtype=np.float32)
+
+    compacted = timeline.compact(audio)
+    result = timeline.restore(
+        {
+            "segments": [
+                {"start": 1.0, "end": 10.0, "text": " first"},
+                {"start": 10.0, "end": 12.5, "text": " second"},
+            ]
+        }
+    )
+
+    assert len(compacted) == 15 * SAMPLE_RATE
+    assert compacted[10 * SAMPLE_RATE] == 50 * SAMPLE_RATE
+    assert timeline.skipped_seconds == 45
+    assert [(s["start"], s["end"]) for s in result["segments"]] == [
+        (11.0, 20.0),
+        (50.0, 52.5),
+    ]
@@ -0,0 +1,324 @@
+import io
+import json
+
+import youtube_downloader as downloader_module
+from youtube_downloader import (
+    YouTubeDownloader,
+    extract_video_id,
+    parse_json3_captions,
+    parse_vtt_captions,
+)
+
+
+class _FakeYoutubeDL:
+    calls = []
+    options = []
+    responses = {}
+
+    def __init__(self, opts):
+        self.opts = opts
+        self.options.append(opts)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def extract_info(self, url, download=True):
+        self.calls.append(("extract_info", url, download))
+        return {
+            "id": "dQw4w9WgXcQ",
+            "title": "Example Video",
+            "duration": 212,
+            "uploader": "Test Channel",
+            "upload_date": "20240101",
+        }
+
+    def urlopen(self, url):
+        self.calls.append(("urlopen", url))
+        return io.BytesIO(self.responses[url].encode("utf-8"))
+
+    def process_ie_result(self, info, download=True):
+        self.calls.append(("process_ie_result", info["id"], download))
+        info["requested_downloads"] = [{"filepath": "/tmp/Example Video.webm"}]
+        return info
+
+
+def _make_downloader(monkeypatch, tmp_path):
+    _FakeYoutubeDL.calls = []
+    _FakeYoutubeDL.options = []
+    monkeypatch.setattr(downloader_module.yt_dlp, "YoutubeDL", _FakeYoutubeDL)
+    return YouTubeDownloader(temp_dir=str(tmp_path))
+
+
+def test_extract_video_id_handles_common_url_shapes():
+    assert extract_video_id("https://www.youtube.com/watch?v=dQw4w9WgXcQ") == (
+        "dQw4w9WgXcQ"
+    )
+    assert extract_video_id("https://youtu.be/dQw4w9WgXcQ?t=10") == "dQw4w9WgXcQ"
+    assert extract_video_id("https://youtube.com/shorts/dQw4w9WgXcQ") == "dQw4w9WgXcQ"
+    assert extract_video_id("https://www.youtube.com/@channel") is None
+
+
+def test_video_is_resolved_once_per_url(monkeypatch, tmp_path):
+    downloader = _make_downloader(monkeypatch, tmp_path)
+    url = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+    info = downloader.resolve(url)
+    video_info = downloader.get_video_info(info)
+    downloader.download_audio(url, info=info)
+
+    assert video_info["title"] == "Example Video"
+    assert [call[0] for call in _FakeYoutubeDL.calls] == [
+        "extract_info",
+        "process_ie_result",
+    ]
+    # The cached info dict is not mutated by the download
+    assert "requested_downloads" not in info
+
+
+def test_resolve_reuses_cached_info_by_video_id(monkeypatch, tmp_path):
+    downloader = _make_downloader(monkeypatch, tmp_path)
+
+    downloader.resolve("https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+    downloader.resolve("https://youtu.be/dQw4w9WgXcQ")
+
+    assert len(_FakeYoutubeDL.calls) == 1
+
+
+def test_resolve_cache_can_be_disabled(monkeypatch, tmp_path):
+    monkeypatch.setenv("INFO_CACHE_TTL", "0")
+    downloader = _make_downloader(monkeypatch, tmp_path)
+
+    downloader.resolve("https://youtu.be/dQw4w9WgXcQ")
+    downloader.resolve("https://youtu.be/dQw4w9WgXcQ")
+
+    assert len(_FakeYoutubeDL.calls) == 2
+
+
+def test_download_keeps_native_audio_by_default(monkeypatch, tmp_path):
+    monkeypatch.delenv("KEEP_AUDIO", raising=False)
+    downloader = _make_downloader(monkeypatch, tmp_path)
+
+    audio_file, _, _ = downloader.download_audio("https://youtu.be/dQw4w9WgXcQ")
+
+    assert audio_file == "/tmp/Example Video.webm"
+    assert "postprocessors" not in _FakeYoutubeDL.options[-1]
+
+
+def test_download_transcodes_to_mp3_when_keeping_audio(monkeypatch, tmp_path):
+    downloader = _make_downloader(monkeypatch, tmp_path)
+
+    audio_file, _, _ = downloader.download_audio(
+        "https://youtu.be/dQw4w9WgXcQ", keep_audio=True
+    )
+
+    assert audio_file == str(tmp_path / "Example Video [dQw4w9WgXcQ].mp3")
+    postprocessors = _FakeYoutubeDL.options[-1]["postprocessors"]
+    assert postprocessors[0]["preferredcodec"] == "mp3"
+
+
+def test_expand_source_reads_url_file(monkeypatch, tmp_path):
+    downloader = _make_downloader(monkeypatch, tmp_path)
+    url_file = tmp_path / "urls.txt"
+    url_file.write_text(
+        "# backlog\nhttps://youtu.be/aaaaaaaaaaa\n\nhttps://youtu.be/bbbbbbbbbbb\n",
+        encoding="utf-8",
+    )
+
+    urls = downloader.expand_source(str(url_file))
+
+    assert urls == ["https://youtu.be/aaaaaaaaaaa", "https://youtu.be/bbbbbbbbbbb"]
+    assert _FakeYoutubeDL.calls == []
+
+
+def test_expand_source_lists_flat_playlist_entries(monkeypatch, tmp_path):
+    downloader = _make_downloader(monkeypatch, tmp_path)
+
+    def extract_playlist(self, url, download=True):
+        self.calls.append(("extract_info", url, download))
+        return {
+            "_type": "playlist",
+            "entries": [
+                {"ie_key": "Youtube", "id": "aaaaaaaaaaa", "url": "aaaaaaaaaaa"},
+                {"ie_key": "Youtube", "id": "bbbbbbbbbbb", "url": "bbbbbbbbbbb"},
+            ],
+        }
+
+    monkeypatch.setattr(_FakeYoutubeDL, "extract_info", extract_playlist)
+
+    urls = downloader.expand_source("https://www.youtube.com/playlist?list=PL1")
+
+    assert urls == [
+        "https://www.youtube.com/watch?v=aaaaaaaaaaa",
+        "https://www.youtube.com/watch?v=bbbbbbbbbbb",
+    ]
+    assert _FakeYoutubeDL.options[-1]["extract_flat"] == "in_playlist"
+
+
+def test_list_new_videos_stops_reading_at_known_uploads(monkeypatch, tmp_path):
+    downloader = _make_downloader(monkeypatch, tmp_path)
+    read = []
+
+    def entries():
+        for index in range(1000):
+            read.append(index)
+            yield {"ie_key": "Youtube", "id": f"video{index:06d}"}
+
+    def extract_channel(self, url, download=True, process=True):
+        assert not process
+        return {"_type": "playlist", "entries": entries()}
+
+    monkeypatch.setattr(_FakeYoutubeDL, "extract_info", extract_channel)
+    known = [f"video{index:06d}" for index in range(2, 1000)]
+
+    videos = downloader.list_new_videos("https://youtube.com/@x", known, stop_after=3)
+
+    assert videos == [
+        ("video000000", "https://www.youtube.com/watch?v=video000000", None),
+        ("video000001", "https://www.youtube.com/watch?v=video000001", None),
+    ]
+    assert len(read) == 5
+    assert _FakeYoutubeDL.options[-1]["lazy_playlist"] is True
+
+
+def test_list_new_videos_follows_url_results(monkeypatch, tmp_path):
+    downloader = _make_downloader(monkeypatch, tmp_path)
+    extracted = []
+
+    def extract_channel(self, url, download=True, process=True):
+        assert not process
+        extracted.append(url)
+        if url == "https://youtube.com/@x":
+            return {"_type": "url", "url": "https://youtube.com/@x/videos"}
+        return {"_type": "playlist", "entries": [{"ie_key": "Youtube", "id": "new"}]}
+
+    monkeypatch.setattr(_FakeYoutubeDL, "extract_info", extract_channel)
+
+    videos = downloader.list_new_videos("https://youtube.com/@x", [])
+
+    assert videos == [("new", "https://www.youtube.com/watch?v=new", None)]
+    assert extracted == ["https://youtube.com/@x", "https://youtube.com/@x/videos"]
+
+
+JSON3_CAPTIONS = json.dumps(
+    {
+        "events": [
+            {"tStartMs": 0, "dDurationMs": 2500, "segs": [{"utf8": "Hello"}]},
+            {"tStartMs": 2500, "dDurationMs": 100, "segs": [{"utf8": "\n"}]},
+            {"tStartMs": 61000, "dDurationMs": 3000, "segs": [{"utf8": "world"}]},
+        ]
+    }
+)
+
+VTT_CAPTIONS = """WEBVTT
+Kind: captions
+
+00:00:00.000 --> 00:00:02.000
+<c>Hello</c> there
+
+00:00:02.000 --> 00:00:04.000
+Hello there
+General Kenobi
+"""
+
+
+def test_parse_json3_captions():
+    segments = parse_json3_captions(JSON3_CAPTIONS)
+
+    assert segments == [
+        {"start": 0.0, "end": 2.5, "text": " Hello"},
+        {"start": 61.0, "end": 64.0, "text": " world"},
+    ]
+
+
+def test_parse_vtt_captions_drops_rolling_duplicates():
+    segments = parse_vtt_captions(VTT_CAPTIONS)
+
+    assert [segment["text"] for segment in segments] == [
+        " Hello there",
+        " General Kenobi",
+    ]
+    assert segments[1]["start"] == 2.0 and segments[1]["end"] == 4.0
+
+
+def test_fetch_captions_prefers_manual_json3(monkeypatch, tmp_path):
+    downloader = _make_downloader(monkeypatch, tmp_path)
+    _FakeYoutubeDL.responses = {"https://captions/en.json3": JSON3_CAPTIONS}
+    info = {
+        "subtitles": {
+            "en": [
+                {"ext": "vtt", "url": "https://captions/en.vtt"},
+                {"ext": "json3", "url": "https://captions/en.json3"},
+            ]
+        },
+        "automatic_captions": {
+            "en-orig": [{"ext": "json3", "url": "https://captions/auto.json3"}]
+        },
+    }
+
+    result = downloader.fetch_captions(info, language="en")
+
+    assert result["language"] == "en"
+    assert result["text"] == " Hello world"
+    assert _FakeYoutubeDL.calls == [("urlopen", "https://captions/en.json3")]
+
+
+def test_fetch_captions_uses_auto_captions_only_when_allowed(monkeypatch, tmp_path):
+    downloader = _make_downloader(monkeypatch, tmp_path)
+    _FakeYoutubeDL.responses = {"https://captions/auto.vtt": VTT_CAPTIONS}
+    info = {
+        "language": "en",
+        "subtitles": {"fr": [{"ext": "vtt", "url": "https://captions/fr.vtt"}]},
+        "automatic_captions": {
+            "de": [{"ext": "vtt", "url": "https://captions/de.vtt"}],
+            "en-orig": [{"ext": "vtt", "url": "https://captions/auto.vtt"}],
+        },
+    }
+
+    assert downloader.fetch_captions(info, allow_auto=False) is None
+
+    result = downloader.fetch_captions(info, allow_auto=True)
+    assert result["language"] == "en"
+    assert len(result["segments"]) == 2
+
+
+def test_machine_translated_auto_captions_are_not_used(monkeypatch, tmp_path):
+    downloader = _make_downloader(monkeypatch, tmp_path)
+    info = {
+        "language": "es",
+        "automatic_captions": {
+            "en": [{"ext": "vtt", "url": "https://captions/en.vtt"}],
+            "es-orig": [{"ext": "vtt", "url": "https://captions/es.vtt"}],
+        },
+    }
+
+    assert downloader.fetch_captions(info, language="en", allow_auto=True) is None
+    assert _FakeYoutubeDL.calls == []
+
+
+def test_cached_audio_is_downloaded_once_per_format(monkeypatch, tmp_path):
+    monkeypatch.setenv("AUDIO_CACHE", "true")
+    monkeypatch.delenv("AUDIO_CACHE_DIR", raising=False)
+    downloader = _make_downloader(monkeypatch, tmp_path)
+
+    def process_ie_result(self, info, download=True):
+        self.calls.append(("process_ie_result", info["id"], download))
+        path = self.opts["outtmpl"].replace("%(ext)s", "webm")
+        with open(path, "wb") as f:
+            f.write(b"audio")
+        info["requested_downloads"] = [{"filepath": path}]
+        return info
+
+    monkeypatch.setattr(_FakeYoutubeDL, "process_ie_result", process_ie_result)
+    url = "https://youtu.be/dQw4w9WgXcQ"
+
+    first, _, first_info = downloader.download_audio(url)
+    assert downloader.release_audio(first)
+    second, _, second_info = downloader.download_audio(url)
+
+    assert first == second == str(tmp_path / "audio_cache" / "dQw4w9WgXcQ.native.webm")
+    assert not first_info["audio_cache_hit"] and second_info["audio_cache_hit"]
+    downloads = [call for call in _FakeYoutubeDL.calls if call[0] != "extract_info"]
+    assert len(downloads) == 1
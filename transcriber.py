@@ -1,69 +1,509 @@
-import whisper
 import os
-import torch
+import tempfile
+import threading
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
+from backends import WhisperBackend, get_backend
+from batched_decoding import decode_batched
+from chunking import SAMPLE_RATE, ChunkedTranscriber
+from language_detection import detect_language, sample_windows
+from metrics import stage_timer
+from streaming import PcmFileReader, StreamingTranscriber, decode_to_pcm_file
+from vad import SpeechTimeline, detect_speech
+from lazy_imports import lazy_import
+from model_registry import get_registry
+from segments import Segment, format_timestamp
+
+# torch and whisper take seconds to import, so they load on first use
+torch = lazy_import("torch")
+whisper = lazy_import("whisper")
+
 load_dotenv()
 
 
+def get_default_language():
+    """Return the configured transcription language, or None to auto-detect."""
+    default_language = os.getenv("DEFAULT_LANGUAGE", "en")
+    if default_language.lower() == "none":
+        return None
+    return default_language
+
+
 class WhisperTranscriber:
-    def __init__(self, model_size="base"):
-        """Initialize Whisper model.
+    def __init__(self, model_size="base", registry=None, backend=None):
+        """Prepare a Whisper transcriber; the model is loaded on first use.
 
         Model sizes: tiny, base, small, medium, large
+
+        backend names the inference backend (see backends.py); it defaults
+        to WHISPER_BACKEND. Models live in a shared ModelRegistry, so
+        transcribers for the same size and backend share one set of weights
+        and switching sizes reuses models that are still loaded.
+        """
+        self.model_size = model_size
+        self.backend = get_backend(backend)
+        self.use_gpu = os.getenv("USE_GPU", "true").lower() == "true"
+        self.registry = registry or get_registry()
+        self._device = None
+        # Guards the first torch import against warm_up()
+        self._device_lock = threading.Lock()
+        self._warm_up_thread = None
+
+        # Chunked mode: long audio is split and transcribed in a process pool
+        self.processes = int(os.getenv("TRANSCRIBE_PROCESSES", "1"))
+        self.chunk_minutes = float(os.getenv("CHUNK_MINUTES", "10"))
+        self._chunked = None
+
+        # Low-memory mode: decode once to a raw PCM file in TEMP_DIR and
+        # transcribe it window by window instead of holding the whole video
+        # in memory
+        self.low_memory = os.getenv("LOW_MEMORY_AUDIO", "false").lower() == "true"
+        self.temp_dir = os.getenv("TEMP_DIR", tempfile.gettempdir())
+        self.window_seconds = float(os.getenv("STREAM_WINDOW_SECONDS", "30"))
+        self.overlap_seconds = float(os.getenv("STREAM_OVERLAP_SECONDS", "5"))
+
+        # Voice activity detection: only the speech is sent to Whisper
+        self.vad = os.getenv("VAD", "false").lower() == "true"
+        self.vad_threshold_db = float(os.getenv("VAD_THRESHOLD_DB", "35"))
+        self.vad_min_silence = float(os.getenv("VAD_MIN_SILENCE_SECONDS", "1"))
+
+        # Batched decoding: up to this many 30-second windows per encoder and
+        # decoder pass instead of whisper.transcribe's one at a time
+        self.decode_batch_size = int(os.getenv("DECODE_BATCH_SIZE", "1"))
+
+        # Language detection: a small model listens to a few windows first
+        # and the language it hears is pinned for the full transcription
+        self.detect_language = os.getenv("DETECT_LANGUAGE", "false").lower() == "true"
+        self.language_model = os.getenv("LANGUAGE_DETECTION_MODEL", "tiny")
+        self.language_windows = int(os.getenv("LANGUAGE_SAMPLE_WINDOWS", "3"))
+        self.language_min_confidence = float(
+            os.getenv("LANGUAGE_MIN_CONFIDENCE", "0.6")
+        )
+
+    @property
+    def device(self):
+        """Device the model runs on: cuda when available and enabled."""
+        with self._device_lock:
+            if self._device is None:
+                cuda = (
+                    not self.backend.cpu_only
+                    and self.use_gpu
+                    and torch.cuda.is_available()
+                )
+                self._device = "cuda" if cuda else "cpu"
+            return self._device
+
+    @property
+    def model_key(self):
+        """Registry key for this transcriber's model."""
+        return (self.backend.name, self.model_size, self.device)
+
+    @property
+    def model_label(self):
+        """Model name for cache keys and metrics, e.g. base or base-whisper-int8."""
+        if self.backend.name == "whisper":
+            return self.model_size
+        return f"{self.model_size}-{self.backend.name}"
+
+    @property
+    def output_settings(self):
+        """Settings besides model and language that change the transcript."""
+        return (
+            self.device,
+            self.window_seconds,
+            self.overlap_seconds,
+            self.vad,
+            self.vad_threshold_db,
+            self.vad_min_silence,
+            self.decode_batch_size,
+            self.language_model,
+            self.language_windows,
+            self.language_min_confidence,
+        )
+
+    @property
+    def model(self):
+        """The Whisper model, loaded into the registry on first access."""
+        return self._load_model()
+
+    def _load_model(self, quiet=False):
+        def load():
+            if not quiet:
+                print(f"Loading Whisper {self.model_label} model...")
+            model = self.backend.load(self.model_size, self.device)
+            if not quiet:
+                print(f"Model loaded on {self.device}")
+            return model
+
+        return self.registry.get(self.model_key, load)
+
+    @property
+    def is_loaded(self):
+        """Whether the model weights are already in memory."""
+        return self.model_key in self.registry
+
+    def warm_up(self):
+        """Start loading the model in a background thread and return it."""
+        if self._warm_up_thread is None:
+            self._warm_up_thread = threading.Thread(
+                target=self._load_model, kwargs={"quiet": True}, daemon=True
+            )
+            self._warm_up_thread.start()
+        return self._warm_up_thread
+
+    def load_audio(self, audio_file_path):
+        """Decode an audio file once to 16 kHz mono float32 PCM."""
+        return whisper.load_audio(audio_file_path)
+
+    def transcribe(self, audio, timings=None):
+        """Transcribe audio using Whisper.
+
+        audio may be a path to any container ffmpeg can read (the native
+        opus/m4a download included), a 16 kHz mono float32 array from
+        load_audio(), or a raw float32 ".f32" file / PcmFileReader, which is
+        transcribed window by window with memory bounded by the window size.
+        With LOW_MEMORY_AUDIO=true other files are first decoded to a
+        ".f32" file in TEMP_DIR.
+        The audio is decoded exactly once either way.
+
+        With VAD=true, silence is cut out before transcription (see vad.py)
+        and segment times are mapped back to the original timeline.
+
+        With DETECT_LANGUAGE=true, LANGUAGE_DETECTION_MODEL first detects the
+        language on a few windows and it is pinned for the transcription;
+        the result then carries "language_detection" (see
+        language_detection.detect_language).
+
+        With DECODE_BATCH_SIZE above 1, the windows are decoded in batches
+        (see batched_decoding.decode_batched).
+
+        Pass a timings dict to have the model_load, decode (ffmpeg), vad,
+        language, lock_wait and inference wall times added to it; a path is
+        then decoded up front so the decode is timed apart from inference.
         """
-        print(f"Loading Whisper {model_size} model...")
-        use_gpu = os.getenv("USE_GPU", "true").lower() == "true"
-        self.device = "cuda" if (torch.cuda.is_available() and use_gpu) else "cpu"
-        self.model = whisper.load_model(model_size, device=self.device)
-        print(f"Model loaded on {self.device}")
-
-    def transcribe(self, audio_file_path):
-        """Transcribe audio file using Whisper."""
         print("Transcribing audio...")
+        timed = timings is not None
+        timings = {} if timings is None else timings
 
-        default_language = os.getenv("DEFAULT_LANGUAGE", "en")
-        if default_language.lower() == "none":
-            default_language = None
+        if isinstance(audio, str) and audio.endswith(".f32"):
+            audio = PcmFileReader(audio)
+        if isinstance(audio, str) and self.low_memory:
+            # Never next to the audio, which may be an AUDIO_CACHE entry
+            fd, pcm_path = tempfile.mkstemp(suffix=".f32", dir=self.temp_dir)
+            os.close(fd)
+            try:
+                with stage_timer(timings, "decode"):
+                    decode_to_pcm_file(audio, pcm_path)
+                return self.transcribe(PcmFileReader(pcm_path), timings)
+            finally:
+                os.remove(pcm_path)
+        if isinstance(audio, PcmFileReader):
+            detection = self._detect_timed(audio, timings)
+            self._load_timed(timings)
+            return self.transcribe_pcm_file(audio, detection=detection, timings=timings)
 
-        debug_mode = os.getenv("DEBUG_MODE", "false").lower() == "true"
+        options = self._options()
+        chunked = self.processes > 1 and self.device == "cpu"
+        decode_first = chunked or timed or self.vad or self.detect_language
+        if isinstance(audio, str) and (decode_first or self.batched):
+            with stage_timer(timings, "decode"):
+                audio = self.load_audio(audio)
+
+        timeline, audio = self._skip_silence(audio, timings)
+        if timeline is not None and not timeline.spans:
+            return self._empty_result()
+
+        detection = self._detect_timed(audio, timings)
+        if detection:
+            options["language"] = self._pinned_language(detection)
+
+        if chunked and len(audio) > self.chunk_minutes * 60 * SAMPLE_RATE:
+            with stage_timer(timings, "inference"):
+                result = self._get_chunked().transcribe(audio, **options)
+        elif self.batched:
+            model = self._load_timed(timings)
+            with self._model_turn(timings), stage_timer(timings, "inference"):
+                result = decode_batched(
+                    model,
+                    [audio],
+                    self.decode_batch_size,
+                    language=options["language"],
+                    fp16=options["fp16"],
+                )[0]
+        else:
+            # Transcribe with progress indication. Transcribers sharing this
+            # model take turns, since decoding hooks into the model itself.
+            model = self._load_timed(timings)
+            with self._model_turn(timings), stage_timer(timings, "inference"):
+                result = model.transcribe(audio, **options)
+
+        result = timeline.restore(result) if timeline else result
+        if detection:
+            result["language_detection"] = detection
+        return result
+
+    @property
+    def batched(self):
+        """Whether windows are decoded in batches (DECODE_BATCH_SIZE > 1)."""
+        return self.decode_batch_size > 1 and self.backend.batched_decoding
+
+    def transcribe_many(self, audios, timings=None):
+        """Transcribe several short audios with their windows batched together.
+
+        audios are paths or 16 kHz PCM arrays; returns one result per audio.
+        Each audio gets the same VAD and language detection as transcribe(),
+        and audios pinned to the same language share decode_batched calls.
+        Without batched decoding they are simply transcribed in turn.
 
-        # Transcribe with progress indication
-        result = self.model.transcribe(
-            audio_file_path,
-            fp16=False if self.device == "cpu" else True,
-            language=default_language,
-            verbose=debug_mode,
+        Pass one timings dict per audio: decode, vad and language times are
+        the audio's own, while the shared model_load, lock_wait and
+        inference times are split between the audios by length.
+        """
+        timings = timings or [{} for _ in audios]
+        if not self.batched:
+            return [
+                self.transcribe(audio, audio_timings)
+                for audio, audio_timings in zip(audios, timings)
+            ]
+
+        options = self._options()
+        results = [None] * len(audios)
+        # Pinned language -> [(index, audio, timeline, detection)]
+        groups = {}
+        for index, (audio, audio_timings) in enumerate(zip(audios, timings)):
+            if isinstance(audio, str):
+                with stage_timer(audio_timings, "decode"):
+                    audio = self.load_audio(audio)
+            timeline, audio = self._skip_silence(audio, audio_timings)
+            if timeline is not None and not timeline.spans:
+                results[index] = self._empty_result()
+                continue
+            detection = self._detect_timed(audio, audio_timings)
+            language = (
+                self._pinned_language(detection) if detection else options["language"]
+            )
+            groups.setdefault(language, []).append((index, audio, timeline, detection))
+
+        shared = {}
+        for language, entries in groups.items():
+            model = self._load_timed(shared)
+            with self._model_turn(shared), stage_timer(shared, "inference"):
+                decoded = decode_batched(
+                    model,
+                    [audio for _, audio, _, _ in entries],
+                    self.decode_batch_size,
+                    language=language,
+                    fp16=options["fp16"],
+                )
+            for (index, _, timeline, detection), result in zip(entries, decoded):
+                result = timeline.restore(result) if timeline else result
+                if detection:
+                    result["language_detection"] = detection
+                results[index] = result
+
+        lengths = {
+            index: len(audio)
+            for entries in groups.values()
+            for index, audio, _, _ in entries
+        }
+        total = sum(lengths.values())
+        for index, length in lengths.items():
+            for stage, seconds in shared.items():
+                share = seconds * length / total if total else 0.0
+                timings[index][stage] = timings[index].get(stage, 0.0) + share
+        return results
+
+    def _detect_timed(self, audio, timings):
+        """Run language detection if enabled, timed as the language stage."""
+        if not self.detect_language:
+            return None
+        with stage_timer(timings, "language"):
+            detection = self.detect_audio_language(audio, timings)
+        if detection is None:
+            print("No speech found to detect the language from.")
+            return None
+        print(
+            f"Detected language: {detection['language']} "
+            f"({detection['confidence']:.0%} confident)"
+        )
+        if detection["low_confidence"]:
+            print("Low confidence: keeping the configured language.")
+        if detection["mixed"]:
+            languages = sorted({w["language"] for w in detection["windows"]})
+            print(f"The video seems to mix languages: {', '.join(languages)}")
+        return detection
+
+    def detect_audio_language(self, audio, timings=None):
+        """Detect the language of a PCM array or PcmFileReader.
+
+        Decodes LANGUAGE_SAMPLE_WINDOWS 30-second windows with the
+        LANGUAGE_DETECTION_MODEL, which is kept in the shared registry.
+        Returns the detection dict, or None when every window is silent.
+        """
+        windows = sample_windows(audio, self.language_windows)
+        key = ("whisper", self.language_model, self.device)
+        model = self.registry.get(
+            key, lambda: WhisperBackend().load(self.language_model, self.device)
+        )
+        with self._model_turn({} if timings is None else timings, key):
+            return detect_language(model, windows, self.language_min_confidence)
+
+    @contextmanager
+    def _model_turn(self, timings, key=None):
+        """Hold the inference lock of a shared model, timing the wait.
+
+        Transcribers sharing a model take turns, since decoding hooks into
+        the model itself; the wait is added to timings as lock_wait, so it
+        is never mistaken for inference time.
+        """
+        lock = self.registry.lock_for(key or self.model_key)
+        with stage_timer(timings, "lock_wait"):
+            lock.acquire()
+        try:
+            yield
+        finally:
+            lock.release()
+
+    def _pinned_language(self, detection):
+        """Language to transcribe with: the detected one unless unsure."""
+        if detection["low_confidence"]:
+            return get_default_language()
+        return detection["language"]
+
+    def _skip_silence(self, audio, timings):
+        """Cut silence out of a PCM array if VAD is enabled, timed as vad.
+
+        Returns (SpeechTimeline or None, audio to transcribe).
+        """
+        if not self.vad:
+            return None, audio
+        with stage_timer(timings, "vad"):
+            timeline, audio = self._remove_silence(audio)
+        print(
+            f"Skipping {timeline.skipped_fraction:.0%} of the audio as silence "
+            f"({self._format_timestamp(timeline.skipped_seconds)} of "
+            f"{self._format_timestamp(timeline.total_seconds)})"
+        )
+        return timeline, audio
+
+    def _remove_silence(self, audio):
+        """Return (SpeechTimeline, speech-only audio) for a PCM array."""
+        spans = detect_speech(
+            audio,
+            threshold_db=self.vad_threshold_db,
+            min_silence_seconds=self.vad_min_silence,
         )
+        timeline = SpeechTimeline(spans, len(audio))
+        return timeline, timeline.compact(audio)
+
+    @staticmethod
+    def _empty_result():
+        return {"text": "", "segments": [], "language": None}
+
+    def _load_timed(self, timings):
+        """Return the model, timing the load as model_load if it happens now."""
+        if self.is_loaded:
+            return self.model
+        with stage_timer(timings, "model_load"):
+            return self.model
+
+    def _options(self, **overrides):
+        """Options passed to model.transcribe for the current settings."""
+        debug_mode = os.getenv("DEBUG_MODE", "false").lower() == "true"
+        options = {
+            "fp16": False if self.device == "cpu" else True,
+            "language": get_default_language(),
+            "verbose": debug_mode,
+        }
+        options.update(overrides)
+        return options
+
+    def transcribe_window(
+        self, samples, initial_prompt=None, language=None, timings=None
+    ):
+        """Transcribe one window of 16 kHz PCM (used by streaming mode).
+
+        language overrides DEFAULT_LANGUAGE, e.g. with a detected language.
+        Pass a timings dict to have the lock_wait and inference times added.
+        """
+        timings = {} if timings is None else timings
+        timeline = None
+        if self.vad:
+            timeline, samples = self._remove_silence(samples)
+            if not timeline.spans:
+                return self._empty_result()
+        options = self._options(verbose=None, initial_prompt=initial_prompt)
+        if language:
+            options["language"] = language
+        model = self.model
+        with self._model_turn(timings), stage_timer(timings, "inference"):
+            result = model.transcribe(samples, **options)
+        return timeline.restore(result) if timeline else result
+
+    def transcribe_pcm_file(
+        self, reader, checkpoint=None, detection=None, timings=None
+    ):
+        """Transcribe a PcmFileReader in overlapping windows.
 
+        Pass a TranscriptionCheckpoint to save progress after every window
+        and resume from an earlier interrupted run. With DETECT_LANGUAGE,
+        the language is detected first unless detection is passed in.
+        timings collects the language, lock_wait and inference times.
+        """
+        timings = {} if timings is None else timings
+        if detection is None:
+            detection = self._detect_timed(reader, timings)
+        language = self._pinned_language(detection) if detection else None
+
+        def transcribe_window(samples, initial_prompt=None):
+            return self.transcribe_window(samples, initial_prompt, language, timings)
+
+        streamer = StreamingTranscriber(
+            transcribe_window, self.window_seconds, self.overlap_seconds
+        )
+        result = streamer.run(reader, checkpoint=checkpoint)
+        if detection:
+            result["language_detection"] = detection
         return result
 
+    def _get_chunked(self):
+        """Create the chunked transcriber (and its worker pool) on first use."""
+        if self._chunked is None:
+            self._chunked = ChunkedTranscriber(
+                self.model_size,
+                backend=self.backend.name,
+                workers=self.processes,
+                chunk_minutes=self.chunk_minutes,
+            )
+        return self._chunked
+
+    def close(self):
+        """Release worker processes started for chunked transcription."""
+        if self._chunked is not None:
+            self._chunked.close()
+            self._chunked = None
+
     def format_transcript(self, result, include_timestamps=True):
-        """Format the transcript result into readable text."""
-        transcript = result["text"].strip()
+        """Turn a Whisper result into full text plus Segment records.
 
+        Segments keep their start/end seconds, text and decoder stats; the
+        transcript writers render them as timestamped text, SRT, VTT or JSON.
+        Without include_timestamps only the full text is kept.
+        """
+        segments = []
         if include_timestamps and "segments" in result:
-            formatted_segments = []
-            for segment in result["segments"]:
-                start = self._format_timestamp(segment["start"])
-                end = self._format_timestamp(segment["end"])
-                text = segment["text"].strip()
-                formatted_segments.append(f"[{start} - {end}] {text}")
-        else:
-            formatted_segments = []
+            segments = [Segment.from_result(s) for s in result["segments"]]
 
-        return {
-            "full_text": transcript,
-            "segments": formatted_segments,
+        formatted = {
+            "full_text": result["text"].strip(),
+            "segments": segments,
             "language": result.get("language", "unknown"),
         }
+        if result.get("language_detection"):
+            formatted["language_detection"] = result["language_detection"]
+        return formatted
 
     def _format_timestamp(self, seconds):
         """Convert seconds to HH:MM:SS format."""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        seconds = int(seconds % 60)
-
-        if hours > 0:
-            return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-        return f"{minutes:02d}:{seconds:02d}"
+        return format_timestamp(seconds)
@@ -1,58 +1,285 @@
+import hashlib
 import json
+import os
+import shutil
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 import uuid
 import logging
+import threading
+import sqlite3
 from dotenv import load_dotenv
 from json import JSONDecodeError
 
+from search_index import SearchIndex
+from segments import Segment
+from transcript_writers import transcript_formats, write_transcript
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process journal lock
+    fcntl = None
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
 
+def make_cache_key(video_id, model_size, language, include_timestamps):
+    """Build the transcript cache key for one video/transcription setting."""
+    parts = [video_id, model_size, language or "auto", bool(include_timestamps)]
+    return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()[:24]
+
+
 class TranscriptManager:
+    # Rewrite the journal once it holds this many superseded records
+    COMPACT_MIN_RECORDS = 1000
+
     def __init__(self, output_dir="transcripts"):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
-        self.metadata_file = self.output_dir / "metadata.json"
-        self.metadata = self._load_metadata()
+        # Append-only index: one JSON record per line, replayed at startup
+        self.metadata_file = self.output_dir / "metadata.jsonl"
+        # Pre-journal index, migrated on first start
+        self.legacy_metadata_file = self.output_dir / "metadata.json"
+        # Serializes journal access between threads; _journal_lock() adds an
+        # flock on metadata.lock for processes sharing TRANSCRIPTS_DIR
+        self._lock = threading.RLock()
+        self.lock_file = self.output_dir / "metadata.lock"
+        self._lock_fd = None
+        self._lock_depth = 0
+        self._journal_records = 0
+        # (journal identity, size) as of the last record this process saw
+        self._journal_position = (None, 0)
+        with self._journal_lock():
+            self.metadata = self._load_metadata()
+        # Full-text index of transcript segments, kept next to the journal
+        self.search_index = SearchIndex(self.output_dir / "search.db")
+
+        # LRU bounds for cached transcripts; 0 means unlimited
+        self.cache_max_entries = int(os.getenv("TRANSCRIPT_CACHE_MAX_ENTRIES", "0"))
+        self.cache_max_bytes = int(os.getenv("TRANSCRIPT_CACHE_MAX_BYTES", "0"))
+        self._rebuild_cache_index()
+        # Files written for every transcript (see transcript_writers.py)
+        self.formats = transcript_formats()
+
+    def _rebuild_cache_index(self):
+        self._cache_index = {
+            entry["cache_key"]: key
+            for key, entry in self.metadata.items()
+            if entry.get("cache_key")
+        }
+
+    @contextmanager
+    def _journal_lock(self):
+        """Hold the journal lock across threads and, via flock, processes.
+
+        Re-entrant: nested calls in the same thread share one flock.
+        """
+        with self._lock:
+            if self._lock_depth == 0 and fcntl is not None:
+                self._lock_fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0 and self._lock_fd is not None:
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+                    os.close(self._lock_fd)
+                    self._lock_fd = None
+
+    def _replay(self, f, metadata, first_line=1):
+        """Apply journal records read from f to metadata; return their count."""
+        records = 0
+        for line_number, line in enumerate(f, first_line):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                if record["op"] == "put":
+                    metadata[record["key"]] = record["entry"]
+                elif record["op"] == "del":
+                    metadata.pop(record["key"], None)
+            except (JSONDecodeError, KeyError, TypeError):
+                # A crash mid-append leaves at most one torn record
+                logger.warning(
+                    "Skipping unreadable record on line %d of %s",
+                    line_number,
+                    self.metadata_file,
+                )
+                continue
+            records += 1
+        return records
+
+    def _journal_identity(self, stat):
+        """Identify one version of the journal file (lock held).
+
+        Compaction replaces the file and bumps a generation counter kept in
+        metadata.lock; the inode alone is not enough since a later journal
+        can reuse a freed inode number.
+        """
+        generation = None
+        if self._lock_fd is not None:
+            generation = os.pread(self._lock_fd, 32, 0).strip() or b"0"
+        return stat.st_ino, generation
+
+    def _bump_generation(self):
+        """Record a compaction in metadata.lock (lock held)."""
+        if self._lock_fd is None:
+            return
+        generation = int(os.pread(self._lock_fd, 32, 0).strip() or b"0") + 1
+        os.ftruncate(self._lock_fd, 0)
+        os.pwrite(self._lock_fd, str(generation).encode("ascii"), 0)
+
+    def _remember_position(self):
+        """Note the journal's identity and size after reading or writing it."""
+        try:
+            stat = self.metadata_file.stat()
+        except FileNotFoundError:
+            self._journal_position = (None, 0)
+        else:
+            self._journal_position = (self._journal_identity(stat), stat.st_size)
 
     def _load_metadata(self):
-        """Load metadata from file."""
+        """Load metadata by replaying the journal, migrating metadata.json."""
         if not self.metadata_file.exists():
-            return {}
+            metadata = self._load_legacy_metadata()
+            if metadata:
+                self._compact(metadata)
+                self.legacy_metadata_file.replace(
+                    self.legacy_metadata_file.with_suffix(".json.migrated")
+                )
+                logger.info(
+                    "Migrated %d entries from %s to %s",
+                    len(metadata),
+                    self.legacy_metadata_file,
+                    self.metadata_file,
+                )
+            return metadata
+
+        metadata = {}
+        with open(self.metadata_file, "r", encoding="utf-8") as f:
+            self._journal_records = self._replay(f, metadata)
+        self._remember_position()
+        return metadata
+
+    def _catch_up(self):
+        """Apply records other processes appended since we last looked.
 
+        Called with the journal lock held. A journal replaced by another
+        process's compaction is reloaded in full.
+        """
         try:
+            stat = self.metadata_file.stat()
+        except FileNotFoundError:
+            return
+        identity, offset = self._journal_position
+        if self._journal_identity(stat) != identity:
+            self.metadata = self._load_metadata()
+        elif stat.st_size > offset:
             with open(self.metadata_file, "r", encoding="utf-8") as f:
+                f.seek(offset)
+                self._journal_records += self._replay(f, self.metadata)
+            self._remember_position()
+        else:
+            return
+        self._rebuild_cache_index()
+
+    def _load_legacy_metadata(self):
+        """Load the pre-journal metadata.json, if any."""
+        if not self.legacy_metadata_file.exists():
+            return {}
+
+        try:
+            with open(self.legacy_metadata_file, "r", encoding="utf-8") as f:
                 return json.load(f)
         except (JSONDecodeError, OSError) as error:
-            backup_path = self.metadata_file.with_suffix(
-                self.metadata_file.suffix + ".bak"
+            backup_path = self.legacy_metadata_file.with_suffix(
+                self.legacy_metadata_file.suffix + ".bak"
             )
             try:
-                self.metadata_file.replace(backup_path)
+                self.legacy_metadata_file.replace(backup_path)
             except OSError:
                 logger.warning(
-                    "Failed to back up corrupted metadata file %s", self.metadata_file
+                    "Failed to back up corrupted metadata file %s",
+                    self.legacy_metadata_file,
                 )
             else:
                 logger.warning(
                     "Corrupted metadata file %s moved to %s due to: %s",
-                    self.metadata_file,
+                    self.legacy_metadata_file,
                     backup_path,
                     error,
                 )
             return {}
-        return {}
 
-    def _save_metadata(self):
-        """Save metadata to file."""
-        with open(self.metadata_file, "w", encoding="utf-8") as f:
-            json.dump(self.metadata, f, indent=2, ensure_ascii=False)
+    def _append(self, record):
+        """Append one record to the journal with a single O_APPEND write."""
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        fd = os.open(self.metadata_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line.encode("utf-8"))
+            stat = os.fstat(fd)
+        finally:
+            os.close(fd)
+        self._journal_records += 1
+        self._journal_position = (self._journal_identity(stat), stat.st_size)
+
+    def _save_entry(self, metadata_key):
+        """Record the current state of one entry and compact when due."""
+        self._append(
+            {"op": "put", "key": metadata_key, "entry": self.metadata[metadata_key]}
+        )
+        self._maybe_compact()
+
+    def _delete_entry(self, metadata_key):
+        """Record the removal of one entry."""
+        self._append({"op": "del", "key": metadata_key})
 
-    def save_transcript(self, video_info, transcript_data, url):
-        """Save transcript to file and update metadata."""
+    def _maybe_compact(self):
+        """Compact once superseded records outnumber live entries."""
+        if self._journal_records > max(
+            self.COMPACT_MIN_RECORDS, 2 * len(self.metadata)
+        ):
+            self._compact(self.metadata)
+
+    def _compact(self, metadata):
+        """Atomically rewrite the journal with one record per live entry."""
+        temp_path = self.metadata_file.with_suffix(".jsonl.tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for key, entry in metadata.items():
+                record = {"op": "put", "key": key, "entry": entry}
+                f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+                f.write("\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.metadata_file)
+        self._bump_generation()
+        self._journal_records = len(metadata)
+        self._remember_position()
+
+    def save_transcript(
+        self,
+        video_info,
+        transcript_data,
+        url,
+        cache_key=None,
+        source="whisper",
+        metrics=None,
+    ):
+        """Save transcript to file and update metadata.
+
+        source records where the text came from: "whisper" or "captions".
+        metrics (stage timings, real-time factor, peak RSS...) is stored in
+        the video's metadata.json and index entry.
+
+        With a cache_key (see make_cache_key) the transcript replaces any
+        earlier one saved under the same key, and the cache is trimmed to
+        TRANSCRIPT_CACHE_MAX_ENTRIES / TRANSCRIPT_CACHE_MAX_BYTES.
+        """
         # Generate folder name for this video
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         unique_suffix = uuid.uuid4().hex[:8]
@@ -70,37 +297,24 @@ class TranscriptManager:
         video_folder = self.output_dir / video_folder_name
         video_folder.mkdir(parents=True, exist_ok=True)
 
-        # Create filenames within the folder
-        txt_filename = "transcript.txt"
-        timestamped_filename = "transcript_timestamped.txt"
-        json_filename = "transcript.json"
-        metadata_filename = "metadata.json"
-
-        txt_path = video_folder / txt_filename
-        timestamped_path = video_folder / timestamped_filename
-        json_path = video_folder / json_filename
-        video_metadata_path = video_folder / metadata_filename
-
-        # Save plain text transcript (just the text, ready to copy/paste)
-        with open(txt_path, "w", encoding="utf-8") as f:
-            f.write(transcript_data["full_text"])
-
-        # Save timestamped version if segments are available
-        if transcript_data.get("segments"):
-            with open(timestamped_path, "w", encoding="utf-8") as f:
-                for segment in transcript_data["segments"]:
-                    f.write(segment + "\n")
-
-        # Save JSON version with full transcript data
-        json_data = {
+        # Segments are Segment records; older callers and archives pass
+        # "[mm:ss - mm:ss] text" strings or dicts
+        transcript_data = dict(
+            transcript_data,
+            segments=[Segment.parse(s) for s in transcript_data.get("segments") or []],
+        )
+        document = {
             "video_info": video_info,
             "url": url,
             "transcribed_at": datetime.now().isoformat(),
             "transcript": transcript_data,
         }
+        files = write_transcript(video_folder, document, self.formats)
 
-        with open(json_path, "w", encoding="utf-8") as f:
-            json.dump(json_data, f, indent=2, ensure_ascii=False)
+        metadata_filename = "metadata.json"
+        txt_path = video_folder / files["txt"]
+        json_path = video_folder / files["json"]
+        video_metadata_path = video_folder / metadata_filename
 
         # Save video metadata separately for easier access
         video_metadata = {
@@ -110,12 +324,18 @@ class TranscriptManager:
             "duration": video_info["duration"],
             "transcribed_at": datetime.now().isoformat(),
             "language": transcript_data.get("language", "unknown"),
+            "transcript_source": source,
+            "language_detection": transcript_data.get("language_detection"),
+            "metrics": metrics,
             "files": {
-                "transcript_txt": txt_filename,
-                "transcript_timestamped": (
-                    timestamped_filename if transcript_data.get("segments") else None
-                ),
-                "transcript_json": json_filename,
+                "transcript_txt": files["txt"],
+                "transcript_timestamped": files.get("timestamped"),
+                "transcript_json": files["json"],
+                **{
+                    f"transcript_{name}": filename
+                    for name, filename in files.items()
+                    if name not in ("txt", "timestamped", "json")
+                },
             },
         }
 
@@ -127,21 +347,157 @@ class TranscriptManager:
             "title": video_info["title"],
             "url": url,
             "folder": video_folder_name,
-            "txt_file": str(video_folder / txt_filename),
-            "json_file": str(video_folder / json_filename),
+            "txt_file": str(txt_path),
+            "json_file": str(json_path),
             "metadata_file": str(video_folder / metadata_filename),
             "transcribed_at": datetime.now().isoformat(),
             "duration": video_info["duration"],
+            "source": source,
         }
+        if metrics:
+            metadata_entry["metrics"] = metrics
+        if transcript_data.get("language_detection"):
+            # Flag videos worth a second look without opening every folder
+            detection = transcript_data["language_detection"]
+            metadata_entry["language_detection"] = {
+                key: detection[key]
+                for key in ("language", "confidence", "low_confidence", "mixed")
+            }
+
+        if cache_key:
+            metadata_entry["cache_key"] = cache_key
+            metadata_entry["last_accessed"] = metadata_entry["transcribed_at"]
+            metadata_entry["size_bytes"] = sum(
+                path.stat().st_size for path in video_folder.iterdir()
+            )
 
         metadata_key = f"{timestamp}_{unique_suffix}"
-        self.metadata[metadata_key] = metadata_entry
-        self._save_metadata()
+        with self._journal_lock():
+            self._catch_up()
+            if cache_key:
+                previous_key = self._cache_index.get(cache_key)
+                if previous_key:
+                    self._remove_entry(previous_key)
+                self._cache_index[cache_key] = metadata_key
+            self.metadata[metadata_key] = metadata_entry
+            if cache_key:
+                self._evict(keep=metadata_key)
+            self._save_entry(metadata_key)
+
+        try:
+            self.search_index.add_transcript(
+                metadata_key, video_info["title"], transcript_data
+            )
+        except sqlite3.Error as error:
+            logger.warning("Could not index transcript %s: %s", metadata_key, error)
 
         return txt_path, json_path, video_folder
 
+    def get_cached_transcript(self, cache_key):
+        """Return (transcript_data, video_info, video_folder) for a cache hit.
+
+        Returns None on a miss. Hits refresh the entry's LRU position; entries
+        whose files have disappeared are dropped.
+        """
+        with self._journal_lock():
+            self._catch_up()
+            metadata_key = self._cache_index.get(cache_key)
+            if metadata_key is None:
+                return None
+
+            entry = self.metadata[metadata_key]
+            try:
+                with open(entry["json_file"], "r", encoding="utf-8") as f:
+                    json_data = json.load(f)
+            except (JSONDecodeError, OSError):
+                logger.warning("Dropping unreadable cached transcript %s", entry)
+                self._remove_entry(metadata_key)
+                return None
+
+            entry["last_accessed"] = datetime.now().isoformat()
+            self._save_entry(metadata_key)
+
+        video_folder = self.output_dir / entry["folder"]
+        return self._transcript(json_data), json_data["video_info"], video_folder
+
+    @staticmethod
+    def _transcript(json_data):
+        """The transcript of a loaded transcript.json, with Segment records."""
+        transcript = json_data["transcript"]
+        transcript["segments"] = [
+            Segment.parse(s) for s in transcript.get("segments") or []
+        ]
+        return transcript
+
+    def _remove_entry(self, metadata_key):
+        """Delete a transcript folder and its metadata entry."""
+        entry = self.metadata.pop(metadata_key, None)
+        if entry is None:
+            return
+        self._delete_entry(metadata_key)
+        try:
+            self.search_index.remove_transcript(metadata_key)
+        except sqlite3.Error as error:
+            logger.warning("Could not unindex transcript %s: %s", metadata_key, error)
+        if self._cache_index.get(entry.get("cache_key")) == metadata_key:
+            del self._cache_index[entry["cache_key"]]
+        shutil.rmtree(self.output_dir / entry["folder"], ignore_errors=True)
+
+    def _evict(self, keep=None):
+        """Remove least recently used cached transcripts beyond the limits."""
+        if not self.cache_max_entries and not self.cache_max_bytes:
+            return
+
+        cached = sorted(
+            (
+                (entry["last_accessed"], key)
+                for key, entry in self.metadata.items()
+                if entry.get("cache_key") and key != keep
+            ),
+            reverse=True,
+        )
+        count = len(cached) + (1 if keep else 0)
+        total_bytes = sum(
+            self.metadata[key].get("size_bytes", 0) for _, key in cached
+        ) + (self.metadata[keep].get("size_bytes", 0) if keep else 0)
+
+        while cached and (
+            (self.cache_max_entries and count > self.cache_max_entries)
+            or (self.cache_max_bytes and total_bytes > self.cache_max_bytes)
+        ):
+            _, key = cached.pop()
+            total_bytes -= self.metadata[key].get("size_bytes", 0)
+            count -= 1
+            self._remove_entry(key)
+
+    def search(self, query, limit=20):
+        """Search saved transcripts; see SearchIndex.search for the hit format."""
+        return self.search_index.search(query, limit=limit)
+
+    def rebuild_search_index(self):
+        """Re-index every saved transcript and return how many were indexed."""
+        self.refresh()
+
+        def transcripts():
+            for key, entry in sorted(self.metadata.items()):
+                try:
+                    with open(entry["json_file"], "r", encoding="utf-8") as f:
+                        json_data = json.load(f)
+                except (KeyError, JSONDecodeError, OSError):
+                    logger.warning("Skipping unreadable transcript %s", key)
+                    continue
+                yield key, entry["title"], self._transcript(json_data)
+
+        return self.search_index.rebuild(transcripts())
+
+    def refresh(self):
+        """Pick up transcripts saved by other processes sharing output_dir."""
+        with self._journal_lock():
+            self._catch_up()
+
     def list_transcripts(self):
         """List all saved transcripts."""
+        self.refresh()
         if not self.metadata:
             return []
 
@@ -0,0 +1,177 @@
+import json
+import os
+from contextlib import ExitStack
+
+
+def _clock(seconds, separator):
+    """HH:MM:SS<separator>mmm as used by SRT (",") and WebVTT (".")."""
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{milliseconds:03d}"
+
+
+# Reused for every segment: json.dumps() builds a new encoder per call
+_compact_json = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+class TranscriptWriter:
+    """Writes one transcript file while write_transcript walks the segments.
+
+    Subclasses override begin(), segment() and end(); each call writes its
+    piece straight to the file, so no output is ever built up in memory.
+    needs_segments writers are skipped for transcripts without segments.
+    """
+
+    filename = None
+    needs_segments = False
+
+    def begin(self, f, document):
+        pass
+
+    def segment(self, f, index, segment):
+        pass
+
+    def end(self, f, document):
+        pass
+
+
+class TextWriter(TranscriptWriter):
+    """Plain text, ready to copy and paste."""
+
+    filename = "transcript.txt"
+
+    def begin(self, f, document):
+        f.write(document["transcript"]["full_text"])
+
+
+class TimestampedWriter(TranscriptWriter):
+    """One "[mm:ss - mm:ss] text" line per segment."""
+
+    filename = "transcript_timestamped.txt"
+    needs_segments = True
+
+    def segment(self, f, index, segment):
+        f.write(segment.timestamped())
+        f.write("\n")
+
+
+class SrtWriter(TranscriptWriter):
+    filename = "transcript.srt"
+    needs_segments = True
+
+    def segment(self, f, index, segment):
+        start = _clock(segment.start, ",")
+        end = _clock(segment.end, ",")
+        f.write(f"{index + 1}\n{start} --> {end}\n{segment.text}\n\n")
+
+
+class VttWriter(TranscriptWriter):
+    filename = "transcript.vtt"
+    needs_segments = True
+
+    def begin(self, f, document):
+        f.write("WEBVTT\n\n")
+
+    def segment(self, f, index, segment):
+        start = _clock(segment.start, ".")
+        end = _clock(segment.end, ".")
+        f.write(f"{start} --> {end}\n{segment.text}\n\n")
+
+
+class JsonlWriter(TranscriptWriter):
+    """One compact JSON segment record per line."""
+
+    filename = "transcript.jsonl"
+    needs_segments = True
+
+    def segment(self, f, index, segment):
+        f.write(_compact_json(segment.to_dict()))
+        f.write("\n")
+
+
+class JsonWriter(TranscriptWriter):
+    """The whole document as compact JSON, segments streamed one by one."""
+
+    filename = "transcript.json"
+
+    def begin(self, f, document):
+        # Everything but the segment list is small: dump it whole and leave
+        # the objects open for the segments
+        head = {key: value for key, value in document.items() if key != "transcript"}
+        fields = {
+            key: value
+            for key, value in document["transcript"].items()
+            if key != "segments"
+        }
+        f.write(_compact_json(head)[:-1] + ("," if head else ""))
+        f.write('"transcript":' + _compact_json(fields)[:-1] + ("," if fields else ""))
+        f.write('"segments":[')
+
+    def segment(self, f, index, segment):
+        if index:
+            f.write(",")
+        f.write(_compact_json(segment.to_dict()))
+
+    def end(self, f, document):
+        f.write("]}}")
+
+
+WRITERS = {
+    "txt": TextWriter,
+    "timestamped": TimestampedWriter,
+    "srt": SrtWriter,
+    "vtt": VttWriter,
+    "jsonl": JsonlWriter,
+    "json": JsonWriter,
+}
+
+# transcript.txt and transcript.json are always written: the archive and
+# the transcript cache read them
+REQUIRED_FORMATS = ("txt", "json")
+
+
+def transcript_formats():
+    """Formats named in TRANSCRIPT_FORMATS, plus the required ones."""
+    names = os.getenv("TRANSCRIPT_FORMATS", "txt,timestamped,json")
+    formats = [name.strip() for name in names.split(",") if name.strip()]
+    unknown = [name for name in formats if name not in WRITERS]
+    if unknown:
+        choices = ", ".join(WRITERS)
+        raise ValueError(
+            f"Unknown TRANSCRIPT_FORMATS {unknown} (choose from {choices})"
+        )
+    return list(REQUIRED_FORMATS) + [f for f in formats if f not in REQUIRED_FORMATS]
+
+
+def write_transcript(folder, document, formats):
+    """Write document in every format in one pass over its segments.
+
+    document is {"transcript": {"full_text", "language", "segments"}, ...}
+    with Segment objects. Returns {format: filename} for the files written.
+    """
+    segments = document["transcript"].get("segments") or []
+    writers = [
+        (name, WRITERS[name]())
+        for name in formats
+        if segments or not WRITERS[name].needs_segments
+    ]
+    with ExitStack() as stack:
+        pairs = [
+            (
+                stack.enter_context(
+                    open(os.path.join(folder, writer.filename), "w", encoding="utf-8")
+                ),
+                writer,
+            )
+            for _, writer in writers
+        ]
+        for f, writer in pairs:
+            writer.begin(f, document)
+        for index, segment in enumerate(segments):
+            for f, writer in pairs:
+                writer.segment(f, index, segment)
+        for f, writer in pairs:
+            writer.end(f, document)
+    return {name: writer.filename for name, writer in writers}
@@ -30,7 +30,11 @@ class TerminalUI:
         print(Fore.YELLOW + "\nOptions:" + Style.RESET_ALL)
         print("  • Paste a YouTube URL to transcribe")
         print("  • Type 'settings' to change Whisper model")
+        print("  • Type 'refresh <URL>' to re-transcribe a cached video")
+        print("  • Type 'batch <file or playlist URL>' to transcribe many videos")
         print("  • Type 'list' to view saved transcripts")
+        print("  • Type 'search <words>' to search saved transcripts")
+        print("  • Type 'reindex' to rebuild the search index")
         print("  • Type 'quit' or 'exit' to close")
         print()
 
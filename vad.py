@@ -0,0 +1,124 @@
+import bisect
+
+import numpy as np
+
+from chunking import SAMPLE_RATE
+
+
+def detect_speech(
+    audio,
+    threshold_db=35.0,
+    min_silence_seconds=1.0,
+    padding_seconds=0.3,
+    frame_seconds=0.03,
+    floor_db=-60.0,
+    sample_rate=SAMPLE_RATE,
+):
+    """Return (start, end) sample ranges of audio that contain speech.
+
+    Energy-based: a frame is speech when its RMS level is within threshold_db
+    of the loud end of the recording (its 95th percentile frame) and above
+    floor_db dBFS. Silences shorter than min_silence_seconds are kept, since
+    they are pauses within speech, and every range is padded by
+    padding_seconds so word onsets and tails are not clipped.
+    """
+    total = len(audio)
+    frame = max(1, int(frame_seconds * sample_rate))
+    frames = total // frame
+    if frames == 0:
+        return [(0, total)] if total else []
+
+    samples = np.asarray(audio[: frames * frame], dtype=np.float32)
+    power = np.mean(samples.reshape(frames, frame) ** 2, axis=1)
+    level = 10 * np.log10(power + 1e-12)
+    threshold = max(floor_db, float(np.percentile(level, 95)) - threshold_db)
+    voiced = level > threshold
+
+    # Frame indices where runs of voiced frames start and stop
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], voiced.view(np.int8), [0]))))
+    min_gap = int(min_silence_seconds * sample_rate)
+    padding = int(padding_seconds * sample_rate)
+    spans = []
+    for start, end in zip(edges[::2] * frame, edges[1::2] * frame):
+        start, end = max(0, start - padding), min(total, end + padding)
+        if spans and start - spans[-1][1] < min_gap:
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((int(start), int(end)))
+    if spans and frames * frame < total and spans[-1][1] >= frames * frame:
+        spans[-1] = (spans[-1][0], total)
+    return spans
+
+
+class SpeechTimeline:
+    """Map between the original audio and its speech-only compaction.
+
+    compact() concatenates the speech ranges so Whisper only decodes speech;
+    restore() shifts the timestamps of a result on the compacted audio back
+    to the original timeline, so formatted transcripts and captions line up
+    with the video.
+    """
+
+    def __init__(self, spans, total_samples, sample_rate=SAMPLE_RATE):
+        self.spans = list(spans)
+        self.total_seconds = total_samples / sample_rate
+        self.sample_rate = sample_rate
+        # Start of each span in the compacted audio, in seconds
+        self._compact_starts = []
+        position = 0
+        for start, end in self.spans:
+            self._compact_starts.append(position / sample_rate)
+            position += end - start
+        self.speech_seconds = position / sample_rate
+
+    @property
+    def skipped_seconds(self):
+        return self.total_seconds - self.speech_seconds
+
+    @property
+    def skipped_fraction(self):
+        if not self.total_seconds:
+            return 0.0
+        return self.skipped_seconds / self.total_seconds
+
+    def compact(self, audio):
+        """Return only the speech ranges of audio, concatenated."""
+        if not self.spans:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate([audio[start:end] for start, end in self.spans])
+
+    def original_time(self, seconds, is_end=False):
+        """Convert a time on the compacted audio to the original timeline.
+
+        A time exactly on the seam between two spans maps to the end of the
+        earlier span when is_end is true and to the start of the later one
+        otherwise, so no segment stretches across removed silence.
+        """
+        if not self.spans:
+            return seconds
+        find = bisect.bisect_left if is_end else bisect.bisect_right
+        index = max(0, find(self._compact_starts, seconds) - 1)
+        start, end = self.spans[index]
+        original = start / self.sample_rate + seconds - self._compact_starts[index]
+        return min(original, end / self.sample_rate)
+
+    def restore(self, result):
+        """Return result with segment (and word) times on the original timeline."""
+        segments = []
+        for segment in result.get("segments", []):
+            restored = dict(
+                segment,
+                start=self.original_time(segment["start"]),
+                end=self.original_time(segment["end"], is_end=True),
+            )
+            if segment.get("words"):
+                restored["words"] = [
+                    dict(
+                        word,
+                        start=self.original_time(word["start"]),
+                        end=self.original_time(word["end"], is_end=True),
+                    )
+                    for word in segment["words"]
+                ]
+            segments.append(restored)
+        return dict(result, segments=segments)
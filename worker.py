@@ -0,0 +1,86 @@
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+def make_worker_id():
+    """Unique worker name: host, process and a random suffix."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class Worker:
+    """Run jobs claimed from a JobQueue one at a time.
+
+    process_job(url, refresh) must return {"result": ..., "timings": ...}
+    or raise. While a job runs, a background thread renews the lease every
+    heartbeat_interval seconds so other workers leave it alone; if this
+    worker dies the lease runs out and the job is claimed again.
+    """
+
+    def __init__(
+        self,
+        queue,
+        process_job,
+        worker_id=None,
+        poll_interval=1.0,
+        heartbeat_interval=None,
+    ):
+        self.queue = queue
+        self.process_job = process_job
+        self.worker_id = worker_id or make_worker_id()
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval or max(
+            queue.lease_seconds / 3, 0.1
+        )
+
+    def _heartbeat(self, job_id, done):
+        while not done.wait(self.heartbeat_interval):
+            if not self.queue.heartbeat(job_id, self.worker_id):
+                logger.warning("Lost the lease on job %s", job_id)
+                return
+
+    def run_once(self):
+        """Claim and run one job; return False when the queue was empty."""
+        job = self.queue.claim(self.worker_id)
+        if job is None:
+            return False
+
+        queue_wait = job["updated_at"] - job["created_at"]
+        logger.info("Worker %s running job %s", self.worker_id, job["id"])
+        done = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(job["id"], done), daemon=True
+        )
+        heartbeat.start()
+        started = time.perf_counter()
+        try:
+            outcome = self.process_job(job["url"], job["refresh"])
+        except Exception as e:
+            timings = {"queue_wait": queue_wait, "total": time.perf_counter() - started}
+            logger.warning("Job %s failed: %s", job["id"], e)
+            self.queue.fail(job["id"], self.worker_id, str(e), timings=timings)
+        else:
+            timings = dict(
+                outcome.get("timings") or {},
+                queue_wait=queue_wait,
+                total=time.perf_counter() - started,
+            )
+            self.queue.complete(
+                job["id"], self.worker_id, outcome["result"], timings=timings
+            )
+        finally:
+            done.set()
+            heartbeat.join()
+        return True
+
+    def run(self, stop_event=None):
+        """Process jobs until stop_event is set, polling while idle."""
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            if not self.run_once():
+                stop_event.wait(self.poll_interval)
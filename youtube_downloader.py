@@ -1,98 +1,466 @@
-import yt_dlp
+import copy
+import html
+import json
 import os
+import re
 import tempfile
+import threading
+import time
 from dotenv import load_dotenv
 
+from audio_cache import AudioCache
+from lazy_imports import lazy_import
+
+yt_dlp = lazy_import("yt_dlp")
+
 load_dotenv()
 
+VTT_TIMING_PATTERN = re.compile(r"(?P<start>[\d:.]+)\s+-->\s+(?P<end>[\d:.]+)")
+VTT_TAG_PATTERN = re.compile(r"<[^>]+>")
+
+# Subtitle formats we can parse, most precise first
+CAPTION_FORMATS = ("json3", "vtt")
+
+VIDEO_ID_PATTERN = re.compile(
+    r"(?:v=|youtu\.be/|/shorts/|/embed/|/live/|/v/)([A-Za-z0-9_-]{11})"
+)
+
+
+def extract_video_id(url):
+    """Return the 11-character YouTube video ID in a URL, or None."""
+    match = VIDEO_ID_PATTERN.search(url)
+    return match.group(1) if match else None
+
+
+def _vtt_seconds(timestamp):
+    """Convert a WebVTT timestamp (HH:MM:SS.mmm or MM:SS.mmm) to seconds."""
+    seconds = 0.0
+    for part in timestamp.split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def parse_json3_captions(data):
+    """Parse YouTube json3 captions into Whisper-style segment dicts."""
+    segments = []
+    for event in json.loads(data).get("events", []):
+        text = "".join(seg.get("utf8", "") for seg in event.get("segs") or [])
+        text = " ".join(text.split())
+        if not text:
+            continue
+        start = event.get("tStartMs", 0) / 1000
+        end = start + event.get("dDurationMs", 0) / 1000
+        segments.append({"start": start, "end": end, "text": " " + text})
+    return segments
+
+
+def parse_vtt_captions(data):
+    """Parse WebVTT captions into Whisper-style segment dicts.
+
+    Auto-generated tracks repeat the previous line in every cue (rolling
+    captions), so lines already emitted by the previous cue are dropped.
+    """
+    segments = []
+    previous_lines = []
+    for block in re.split(r"\n\s*\n", data.replace("\r\n", "\n")):
+        lines = block.strip().splitlines()
+        for index, line in enumerate(lines):
+            match = VTT_TIMING_PATTERN.search(line)
+            if match:
+                break
+        else:
+            continue
+
+        text_lines = []
+        for line in lines[index + 1 :]:
+            line = html.unescape(VTT_TAG_PATTERN.sub("", line)).strip()
+            if line and line not in previous_lines:
+                text_lines.append(line)
+        previous_lines = [
+            html.unescape(VTT_TAG_PATTERN.sub("", line)).strip()
+            for line in lines[index + 1 :]
+        ]
+        if not text_lines:
+            continue
+        segments.append(
+            {
+                "start": _vtt_seconds(match.group("start")),
+                "end": _vtt_seconds(match.group("end")),
+                "text": " " + " ".join(text_lines),
+            }
+        )
+    return segments
+
 
 class YouTubeDownloader:
     def __init__(self, temp_dir=None):
         self.temp_dir = temp_dir or tempfile.gettempdir()
         self.cookies_from_browser = os.getenv("COOKIES_FROM_BROWSER")
         self.cookies_file = os.getenv("COOKIES_FILE")
+        # Resolved info dicts keyed by video ID: {video_id: (resolved_at, info)}
+        self.info_cache_ttl = int(os.getenv("INFO_CACHE_TTL", "300"))
+        self._info_cache = {}
+        self._info_cache_lock = threading.Lock()
+        # Downloaded audio kept by video ID and format for re-runs
+        self.audio_cache = None
+        if os.getenv("AUDIO_CACHE", "false").lower() == "true":
+            self.audio_cache = AudioCache(
+                os.getenv("AUDIO_CACHE_DIR")
+                or os.path.join(self.temp_dir, "audio_cache"),
+                max_bytes=int(os.getenv("AUDIO_CACHE_MAX_BYTES", "0")),
+            )
 
-    def download_audio(self, url):
-        """Download audio from YouTube URL and return the path to the audio file."""
-        # First extract info to get the title
-        info_opts = {"quiet": True}
+    def _base_opts(self, **extra):
+        """Build yt-dlp options shared by every call, including cookie support."""
+        opts = {"quiet": True, "no_warnings": True}
         if self.cookies_from_browser:
-            info_opts["cookiesfrombrowser"] = (
+            opts["cookiesfrombrowser"] = (
                 self.cookies_from_browser,
                 None,
                 None,
                 None,
             )
         elif self.cookies_file:
-            info_opts["cookiefile"] = self.cookies_file
+            opts["cookiefile"] = self.cookies_file
+        opts.update(extra)
+        return opts
+
+    def _get_cached_info(self, video_id):
+        """Return a cached info dict if it is still fresh."""
+        if not video_id or self.info_cache_ttl <= 0:
+            return None
+        with self._info_cache_lock:
+            cached = self._info_cache.get(video_id)
+            if cached is None:
+                return None
+            resolved_at, info = cached
+            if time.monotonic() - resolved_at > self.info_cache_ttl:
+                del self._info_cache[video_id]
+                return None
+            return info
+
+    def _store_cached_info(self, info):
+        """Remember a resolved info dict under its video ID."""
+        video_id = info.get("id")
+        if not video_id or self.info_cache_ttl <= 0:
+            return
+        with self._info_cache_lock:
+            self._info_cache[video_id] = (time.monotonic(), info)
+
+    def resolve(self, url):
+        """Resolve a URL to a yt-dlp info dict, extracting it at most once.
 
-        with yt_dlp.YoutubeDL(info_opts) as ydl:
+        The returned dict can be passed to get_video_info and download_audio
+        so that a video is only resolved once per request. Results are kept
+        in memory for INFO_CACHE_TTL seconds keyed by video ID.
+        """
+        info = self._get_cached_info(extract_video_id(url))
+        if info is not None:
+            return info
+
+        with yt_dlp.YoutubeDL(self._base_opts()) as ydl:
             info = ydl.extract_info(url, download=False)
-            title = info.get("title", "video")
-            # Clean filename for safety
-            safe_title = "".join(
-                c for c in title if c.isalnum() or c in (" ", "-", "_")
-            ).rstrip()
-
-        # Now download with the sanitized filename
-        output_path = os.path.join(self.temp_dir, f"{safe_title}.%(ext)s")
-        audio_quality = os.getenv("AUDIO_QUALITY", "192")
+        self._store_cached_info(info)
+        return info
+
+    def expand_source(self, source):
+        """Expand a batch source into a list of video URLs.
+
+        source may be a text file with one URL per line (blank lines and
+        lines starting with # are ignored), a playlist or channel URL, or a
+        single video URL. Playlists are listed with flat extraction, so no
+        per-video pages are fetched here.
+        """
+        if os.path.isfile(source):
+            with open(source, "r", encoding="utf-8") as f:
+                lines = (line.strip() for line in f)
+                return [line for line in lines if line and not line.startswith("#")]
+
+        with yt_dlp.YoutubeDL(self._base_opts(extract_flat="in_playlist")) as ydl:
+            info = ydl.extract_info(source, download=False)
+            return self._entry_urls(ydl, info, source)
+
+    def _entry_urls(self, ydl, info, source, depth=0):
+        """Collect video URLs from a flat playlist/channel info dict."""
+        if info.get("_type") not in ("playlist", "multi_video"):
+            return [info.get("webpage_url") or source]
+
+        urls = []
+        for entry in info.get("entries") or []:
+            if not entry:
+                continue
+            url = entry.get("url") or entry.get("webpage_url")
+            video_id = entry.get("id")
+            if entry.get("ie_key") == "Youtube" and video_id:
+                urls.append(f"https://www.youtube.com/watch?v={video_id}")
+            elif url and extract_video_id(url):
+                urls.append(url)
+            elif url and depth < 2:
+                # Channel pages list their tabs (Videos, Shorts, ...) as playlists
+                nested = ydl.extract_info(url, download=False)
+                urls.extend(self._entry_urls(ydl, nested, url, depth + 1))
+        return urls
+
+    def list_new_videos(self, source, known_ids, since=None, stop_after=5):
+        """List videos of a playlist or channel that are not in known_ids.
+
+        Returns (video_id, url, upload_date) tuples, newest first as YouTube
+        lists them; upload_date is None when the flat listing has none.
+        Entries are read lazily, page by page, and each playlist (or channel
+        tab) is abandoned after stop_after consecutive known videos or at
+        the first video uploaded before since (YYYYMMDD); stop_after=0 reads
+        the whole listing, for playlists not ordered newest first. A channel
+        with two new uploads therefore costs one listing page per tab,
+        however many videos it has.
+        """
+        opts = self._base_opts(extract_flat="in_playlist", lazy_playlist=True)
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            # process=False keeps the entries a lazy generator of pages
+            info = ydl.extract_info(source, download=False, process=False)
+            return list(
+                self._new_entries(ydl, info, source, set(known_ids), since, stop_after)
+            )
+
+    def _new_entries(self, ydl, info, source, known_ids, since, stop_after, depth=0):
+        """Yield unknown (video_id, url, upload_date) from a flat info dict."""
+        if info.get("_type") in ("url", "url_transparent") and depth < 2:
+            # Unprocessed, a channel's handle URL only points to its videos tab
+            nested = ydl.extract_info(info["url"], download=False, process=False)
+            yield from self._new_entries(
+                ydl, nested, info["url"], known_ids, since, stop_after, depth + 1
+            )
+            return
+        if info.get("_type") not in ("playlist", "multi_video"):
+            video_id = info.get("id") or extract_video_id(source)
+            if video_id not in known_ids:
+                yield video_id, info.get("webpage_url") or source, info.get(
+                    "upload_date"
+                )
+            return
+
+        known_run = 0
+        for entry in info.get("entries") or []:
+            if not entry:
+                continue
+            url = entry.get("url") or entry.get("webpage_url")
+            video_id = entry.get("id")
+            if not (entry.get("ie_key") == "Youtube" and video_id):
+                video_id = extract_video_id(url) if url else None
+            if video_id is None:
+                if url and depth < 2:
+                    # Channel pages list their tabs (Videos, Shorts, ...)
+                    nested = ydl.extract_info(url, download=False, process=False)
+                    yield from self._new_entries(
+                        ydl, nested, url, known_ids, since, stop_after, depth + 1
+                    )
+                continue
+
+            upload_date = entry.get("upload_date")
+            if since and upload_date and upload_date < since:
+                return
+            if video_id in known_ids:
+                known_run += 1
+                if stop_after and known_run >= stop_after:
+                    return
+                continue
+            known_run = 0
+            yield video_id, f"https://www.youtube.com/watch?v={video_id}", upload_date
+
+    def download_audio(self, url, info=None, keep_audio=None):
+        """Download audio from YouTube URL and return the path to the audio file.
+
+        Pass the info dict returned by resolve() to skip re-extraction. By
+        default the best audio stream is kept in its native container
+        (opus/m4a/webm) and decoded only once, by Whisper. Set KEEP_AUDIO=true
+        (or keep_audio=True) to transcode to an MP3 worth keeping instead.
+
+        With AUDIO_CACHE=true the file comes from the AudioCache, downloaded
+        only if no worker has fetched this video in this format before; the
+        returned info then has "audio_cache_hit", and the caller must hand
+        the path to release_audio() instead of deleting it.
+        """
+        if info is None:
+            info = self.resolve(url)
+        if keep_audio is None:
+            keep_audio = os.getenv("KEEP_AUDIO", "false").lower() == "true"
+
+        title = info.get("title", "video")
+        # Clean filename for safety
+        safe_title = "".join(
+            c for c in title if c.isalnum() or c in (" ", "-", "_")
+        ).rstrip()
+
+        # Named by video ID, so videos with the same title never overwrite
+        # each other; a kept MP3 also carries the title
+        video_id = info.get("id") or "video"
+        name = f"{safe_title} [{video_id}]" if keep_audio else video_id
+
+        if self.audio_cache is None or not info.get("id"):
+            audio_file, info = self._download(info, self.temp_dir, name, keep_audio)
+            return audio_file, safe_title, info
+
+        audio_format = "native"
+        if keep_audio:
+            audio_format = f"mp3-{os.getenv('AUDIO_QUALITY', '192')}"
+
+        def download(directory):
+            return self._download(info, directory, name, keep_audio)[0]
+
+        audio_file, hit = self.audio_cache.fetch(info["id"], audio_format, download)
+        return audio_file, safe_title, dict(info, audio_cache_hit=hit)
+
+    def release_audio(self, audio_file):
+        """Hand back audio from download_audio(); returns False if not cached.
+
+        Cached audio stays on disk for later runs; other files are the
+        caller's to delete.
+        """
+        if self.audio_cache is None or not self.audio_cache.contains(audio_file):
+            return False
+        self.audio_cache.release(audio_file)
+        return True
+
+    def _download(self, info, directory, name, keep_audio):
+        """Download a resolved video's audio to directory/name.<ext>.
+
+        Returns (path, processed info).
+        """
+        output_path = os.path.join(directory, f"{name}.%(ext)s")
         debug_mode = os.getenv("DEBUG_MODE", "false").lower() == "true"
 
-        ydl_opts = {
-            "format": "bestaudio/best",
-            "postprocessors": [
+        ydl_opts = self._base_opts(
+            format="bestaudio/best",
+            outtmpl=output_path,
+            quiet=not debug_mode,
+            no_warnings=not debug_mode,
+        )
+        if keep_audio:
+            audio_quality = os.getenv("AUDIO_QUALITY", "192")
+            ydl_opts["postprocessors"] = [
                 {
                     "key": "FFmpegExtractAudio",
                     "preferredcodec": "mp3",
                     "preferredquality": audio_quality,
                 }
-            ],
-            "outtmpl": output_path,
-            "quiet": not debug_mode,
-            "no_warnings": not debug_mode,
-        }
+            ]
 
-        # Add cookie support
-        if self.cookies_from_browser:
-            ydl_opts["cookiesfrombrowser"] = (
-                self.cookies_from_browser,
-                None,
-                None,
-                None,
-            )
-        elif self.cookies_file:
-            ydl_opts["cookiefile"] = self.cookies_file
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            # process_ie_result mutates the dict, so keep the cached copy clean
+            info = ydl.process_ie_result(copy.deepcopy(info), download=True)
+
+        if keep_audio:
+            audio_file = os.path.join(directory, f"{name}.mp3")
+        else:
+            audio_file = self._downloaded_path(info, output_path)
+        return audio_file, info
+
+    def stream_source(self, info):
+        """Return (media URL, HTTP headers) of the best audio-only format.
 
+        Used by streaming mode, where ffmpeg reads the stream directly and
+        nothing is written to disk.
+        """
+        ydl_opts = self._base_opts(format="bestaudio/best")
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
-            audio_file = os.path.join(self.temp_dir, f"{safe_title}.mp3")
+            selected = ydl.process_ie_result(copy.deepcopy(info), download=False)
+        if "url" not in selected:
+            raise ValueError("No single audio stream is available for streaming")
+        return selected["url"], selected.get("http_headers") or {}
 
-            return audio_file, safe_title, info
+    def _downloaded_path(self, info, output_path):
+        """Return the path of the file yt-dlp wrote for an info dict."""
+        downloads = info.get("requested_downloads") or []
+        if downloads and downloads[0].get("filepath"):
+            return downloads[0]["filepath"]
+        return output_path.replace("%(ext)s", info.get("ext", "webm"))
 
-    def get_video_info(self, url):
-        """Get video metadata without downloading."""
-        ydl_opts = {
-            "quiet": True,
-            "no_warnings": True,
-        }
+    def _pick_caption_track(self, tracks, language, automatic=False, spoken=None):
+        """Return (language, format dict) for the best matching track, or None.
 
-        # Add cookie support for metadata extraction
-        if self.cookies_from_browser:
-            ydl_opts["cookiesfrombrowser"] = (
-                self.cookies_from_browser,
-                None,
-                None,
-                None,
+        automatic tracks under plain language codes are machine translations
+        unless the code is the spoken language, so only those and the
+        "-orig" tracks are considered.
+        """
+        if automatic:
+            tracks = {
+                lang: formats
+                for lang, formats in tracks.items()
+                if lang.endswith("-orig") or (spoken and lang == spoken)
+            }
+        if not tracks:
+            return None
+        if language:
+            candidates = [lang for lang in tracks if lang == language]
+            candidates += sorted(
+                lang for lang in tracks if lang.startswith(f"{language}-")
             )
-        elif self.cookies_file:
-            ydl_opts["cookiefile"] = self.cookies_file
+        else:
+            # Auto captions list every translation; the "-orig" track is the
+            # spoken language
+            candidates = [lang for lang in tracks if lang.endswith("-orig")]
+            candidates += [lang for lang in tracks if lang not in candidates]
+        for lang in candidates:
+            formats = {fmt.get("ext"): fmt for fmt in tracks[lang] if fmt.get("url")}
+            for ext in CAPTION_FORMATS:
+                if ext in formats:
+                    return lang, formats[ext]
+        return None
 
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
+    def fetch_captions(self, info, language=None, allow_auto=None):
+        """Return existing YouTube captions as a Whisper-style result, or None.
+
+        Manual subtitles are preferred; auto-generated captions are only used
+        when allow_auto (CAPTIONS_ALLOW_AUTO) is enabled. language defaults to
+        the video's own language when None. The result has the same "text",
+        "segments" and "language" keys as WhisperTranscriber.transcribe, so it
+        can go straight to format_transcript.
+        """
+        if allow_auto is None:
+            allow_auto = os.getenv("CAPTIONS_ALLOW_AUTO", "false").lower() == "true"
+        spoken = info.get("language")
+        language = language or spoken
+
+        sources = [(info.get("subtitles"), False)]
+        if allow_auto:
+            # Auto captions for the original audio are listed as e.g. "en-orig"
+            sources.append((info.get("automatic_captions"), True))
+
+        for tracks, automatic in sources:
+            picked = self._pick_caption_track(
+                tracks or {}, language, automatic=automatic, spoken=spoken
+            )
+            if picked is None:
+                continue
+            track_language, fmt = picked
+            with yt_dlp.YoutubeDL(self._base_opts()) as ydl:
+                data = ydl.urlopen(fmt["url"]).read().decode("utf-8")
+            if fmt["ext"] == "json3":
+                segments = parse_json3_captions(data)
+            else:
+                segments = parse_vtt_captions(data)
+            if not segments:
+                continue
             return {
-                "title": info.get("title", "Unknown"),
-                "duration": info.get("duration", 0),
-                "uploader": info.get("uploader", "Unknown"),
-                "upload_date": info.get("upload_date", "Unknown"),
+                "text": "".join(segment["text"] for segment in segments),
+                "segments": segments,
+                "language": track_language.split("-")[0],
             }
+        return None
+
+    def get_video_info(self, url_or_info):
+        """Get video metadata without downloading.
+
+        Accepts either a URL or an info dict returned by resolve().
+        """
+        if isinstance(url_or_info, dict):
+            info = url_or_info
+        else:
+            info = self.resolve(url_or_info)
+
+        return {
+            "id": info.get("id"),
+            "title": info.get("title", "Unknown"),
+            "duration": info.get("duration", 0),
+            "uploader": info.get("uploader", "Unknown"),
+            "upload_date": info.get("upload_date", "Unknown"),
+        }